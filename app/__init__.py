@@ -1,11 +1,17 @@
 
 from flask import Flask
-from app.extensions import ma, limiter
+from app.extensions import ma, limiter, cache, orjson, ORJSONProvider
 from app.models import db
+from app.migrations import upgrade_command
+from app.utils.customer_summary import rebuild_command
+from app.utils.db_pool import init_pool_logging
+from app.utils.db_metrics import init_query_metrics
+from app.utils.db_routing import init_read_replica
 from app.blueprints.customers import customers_bp
 from app.blueprints.mechanics import mechanics_bp
 from app.blueprints.service_tickets import service_tickets_bp
 from app.blueprints.inventory import inventory_bp
+from app.blueprints.search import search_bp
 from flask_swagger_ui import get_swaggerui_blueprint
 
 # Swagger UI config for API documentation
@@ -24,17 +30,28 @@ def create_app(config_name):
     app = Flask(__name__)
     app.config.from_object(f'config.{config_name}')
 
+    if app.config.get('USE_ORJSON') and orjson is not None:
+        app.json = ORJSONProvider(app) # faster JSON encoding for jsonify and streamed responses
+
     # Initialize extensions
     ma.init_app(app)
     db.init_app(app)
     limiter.init_app(app)
+    cache.init_app(app)
+    init_pool_logging(app, db)
+    init_query_metrics(app, db)
+    init_read_replica(app)
     
     # Register blueprints
     app.register_blueprint(customers_bp, url_prefix='/customers')
     app.register_blueprint(mechanics_bp, url_prefix='/mechanics')
     app.register_blueprint(service_tickets_bp, url_prefix='/service_tickets')
     app.register_blueprint(inventory_bp, url_prefix='/inventory')
+    app.register_blueprint(search_bp, url_prefix='/search')
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL) #Registering our swagger blueprint
+
+    app.cli.add_command(upgrade_command) # flask db-upgrade
+    app.cli.add_command(rebuild_command) # flask customer-summary-rebuild
     return app
 
 
@@ -1,11 +1,12 @@
 from flask import request, jsonify
-from sqlalchemy import select
+from sqlalchemy import select, update, delete
 from marshmallow import ValidationError
-from app.blueprints.customers.schemas import customer_schema, customers_schema, login_schema
-from app.models import Customer, db
+from app.blueprints.customers.schemas import customer_schema, customers_schema, login_schema, customer_summary_schema
+from app.models import Customer, CustomerSummary, ServiceTicket, normalize_email, db
 from app.blueprints.customers import customers_bp
-from app.blueprints.service_tickets.schemas import tickets_return_schema
-from app.utils.util import encode_token, token_required
+from app.blueprints.service_tickets.schemas import ticket_return_schema, tickets_return_schema, ticket_load_options
+from app.utils.passwords import hash_password, verify_password, needs_rehash, PasswordHasherBusy
+from app.utils.util import encode_token, token_required, keyset_paginate, paginated_response, wants_stream, stream_response, conditional_get, bump_cache_version
 
 # ======================================================================
 # CUSTOMER LOGIN [POST]
@@ -19,14 +20,29 @@ def login():
     except ValidationError as e:
         return jsonify(e.messages), 400
     
-    email = credentials["email"]
+    email = normalize_email(credentials["email"])
     password = credentials["password"]
 
-    query = select(Customer).where(Customer.email == email)
+    # only the columns login needs, looked up through the unique email index
+    query = select(Customer.id, Customer.password).where(Customer.email_normalized == email)
 
-    customer = db.session.execute(query).scalars().first()
+    customer = db.session.execute(query).first()
+
+    try:
+        valid = verify_password(customer.password if customer else None, password)
+    except PasswordHasherBusy:
+        return jsonify({"message": "Too many login attempts, please try again shortly."}), 503
+
+    if valid:
+        # upgrade plaintext or outdated work factor hashes while we have the password
+        if needs_rehash(customer.password):
+            try:
+                new_hash = hash_password(password)
+                db.session.execute(update(Customer).where(Customer.id == customer.id).values(password=new_hash))
+                db.session.commit()
+            except PasswordHasherBusy:
+                pass  # try again on the next login
 
-    if customer and customer.password == password:
         token = encode_token(customer.id)
 
         response = {
@@ -46,6 +62,7 @@ def login():
 
 @customers_bp.route("/my-tickets", methods=['GET'])
 @token_required
+@conditional_get('customers', 'service_tickets', 'mechanics', 'inventory')
 def get_my_tickets(customer_id):
     
     customer = db.session.get(Customer, customer_id)
@@ -53,12 +70,16 @@ def get_my_tickets(customer_id):
     if not customer:
         return jsonify({"error": "Customer not found."}), 404
     
+    query = select(ServiceTicket).where(ServiceTicket.customer_id == customer.id).options(*ticket_load_options)
+    if wants_stream():
+        return stream_response(query.order_by(ServiceTicket.service_date, ServiceTicket.id), ticket_return_schema)
+
     try:
-        tickets = customer.service_tickets
-        return tickets_return_schema.jsonify(tickets), 200
-    
-    except Exception as e:
-        return jsonify({"error": "Could not retrieve tickets."}), 500
+        tickets, next_cursor = keyset_paginate(query, ServiceTicket.service_date, ServiceTicket.id)
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters."}), 400
+
+    return paginated_response(tickets_return_schema.jsonify(tickets), next_cursor)
 
 
 # ======================================================================
@@ -72,13 +93,19 @@ def create_customer():
     except ValidationError as e:
         return jsonify(e.messages), 400
 
-    query = select(Customer).where(Customer.email == customer_data['email']) #Checking our db for a customer with this email
+    query = select(Customer).where(Customer.email_normalized == normalize_email(customer_data['email'])) #Checking our db for a customer with this email
     existing_customer = db.session.execute(query).scalars().all()
     if existing_customer:
         return jsonify({"error": "Email already associated with a customer."}), 400
-    
+
+    try:
+        customer_data['password'] = hash_password(customer_data['password'])
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, please try again shortly."}), 503
+
     new_customer = Customer(**customer_data)
     db.session.add(new_customer)
+    bump_cache_version('customers')
     db.session.commit()
     return customer_schema.jsonify(new_customer), 201
 
@@ -87,22 +114,21 @@ def create_customer():
 # GET ALL CUSTOMERS [GET]
 # ======================================================================
 
-# Route uses pagination to return customers with page and per_page limits
+# Route uses keyset pagination with optional cursor and per_page query params.
+# The cursor for the next page is returned in the X-Next-Cursor header.
+# ?stream=1 or Accept: application/x-ndjson streams the whole collection instead.
 @customers_bp.route("/", methods=['GET'])
+@conditional_get('customers')
 def get_customers():
+    if wants_stream():
+        return stream_response(select(Customer).order_by(Customer.id), customer_schema)
+
     try:
-        page = int(request.args.get('page'))
-        per_page = int(request.args.get('per_page'))
+        customers, next_cursor = keyset_paginate(select(Customer), Customer.id)
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters."}), 400
 
-        query = select(Customer)
-        customers = db.paginate(query, page=page, per_page=per_page)
-        return customers_schema.jsonify(customers), 200
-    
-    # if page or per_page are not provided return without pagination
-    except:
-        query = select(Customer)
-        customers = db.session.execute(query).scalars().all()
-        return customers_schema.jsonify(customers), 200
+    return paginated_response(customers_schema.jsonify(customers), next_cursor), 200
 
 
 # ======================================================================
@@ -110,6 +136,7 @@ def get_customers():
 # ======================================================================
 
 @customers_bp.route("/<int:customer_id>", methods=['GET'])
+@conditional_get('customers')
 def get_customer(customer_id):
     customer = db.session.get(Customer, customer_id)
 
@@ -118,6 +145,25 @@ def get_customer(customer_id):
     return jsonify({"error": "Customer not found."}), 404
 
 
+# ======================================================================
+# GET A CUSTOMER SUMMARY [GET]
+# ======================================================================
+
+# Ticket count, last service date and lifetime parts spend, read from the rollup row
+# maintained by every ticket write instead of aggregating the customer's tickets.
+@customers_bp.route("/<int:customer_id>/summary", methods=['GET'])
+@conditional_get('customers', 'service_tickets', 'inventory')
+def get_customer_summary(customer_id):
+    summary = db.session.get(CustomerSummary, customer_id)
+
+    if summary is None:
+        if db.session.get(Customer, customer_id) is None:
+            return jsonify({"error": "Customer not found."}), 404
+        summary = CustomerSummary(customer_id=customer_id, ticket_count=0, last_service_date=None, parts_spend=0) # no tickets yet
+
+    return customer_summary_schema.jsonify(summary), 200
+
+
 # ======================================================================
 # UPDATE A CUSTOMER ENTRY [PUT]
 # ======================================================================
@@ -134,9 +180,15 @@ def update_customer(customer_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
     
+    try:
+        customer_data['password'] = hash_password(customer_data['password'])
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, please try again shortly."}), 503
+
     for key, value in customer_data.items():
         setattr(customer, key, value)
 
+    bump_cache_version('customers')
     db.session.commit()
     return customer_schema.jsonify(customer), 200
 
@@ -153,7 +205,10 @@ def delete_customer(customer_id):
     if not customer:
         return jsonify({"error": "Customer not found."}), 404
     
+    # the rollup row outlives the customer's tickets, remove it before the customer it references
+    db.session.execute(delete(CustomerSummary).where(CustomerSummary.customer_id == customer_id))
     db.session.delete(customer)
+    bump_cache_version('customers')
     db.session.commit()
     return jsonify({"message": f'Customer id: {customer_id}, successfully deleted.'}), 200
 
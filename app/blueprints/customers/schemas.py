@@ -1,11 +1,25 @@
 
 from app.extensions import ma
-from app.models import Customer
+from app.models import Customer, CustomerSummary
+from marshmallow import fields
+from app.utils.serializers import CompiledDumpMixin, Money
 
-class CustomerSchema(ma.SQLAlchemyAutoSchema):
+class CustomerSchema(CompiledDumpMixin, ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Customer #using the SQLAlchemy model to create fields used in serialization, deserialization, and validation
+        exclude = ("email_normalized",) #derived from email by the model
+
+    password = fields.Str(required=True, load_only=True) #accepted on input, the stored hash is never returned
     
 customer_schema = CustomerSchema()
 customers_schema = CustomerSchema(many=True) #variant that allows for the serialization of many Customers
-login_schema = CustomerSchema(only=["email", "password"]) #variant that only includes email and password fields
\ No newline at end of file
+login_schema = CustomerSchema(only=["email", "password"]) #variant that only includes email and password fields
+
+class CustomerSummarySchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = CustomerSummary
+        include_fk = True #customer_id is both the key and the foreign key
+
+    parts_spend = Money()
+
+customer_summary_schema = CustomerSummarySchema()
\ No newline at end of file
@@ -1,9 +1,16 @@
 from flask import request, jsonify
 from sqlalchemy import select
+import csv
 from marshmallow import ValidationError
-from app.blueprints.inventory.schemas import inventory_schema, inventory_many_schema
+from app.blueprints.inventory.schemas import inventory_schema, inventory_many_schema, inventory_import_row_schema
 from app.models import Inventory, db
 from app.blueprints.inventory import inventory_bp
+from app.utils.util import keyset_paginate, paginated_response, wants_stream, stream_response, get_page_size, cached_read, bump_cache_version, conditional_get, upload_stream, upsert
+from app.utils.customer_summary import apply_price_changes
+
+IMPORT_CHUNK_SIZE = 1000  # CSV rows upserted per statement and transaction
+IMPORT_ERROR_LIMIT = 100  # rejected rows described in the import response, the rest are only counted
+IMPORT_COLUMNS = ('name', 'price', 'stock')  # CSV columns read by the import, others are ignored
 
 # ======================================================================
 # CREATE INVENTORY ITEM [POST]
@@ -24,21 +31,94 @@ def create_inventory():
     new_inventory = Inventory(**inventory_data)
 
     db.session.add(new_inventory)
+    bump_cache_version('inventory')
     db.session.commit()
     
     return inventory_schema.jsonify(new_inventory), 201
 
 
+# ======================================================================
+# IMPORT INVENTORY FROM CSV [POST]
+# ======================================================================
+
+def import_chunk(chunk, columns, counts):
+    """Upserts one chunk ({name: row}) with a single statement and commits it."""
+    query = select(Inventory.id, Inventory.name, Inventory.price).where(Inventory.name.in_(chunk))
+    existing = {name: (inventory_id, price) for inventory_id, name, price in db.session.execute(query)}
+
+    update_columns = [column for column in columns if column != 'name']
+    upsert(Inventory.__table__, list(chunk.values()), 'name', update_columns, keep_on_null=('stock',))
+    apply_price_changes({inventory_id: chunk[name]['price'] - price for name, (inventory_id, price) in existing.items()})
+
+    bump_cache_version('inventory')
+    db.session.commit()
+    counts['updated'] += len(existing)
+    counts['inserted'] += len(chunk) - len(existing)
+
+
+# Accepts a CSV file (multipart field 'file', or a text/csv body) with a header row naming
+# at least name and price, optionally stock. Rows are read as a stream and upserted by name
+# IMPORT_CHUNK_SIZE at a time, each chunk in its own transaction, so memory stays flat for
+# any file size. Invalid rows are skipped and counted as rejected. A blank stock cell keeps
+# an existing part's stock (a new part with one is not stock tracked).
+@inventory_bp.route("/import", methods=['POST'])
+def import_inventory():
+    reader = csv.DictReader(upload_stream())
+    counts = {"inserted": 0, "updated": 0, "rejected": 0}
+    errors = []
+
+    try:
+        missing_columns = [column for column in ('name', 'price') if column not in (reader.fieldnames or [])]
+        if missing_columns:
+            return jsonify({"error": f"CSV header is missing columns: {missing_columns}"}), 400
+        columns = [column for column in IMPORT_COLUMNS if column in reader.fieldnames]
+
+        chunk = {}
+        for row in reader:
+            try:
+                item = inventory_import_row_schema.load({column: row[column] or None for column in columns}) # empty cells are null
+            except ValidationError as e:
+                counts['rejected'] += 1
+                if len(errors) < IMPORT_ERROR_LIMIT:
+                    errors.append({"line": reader.line_num, "errors": e.messages})
+                continue
+
+            if item['name'] in chunk or len(chunk) >= IMPORT_CHUNK_SIZE: # a repeated name updates the earlier row
+                import_chunk(chunk, columns, counts)
+                chunk = {}
+            chunk[item['name']] = item
+
+        if chunk:
+            import_chunk(chunk, columns, counts)
+
+    except (csv.Error, UnicodeDecodeError) as e:
+        db.session.rollback() # chunks before this line stay imported
+        return jsonify({"error": f"Malformed CSV at line {reader.line_num}: {e}", **counts}), 400
+
+    return jsonify({**counts, "errors": errors}), 200
+
+
 # ======================================================================
 # GET ALL INVENTORY ITEMS [GET]
 # ======================================================================
 
 @inventory_bp.route("/", methods=['GET'])
+@conditional_get('inventory')
 def get_all_inventory():
-    query = select(Inventory)
-    inventory = db.session.execute(query).scalars().all()
+    if wants_stream():
+        return stream_response(select(Inventory).order_by(Inventory.id), inventory_schema)
 
-    return inventory_many_schema.jsonify(inventory)
+    def load_page():
+        inventory, next_cursor = keyset_paginate(select(Inventory), Inventory.id)
+        return inventory_many_schema.dump(inventory), next_cursor
+
+    try:
+        cache_key = f"list:{request.args.get('cursor')}:{get_page_size()}"
+        inventory, next_cursor = cached_read('inventory', cache_key, load_page)
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters."}), 400
+
+    return paginated_response(jsonify(inventory), next_cursor)
 
 
 # ======================================================================
@@ -46,11 +126,16 @@ def get_all_inventory():
 # ======================================================================
 
 @inventory_bp.route("/<int:inventory_id>", methods=['GET'])
+@conditional_get('inventory')
 def get_inventory(inventory_id):
-    inventory = db.session.get(Inventory, inventory_id)
+    def load_item():
+        inventory = db.session.get(Inventory, inventory_id)
+        return inventory_schema.dump(inventory) if inventory else None
+
+    inventory = cached_read('inventory', f"item:{inventory_id}", load_item)
 
     if inventory:
-        return inventory_schema.jsonify(inventory), 200
+        return jsonify(inventory), 200
     return jsonify({"error": "Inventory item not found."}), 404
 
 
@@ -70,9 +155,13 @@ def update_inventory(inventory_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
     
+    # spend in the customer summaries is priced at the current price, move it with the price
+    apply_price_changes({inventory_id: inventory_data.get('price', inventory.price) - inventory.price})
+
     for key, value in inventory_data.items():
         setattr(inventory, key, value)
 
+    bump_cache_version('inventory')
     db.session.commit()
     return inventory_schema.jsonify(inventory), 200
 
@@ -89,6 +178,7 @@ def delete_inventory(inventory_id):
         return jsonify({"error": "Inventory item not found."}), 404
     
     db.session.delete(inventory)
+    bump_cache_version('inventory')
     db.session.commit()
     return jsonify({"message": f'inventory id: {inventory_id}, successfully deleted.'}), 200
 
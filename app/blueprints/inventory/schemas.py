@@ -1,14 +1,35 @@
+from decimal import Decimal
 
 from app.extensions import ma
 from app.models import Inventory
+from marshmallow import fields, validate
+from app.utils.serializers import CompiledDumpMixin, Money
 
-class InventorySchema(ma.SQLAlchemyAutoSchema):
+PRICE_RANGE = validate.Range(min=0, max=Decimal("99999999.99"))  # fits inventory.price, Numeric(10, 2)
+
+
+class InventorySchema(CompiledDumpMixin, ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Inventory
 
+    price = Money(required=True, validate=PRICE_RANGE) #Decimal in the database and in Python, a number in JSON
+    stock = fields.Int(allow_none=True, validate=validate.Range(min=0)) #omit or null for parts whose stock is not tracked
+
 # When using auto schema, why do I not need to specify the primary key as dump_only? 
 # How does the schema know that the primary key should not be provided on input?  
 
   
+class InventoryImportRowSchema(ma.Schema):
+    """
+    One row of a CSV catalog for POST /inventory/import. A plain schema: the auto schema's
+    load() does per-call work that adds up over tens of thousands of rows.
+    Example row: Oil Filter,12.50,40
+    """
+    name = fields.Str(required=True, validate=validate.Length(min=1, max=255))
+    price = Money(required=True, validate=PRICE_RANGE)
+    stock = fields.Int(allow_none=True, validate=validate.Range(min=0))
+
+
 inventory_schema = InventorySchema()
-inventory_many_schema = InventorySchema(many=True)
\ No newline at end of file
+inventory_many_schema = InventorySchema(many=True)
+inventory_import_row_schema = InventoryImportRowSchema()
\ No newline at end of file
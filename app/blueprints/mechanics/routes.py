@@ -1,11 +1,12 @@
 
-from flask import request, jsonify
-from sqlalchemy import select
+from flask import request, jsonify, current_app
+from sqlalchemy import select, func, and_, desc
 from marshmallow import ValidationError
-from app.blueprints.mechanics.schemas import mechanic_schema, mechanics_schema, top_mechanics_schema
-from app.models import Mechanic, db
+from app.blueprints.mechanics.schemas import mechanic_schema, mechanics_schema, top_mechanics_schema, top_mechanics_query_schema
+from app.models import Mechanic, ServiceTicket, service_mechanic, db
 from app.blueprints.mechanics import mechanics_bp
-from app.extensions import limiter
+from app.extensions import limiter, cache
+from app.utils.util import keyset_paginate, paginated_response, wants_stream, stream_response, get_page_size, cached_read, bump_cache_version, cache_version, conditional_get
 
 # ======================================================================
 # CREATE A NEW MECHANIC [POST]
@@ -26,6 +27,7 @@ def create_mechanic():
     
     new_mechanic = Mechanic(**mechanic_data)
     db.session.add(new_mechanic)
+    bump_cache_version('mechanics')
     db.session.commit()
     return mechanic_schema.jsonify(new_mechanic), 201
 
@@ -35,11 +37,22 @@ def create_mechanic():
 # ======================================================================
 
 @mechanics_bp.route("/", methods=['GET'])
+@conditional_get('mechanics')
 def get_mechanics():
-    query = select(Mechanic)
-    mechanics = db.session.execute(query).scalars().all()
+    if wants_stream():
+        return stream_response(select(Mechanic).order_by(Mechanic.id), mechanic_schema)
 
-    return mechanics_schema.jsonify(mechanics)
+    def load_page():
+        mechanics, next_cursor = keyset_paginate(select(Mechanic), Mechanic.id)
+        return mechanics_schema.dump(mechanics), next_cursor
+
+    try:
+        cache_key = f"list:{request.args.get('cursor')}:{get_page_size()}"
+        mechanics, next_cursor = cached_read('mechanics', cache_key, load_page)
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters."}), 400
+
+    return paginated_response(jsonify(mechanics), next_cursor)
 
 
 # ======================================================================
@@ -47,11 +60,16 @@ def get_mechanics():
 # ======================================================================
 
 @mechanics_bp.route("/<int:mechanic_id>", methods=['GET'])
+@conditional_get('mechanics')
 def get_mechanic(mechanic_id):
-    mechanic = db.session.get(Mechanic, mechanic_id)
+    def load_item():
+        mechanic = db.session.get(Mechanic, mechanic_id)
+        return mechanic_schema.dump(mechanic) if mechanic else None
+
+    mechanic = cached_read('mechanics', f"item:{mechanic_id}", load_item)
 
     if mechanic:
-        return mechanic_schema.jsonify(mechanic), 200
+        return jsonify(mechanic), 200
     return jsonify({"error": "Mechanic not found."}), 404
 
 
@@ -74,6 +92,7 @@ def update_mechanic(mechanic_id):
     for key, value in mechanic_data.items():
         setattr(mechanic, key, value)
 
+    bump_cache_version('mechanics')
     db.session.commit()
     return mechanic_schema.jsonify(mechanic), 200
 
@@ -90,6 +109,7 @@ def delete_mechanic(mechanic_id):
         return jsonify({"error": "mechanic not found."}), 404
     
     db.session.delete(mechanic)
+    bump_cache_version('mechanics')
     db.session.commit()
     return jsonify({"message": f'mechanic id: {mechanic_id}, successfully deleted.'}), 200
 
@@ -98,11 +118,37 @@ def delete_mechanic(mechanic_id):
 # TOP MECHANICS BY SERVICE TICKETS [GET]
 # ======================================================================
 
+# Query params: limit (default 10), optional from/to service dates (YYYY-MM-DD).
+# Counts are aggregated in SQL and cached for TOP_MECHANICS_CACHE_TIMEOUT seconds.
 @mechanics_bp.route("/top_mechanics", methods=['GET'])
+@conditional_get('mechanics', 'service_tickets')
 def get_top_mechanics():
-    query = select(Mechanic)
-    mechanics = db.session.execute(query).scalars().all()
-
-    mechanics.sort(key=lambda mech: len(mech.service_tickets), reverse=True)
+    try:
+        params = top_mechanics_query_schema.load(request.args)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
 
-    return top_mechanics_schema.jsonify(mechanics)
\ No newline at end of file
+    # mechanics version in the key so renamed or deleted mechanics drop out right away
+    cache_key = f"top_mechanics:v{cache_version('mechanics')}:{params['limit']}:{params['from_date']}:{params['to_date']}"
+    top_mechanics = cache.get(cache_key)
+
+    if top_mechanics is None:
+        # date filters live in the join condition so mechanics without tickets still count as 0
+        ticket_join = [ServiceTicket.id == service_mechanic.c.ticket_id]
+        if params['from_date']:
+            ticket_join.append(ServiceTicket.service_date >= params['from_date'])
+        if params['to_date']:
+            ticket_join.append(ServiceTicket.service_date <= params['to_date'])
+
+        query = (
+            select(Mechanic.id, Mechanic.name, func.count(ServiceTicket.id).label("ticket_count"))
+            .outerjoin(service_mechanic, service_mechanic.c.mechanic_id == Mechanic.id)
+            .outerjoin(ServiceTicket, and_(*ticket_join))
+            .group_by(Mechanic.id, Mechanic.name)
+            .order_by(desc("ticket_count"), Mechanic.id)
+            .limit(params['limit'])
+        )
+        top_mechanics = top_mechanics_schema.dump(db.session.execute(query).all())
+        cache.set(cache_key, top_mechanics, timeout=current_app.config['TOP_MECHANICS_CACHE_TIMEOUT'])
+
+    return jsonify(top_mechanics), 200
@@ -1,9 +1,10 @@
 
 from app.extensions import ma
 from app.models import Mechanic
-from marshmallow import fields
+from marshmallow import fields, validate
+from app.utils.serializers import CompiledDumpMixin
 
-class MechanicSchema(ma.SQLAlchemyAutoSchema):
+class MechanicSchema(CompiledDumpMixin, ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Mechanic
         load_instance = False
@@ -18,9 +19,25 @@ class MechanicSchema(ma.SQLAlchemyAutoSchema):
     salary = fields.Float(required=True)
 
 
+class TopMechanicSchema(ma.Schema):
+    id = fields.Int()
+    name = fields.Str()
+    ticket_count = fields.Int()
+
+
+class TopMechanicsQuerySchema(ma.Schema):
+    """
+    Query string for the top mechanics leaderboard.
+    Example: /mechanics/top_mechanics?limit=5&from=2025-01-01&to=2025-01-31
+    """
+    limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=100))
+    from_date = fields.Date(data_key="from", load_default=None)
+    to_date = fields.Date(data_key="to", load_default=None)
+
 
 mechanic_schema = MechanicSchema()
 mechanics_schema = MechanicSchema(many=True)
-top_mechanics_schema = MechanicSchema(only=("id", "name"), many=True)
+top_mechanics_schema = TopMechanicSchema(many=True)
+top_mechanics_query_schema = TopMechanicsQuerySchema()
 
 
@@ -0,0 +1,6 @@
+
+from flask import Blueprint
+
+search_bp = Blueprint('search_bp', __name__)
+
+from app.blueprints.search import routes
@@ -0,0 +1,35 @@
+from flask import request, jsonify
+from marshmallow import ValidationError
+from app.blueprints.search.schemas import search_query_schema
+from app.blueprints.service_tickets.schemas import tickets_return_schema, ticket_load_options
+from app.blueprints.inventory.schemas import inventory_many_schema
+from app.models import ServiceTicket, Inventory, db
+from app.blueprints.search import search_bp
+from app.utils.fulltext import fulltext_search
+from app.utils.util import conditional_get
+
+# ======================================================================
+# FULL-TEXT SEARCH [GET]
+# ======================================================================
+
+# Ranked search over ticket descriptions and inventory names. Every word of q must
+# match; each list holds the best `limit` matches, best first.
+@search_bp.route("/", methods=['GET'])
+@conditional_get('service_tickets', 'mechanics', 'inventory')
+def search():
+    try:
+        params = search_query_schema.load(request.args)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    dialect = db.engine.dialect.name
+    ticket_query = fulltext_search(ServiceTicket, ServiceTicket.service_desc, params['q'], dialect)
+    inventory_query = fulltext_search(Inventory, Inventory.name, params['q'], dialect)
+
+    tickets = db.session.execute(ticket_query.options(*ticket_load_options).limit(params['limit'])).scalars().all()
+    inventory = db.session.execute(inventory_query.limit(params['limit'])).scalars().all()
+
+    return jsonify({
+        "service_tickets": tickets_return_schema.dump(tickets),
+        "inventory": inventory_many_schema.dump(inventory),
+    }), 200
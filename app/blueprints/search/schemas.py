@@ -0,0 +1,20 @@
+from app.extensions import ma
+from app.utils.fulltext import search_terms
+from marshmallow import fields, validate, ValidationError
+
+
+def has_search_terms(q):
+    if not search_terms(q):
+        raise ValidationError("Search text must contain at least one word.")
+
+
+class SearchQuerySchema(ma.Schema):
+    """
+    Query string for the full-text search.
+    Example: /search/?q=brake squeal&limit=10
+    """
+    q = fields.Str(required=True, validate=[validate.Length(max=200), has_search_terms])
+    limit = fields.Int(load_default=20, validate=validate.Range(min=1, max=100))
+
+
+search_query_schema = SearchQuerySchema()
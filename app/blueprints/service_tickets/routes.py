@@ -1,9 +1,53 @@
-from flask import request, jsonify
-from sqlalchemy import select
+from flask import request, jsonify, Response, stream_with_context
+from sqlalchemy import select, insert, update, delete, and_, or_, func, cast, type_coerce, Numeric, String
+from sqlalchemy.exc import IntegrityError
 from marshmallow import ValidationError
-from app.blueprints.service_tickets.schemas import ticket_create_schema, ticket_return_schema, tickets_return_schema, ticket_assign_mechanic_schema, ticket_remove_mechanic_schema
-from app.models import ServiceTicket, Mechanic, ServiceInventory, Inventory, db
+from app.blueprints.service_tickets.schemas import ticket_create_schema, ticket_return_schema, tickets_return_schema, ticket_assign_mechanic_schema, ticket_remove_mechanic_schema, ticket_search_query_schema, ticket_export_query_schema, ticket_load_options, invoice_query_schema, invoice_schema, invoices_schema
+from app.models import ServiceTicket, Customer, Mechanic, ServiceInventory, Inventory, service_mechanic, db
 from app.blueprints.service_tickets import service_tickets_bp
+from app.utils.util import keyset_paginate, paginated_response, wants_stream, stream_response, conditional_get, bump_cache_version, insert_ignoring_duplicates
+from app.utils.customer_summary import apply_summary_changes, refresh_last_service_date, ticket_spend
+import csv
+import io
+
+BULK_TICKET_LIMIT = 1000  # max tickets accepted by one bulk request
+PAGINATION_ARGS = ('cursor', 'per_page', 'stream')  # query args that are not search filters
+MONEY = Numeric(12, 2)  # invoice amounts, Decimals rounded to cents
+EXPORT_CHUNK_SIZE = 2000  # rows fetched from the cursor and written per CSV chunk
+EXPORT_COLUMNS = (
+    'ticket_id', 'service_date', 'vin', 'service_desc', 'customer_id', 'customer_name', 'customer_email',
+    'mechanics', 'parts', 'parts_total',
+)
+
+
+def collapse_inventory(items):  # {inventory_id: total quantity}, summing repeated ids in request order
+    quantities = {}
+    for item in items:
+        quantities[item['inventory_id']] = quantities.get(item['inventory_id'], 0) + item['quantity']
+    return quantities
+
+
+def reserve_inventory(quantities):
+    """
+    Takes {inventory_id: quantity} off stock inside the caller's transaction with one
+    conditional UPDATE per part: the row only changes while enough stock is left, so
+    concurrent tickets can't oversell and nothing is read first. Parts with NULL stock are
+    not tracked and always match. Parts go in id order so concurrent tickets lock rows in
+    the same order. Returns the ids that were short; the caller rolls back.
+    """
+    short = []
+    for inventory_id in sorted(quantities):
+        query = (
+            update(Inventory)
+            .where(Inventory.id == inventory_id)
+            .where(or_(Inventory.stock.is_(None), Inventory.stock >= quantities[inventory_id]))
+            .values(stock=Inventory.stock - quantities[inventory_id])
+            .execution_options(synchronize_session=False)
+        )
+        if db.session.execute(query).rowcount == 0:
+            short.append(inventory_id)
+    return short
+
  
 # ======================================================================
 # CREATE A SERVICE TICKET [POST]
@@ -19,6 +63,22 @@ def create_service_ticket():
     except ValidationError as e:
         return jsonify(e.messages), 400
     
+    # collapse repeated inventory ids into one line item and check them all with one IN query
+    inventory_quantities = collapse_inventory(ticket_data.get('inventory') or [])
+    inventory_prices = {}
+    if inventory_quantities:
+        query = select(Inventory.id, Inventory.price).where(Inventory.id.in_(inventory_quantities))
+        inventory_prices = dict(db.session.execute(query).all())
+        missing_inventory = sorted(set(inventory_quantities) - set(inventory_prices))
+
+        if missing_inventory:
+            return jsonify({'error': f'Invalid inventory IDs: {missing_inventory}'}), 400
+
+        short_inventory = reserve_inventory(inventory_quantities)
+        if short_inventory:
+            db.session.rollback() # release the parts reserved so far
+            return jsonify({'error': f'Insufficient stock for inventory IDs: {short_inventory}'}), 409
+
     new_ticket = ServiceTicket(
         vin=ticket_data['vin'],
         service_date=ticket_data['service_date'],
@@ -37,43 +97,301 @@ def create_service_ticket():
         mechanics = db.session.scalars(query).all()
         new_ticket.mechanics.extend(mechanics)
 
-    # if request contains inventory
-    if 'inventory' in ticket_data and ticket_data['inventory']:
-        
-        # iterate over each inventory item in request as 'item' used to assign quantity
-        for item in ticket_data['inventory']:
-            inventory_data = db.session.get(Inventory, item['inventory_id'])
-            
-            # if inventory item cannot be found, rollback current transaction and return error
-            if not inventory_data:
-                db.session.rollback()
-                return jsonify({'error': f'Invalid inventory ID: {item["inventory_id"]}'}), 400
-            
-            added_inventory = ServiceInventory(
-                ticket_id=new_ticket.id, # uses the new_ticket.id obtained from flush()
-                inventory_id=inventory_data.id,
-                quantity=item['quantity'] # quantity from the request 
-            )
-            db.session.add(added_inventory)
+    # insert every ServiceInventory row for the ticket in one batch
+    if inventory_quantities:
+        db.session.execute(insert(ServiceInventory), [
+            {"ticket_id": new_ticket.id, "inventory_id": inventory_id, "quantity": quantity}
+            for inventory_id, quantity in inventory_quantities.items()
+        ])
+
+    # roll the ticket into the customer's summary in the same transaction
+    apply_summary_changes({
+        new_ticket.customer_id: (1, ticket_spend(inventory_quantities, inventory_prices), new_ticket.service_date)
+    })
 
     # Commit service tickets with all additions 
+    ticket_id = new_ticket.id
+    bump_cache_version('service_tickets')
+    if inventory_quantities:
+        bump_cache_version('inventory') # stock changed
     db.session.commit()
+
+    # Reload with eager loading so the response does not lazy load each relationship
+    new_ticket = db.session.get(ServiceTicket, ticket_id, options=ticket_load_options, populate_existing=True)
     return jsonify({
         "message": "Service Ticket created successfully",
         "service_ticket": ticket_return_schema.dump(new_ticket)
     }), 201
 
 
+# ======================================================================
+# BULK CREATE SERVICE TICKETS [POST]
+# ======================================================================
+
+# Accepts a JSON list of ticket payloads (same shape as the single create route).
+# Every item is validated and every referenced id is resolved before anything is
+# written; if any item fails, nothing is created and per-item errors are returned.
+@service_tickets_bp.route("/bulk", methods=['POST'])
+def create_service_tickets_bulk():
+    payload = request.json
+
+    if not isinstance(payload, list) or not payload:
+        return jsonify({"error": "Request body must be a non-empty list of service tickets."}), 400
+    if len(payload) > BULK_TICKET_LIMIT:
+        return jsonify({"error": f"A bulk request can contain at most {BULK_TICKET_LIMIT} service tickets."}), 400
+
+    errors = {}
+    tickets_data = []
+    for index, item in enumerate(payload):
+        try:
+            tickets_data.append(ticket_create_schema.load(item))
+        except ValidationError as e:
+            errors[index] = e.messages
+            tickets_data.append(None)
+
+    valid_tickets = [ticket for ticket in tickets_data if ticket]
+
+    # resolve every referenced id with one IN query per table
+    def existing_ids(column, ids):
+        if not ids:
+            return set()
+        return set(db.session.scalars(select(column).where(column.in_(ids))))
+
+    customer_ids = existing_ids(Customer.id, {t['customer_id'] for t in valid_tickets})
+    mechanic_ids = existing_ids(Mechanic.id, {m for t in valid_tickets for m in t.get('mechanic_ids') or []})
+    # inventory is fetched with its price, which the customer summaries need
+    referenced_inventory = {i['inventory_id'] for t in valid_tickets for i in t.get('inventory') or []}
+    inventory_prices = {}
+    if referenced_inventory:
+        query = select(Inventory.id, Inventory.price).where(Inventory.id.in_(referenced_inventory))
+        inventory_prices = dict(db.session.execute(query).all())
+    inventory_ids = set(inventory_prices)
+
+    for index, ticket_data in enumerate(tickets_data):
+        if not ticket_data:
+            continue
+
+        item_errors = {}
+        if ticket_data['customer_id'] not in customer_ids:
+            item_errors['customer_id'] = [f"Invalid customer ID: {ticket_data['customer_id']}"]
+
+        missing_mechanics = sorted(set(ticket_data.get('mechanic_ids') or []) - mechanic_ids)
+        if missing_mechanics:
+            item_errors['mechanic_ids'] = [f"Invalid mechanic IDs: {missing_mechanics}"]
+
+        missing_inventory = sorted({i['inventory_id'] for i in ticket_data.get('inventory') or []} - inventory_ids)
+        if missing_inventory:
+            item_errors['inventory'] = [f"Invalid inventory IDs: {missing_inventory}"]
+
+        if item_errors:
+            errors[index] = item_errors
+
+    if errors:
+        return jsonify({"errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)]}), 400
+
+    # reserve the parts of the whole batch at once, one conditional UPDATE per part
+    batch_quantities = collapse_inventory(i for ticket_data in tickets_data for i in ticket_data.get('inventory') or [])
+    short_inventory = reserve_inventory(batch_quantities)
+    if short_inventory:
+        db.session.rollback()
+        return jsonify({'error': f'Insufficient stock for inventory IDs: {short_inventory}'}), 409
+
+    ticket_rows = [
+        {
+            "vin": ticket_data['vin'],
+            "service_date": ticket_data['service_date'],
+            "service_desc": ticket_data['service_desc'],
+            "customer_id": ticket_data['customer_id'],
+        }
+        for ticket_data in tickets_data
+    ]
+    if db.session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        # multi-row INSERT ... RETURNING, ids come back in the same order as the payload
+        query = insert(ServiceTicket).returning(ServiceTicket.id, sort_by_parameter_order=True)
+        ticket_ids = db.session.execute(query, ticket_rows).scalars().all()
+    else:
+        # no executemany RETURNING (e.g. MySQL), let the unit of work collect the ids
+        new_tickets = [ServiceTicket(**row) for row in ticket_rows]
+        db.session.add_all(new_tickets)
+        db.session.flush()
+        ticket_ids = [ticket.id for ticket in new_tickets]
+
+    mechanic_rows = [
+        {"ticket_id": ticket_id, "mechanic_id": mechanic_id}
+        for ticket_id, ticket_data in zip(ticket_ids, tickets_data)
+        for mechanic_id in dict.fromkeys(ticket_data.get('mechanic_ids') or [])  # drop repeated ids, keep order
+    ]
+    if mechanic_rows:
+        db.session.execute(service_mechanic.insert(), mechanic_rows)
+
+    inventory_rows = [
+        {"ticket_id": ticket_id, "inventory_id": inventory_id, "quantity": quantity}
+        for ticket_id, ticket_data in zip(ticket_ids, tickets_data)
+        for inventory_id, quantity in collapse_inventory(ticket_data.get('inventory') or []).items()
+    ]
+    if inventory_rows:
+        db.session.execute(insert(ServiceInventory), inventory_rows)
+
+    # one summary delta per customer, however many of the tickets are theirs
+    summary_changes = {}
+    for ticket_data in tickets_data:
+        tickets, spend, latest = summary_changes.get(ticket_data['customer_id'], (0, 0, None))
+        spend += ticket_spend(collapse_inventory(ticket_data.get('inventory') or []), inventory_prices)
+        latest = max(latest, ticket_data['service_date']) if latest else ticket_data['service_date']
+        summary_changes[ticket_data['customer_id']] = (tickets + 1, spend, latest)
+    apply_summary_changes(summary_changes)
+
+    bump_cache_version('service_tickets')
+    if batch_quantities:
+        bump_cache_version('inventory') # stock changed
+    db.session.commit()
+    return jsonify({
+        "message": f"{len(ticket_ids)} Service Tickets created successfully",
+        "service_ticket_ids": ticket_ids
+    }), 201
+
+
 # ======================================================================
 # GET ALL SERVICE TICKET [GET]
 # ======================================================================
 
 @service_tickets_bp.route("/", methods=['GET'])
+@conditional_get('service_tickets', 'mechanics', 'inventory')
 def get_service_tickets():
+    query = select(ServiceTicket).options(*ticket_load_options)
+    if wants_stream():
+        return stream_response(query.order_by(ServiceTicket.service_date, ServiceTicket.id), ticket_return_schema)
+
+    try:
+        service_tickets, next_cursor = keyset_paginate(query, ServiceTicket.service_date, ServiceTicket.id)
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters."}), 400
+
+    return paginated_response(tickets_return_schema.jsonify(service_tickets), next_cursor)
+
+
+# ======================================================================
+# SEARCH SERVICE TICKETS [GET]
+# ======================================================================
+
+def build_ticket_search(filters):
+    """
+    select() of the tickets matching every given filter. Each filter is a predicate on an
+    indexed column: vin, customer_id and service_date on service_tickets, mechanic_id and
+    inventory_id through the indexed foreign keys of the association tables.
+    """
     query = select(ServiceTicket)
-    service_tickets = db.session.execute(query).scalars().all()
 
-    return tickets_return_schema.jsonify(service_tickets)
+    if 'vin' in filters:
+        query = query.where(ServiceTicket.vin == filters['vin'])
+    if 'customer_id' in filters:
+        query = query.where(ServiceTicket.customer_id == filters['customer_id'])
+    if 'from_date' in filters:
+        query = query.where(ServiceTicket.service_date >= filters['from_date'])
+    if 'to_date' in filters:
+        query = query.where(ServiceTicket.service_date <= filters['to_date'])
+    if 'mechanic_id' in filters:
+        mechanic_tickets = select(service_mechanic.c.ticket_id).where(service_mechanic.c.mechanic_id == filters['mechanic_id'])
+        query = query.where(ServiceTicket.id.in_(mechanic_tickets))
+    if 'inventory_id' in filters:
+        part_tickets = select(ServiceInventory.ticket_id).where(ServiceInventory.inventory_id == filters['inventory_id'])
+        query = query.where(ServiceTicket.id.in_(part_tickets))
+    return query
+
+
+@service_tickets_bp.route("/search", methods=['GET'])
+@conditional_get('service_tickets', 'mechanics', 'inventory')
+def search_service_tickets():
+    try:
+        filters = ticket_search_query_schema.load(
+            {key: value for key, value in request.args.items() if key not in PAGINATION_ARGS}
+        )
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    query = build_ticket_search(filters).options(*ticket_load_options)
+    if wants_stream():
+        return stream_response(query.order_by(ServiceTicket.service_date, ServiceTicket.id), ticket_return_schema)
+
+    try:
+        service_tickets, next_cursor = keyset_paginate(query, ServiceTicket.service_date, ServiceTicket.id)
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters."}), 400
+
+    return paginated_response(tickets_return_schema.jsonify(service_tickets), next_cursor)
+
+
+# ======================================================================
+# EXPORT SERVICE TICKETS AS CSV [GET]
+# ======================================================================
+
+def build_ticket_export(from_date, to_date):
+    """
+    select() of one flat row per ticket in the date range: the ticket joined to its
+    customer, mechanic names and "part xN" items aggregated into '; ' separated strings by
+    the database (group_concat / string_agg), and the parts total. Ordered by the
+    service_date index.
+    """
+    mechanics = (
+        select(func.aggregate_strings(Mechanic.name, '; '))
+        .join(service_mechanic, service_mechanic.c.mechanic_id == Mechanic.id)
+        .where(service_mechanic.c.ticket_id == ServiceTicket.id)
+        .scalar_subquery()
+    )
+    parts = (
+        select(func.aggregate_strings(Inventory.name + ' x' + cast(ServiceInventory.quantity, String), '; '))
+        .join(ServiceInventory, ServiceInventory.inventory_id == Inventory.id)
+        .where(ServiceInventory.ticket_id == ServiceTicket.id)
+        .scalar_subquery()
+    )
+    parts_total = (
+        select(type_coerce(func.coalesce(func.sum(ServiceInventory.quantity * Inventory.price), 0), MONEY))
+        .join(Inventory, Inventory.id == ServiceInventory.inventory_id)
+        .where(ServiceInventory.ticket_id == ServiceTicket.id)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            ServiceTicket.id, ServiceTicket.service_date, ServiceTicket.vin, ServiceTicket.service_desc,
+            ServiceTicket.customer_id, Customer.name, Customer.email, mechanics, parts, parts_total,
+        )
+        .join(Customer, Customer.id == ServiceTicket.customer_id)
+        .where(ServiceTicket.service_date.between(from_date, to_date))
+        .order_by(ServiceTicket.service_date, ServiceTicket.id)
+    )
+
+
+# Streams the tickets of ?from=&to= (inclusive) as CSV, EXPORT_CHUNK_SIZE rows at a time
+# from a server-side cursor, so memory stays flat however many tickets the range holds.
+@service_tickets_bp.route("/export.csv", methods=['GET'])
+@conditional_get('service_tickets', 'customers', 'mechanics', 'inventory')
+def export_service_tickets():
+    try:
+        date_range = ticket_export_query_schema.load(request.args)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    query = build_ticket_export(date_range['from_date'], date_range['to_date'])
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+
+        result = db.session.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for rows in result.partitions():
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()  # the header when the range is empty
+
+    filename = f"service_tickets_{date_range['from_date']}_{date_range['to_date']}.csv"
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
 
 
 # ======================================================================
@@ -81,14 +399,86 @@ def get_service_tickets():
 # ======================================================================
 
 @service_tickets_bp.route("/<int:ticket_id>", methods=['GET'])
+@conditional_get('service_tickets', 'mechanics', 'inventory')
 def get_service_ticket(ticket_id):
-    service_ticket = db.session.get(ServiceTicket, ticket_id)
+    service_ticket = db.session.get(ServiceTicket, ticket_id, options=ticket_load_options)
 
     if service_ticket:
         return ticket_return_schema.jsonify(service_ticket), 200
     return jsonify({"error": "Service Ticket not found."}), 404
 
 
+# ======================================================================
+# SERVICE TICKET INVOICES [GET]
+# ======================================================================
+
+def fetch_invoices(ticket_ids):
+    """
+    Invoices for ticket_ids, keyed by ticket id, from one query: each row is a line item
+    with quantity * price computed by the database, and the ticket total is a window sum
+    over the ticket's lines. Tickets without parts get one row with no line and a 0 total.
+    """
+    line_total = type_coerce(ServiceInventory.quantity * Inventory.price, MONEY)
+    ticket_total = func.coalesce(func.sum(line_total).over(partition_by=ServiceTicket.id), 0)
+    query = (
+        select(
+            ServiceTicket.id, ServiceTicket.customer_id, ServiceTicket.service_date,
+            ServiceInventory.inventory_id, Inventory.name, ServiceInventory.quantity, Inventory.price,
+            line_total.label('line_total'), type_coerce(ticket_total, MONEY).label('total'),
+        )
+        .outerjoin(ServiceInventory, ServiceInventory.ticket_id == ServiceTicket.id)
+        .outerjoin(Inventory, Inventory.id == ServiceInventory.inventory_id)
+        .where(ServiceTicket.id.in_(ticket_ids))
+        .order_by(ServiceTicket.id, ServiceInventory.id)
+    )
+
+    invoices = {}
+    for row in db.session.execute(query):
+        invoice = invoices.setdefault(row.id, {
+            "ticket_id": row.id,
+            "customer_id": row.customer_id,
+            "service_date": row.service_date,
+            "lines": [],
+            "total": row.total,
+        })
+        if row.inventory_id is not None:
+            invoice["lines"].append({
+                "inventory_id": row.inventory_id,
+                "name": row.name,
+                "quantity": row.quantity,
+                "unit_price": row.price,
+                "line_total": row.line_total,
+            })
+    return invoices
+
+
+@service_tickets_bp.route("/<int:ticket_id>/invoice", methods=['GET'])
+@conditional_get('service_tickets', 'inventory')
+def get_service_ticket_invoice(ticket_id):
+    invoice = fetch_invoices([ticket_id]).get(ticket_id)
+
+    if not invoice:
+        return jsonify({"error": "Service Ticket not found."}), 404
+    return invoice_schema.jsonify(invoice), 200
+
+
+# Batch invoices for billing runs: ?ids=1,2,3 (at most INVOICE_BATCH_LIMIT ids), returned
+# in the requested order. Ids with no ticket are listed under not_found.
+@service_tickets_bp.route("/invoices", methods=['GET'])
+@conditional_get('service_tickets', 'inventory')
+def get_service_ticket_invoices():
+    try:
+        ticket_ids = invoice_query_schema.load(request.args)['ids']
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    invoices = fetch_invoices(ticket_ids)
+    return jsonify({
+        "invoices": invoices_schema.dump([invoices[ticket_id] for ticket_id in ticket_ids if ticket_id in invoices]),
+        "not_found": [ticket_id for ticket_id in ticket_ids if ticket_id not in invoices],
+    }), 200
+
+
 # ======================================================================
 # DELETE A SERVICE TICKET [DELETE]
 # ======================================================================
@@ -100,8 +490,37 @@ def delete_service_ticket(ticket_id):
 
     if not service_ticket:
         return jsonify({"error": "Service Ticket not found."}), 404
-    
+
+    # parts spend of the ticket, taken off the customer's summary with it
+    query = (
+        select(func.sum(ServiceInventory.quantity * Inventory.price))
+        .join(Inventory, Inventory.id == ServiceInventory.inventory_id)
+        .where(ServiceInventory.ticket_id == ticket_id)
+    )
+    spend = db.session.execute(query).scalar() or 0
+
+    # reserved parts go back on the shelf (untracked NULL stock stays NULL), then the line items go with the ticket
+    returned = (
+        select(func.sum(ServiceInventory.quantity))
+        .where(ServiceInventory.ticket_id == ticket_id)
+        .where(ServiceInventory.inventory_id == Inventory.id)
+        .scalar_subquery()
+    )
+    ticket_parts = select(ServiceInventory.inventory_id).where(ServiceInventory.ticket_id == ticket_id)
+    restocked = db.session.execute(
+        update(Inventory)
+        .where(Inventory.id.in_(ticket_parts))
+        .values(stock=Inventory.stock + returned)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.execute(delete(ServiceInventory).where(ServiceInventory.ticket_id == ticket_id))
     db.session.delete(service_ticket)
+    db.session.flush()
+    apply_summary_changes({service_ticket.customer_id: (-1, -spend, None)})
+    refresh_last_service_date([service_ticket.customer_id])
+    bump_cache_version('service_tickets')
+    if restocked:
+        bump_cache_version('inventory')
     db.session.commit()
     return jsonify({"message": f'Service Ticket id: {ticket_id}, successfully deleted.'}), 200
 
@@ -117,20 +536,38 @@ def assign_mechanics_service_ticket(ticket_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
 
-    query = select(ServiceTicket).where(ServiceTicket.id == ticket_id)
-    service_ticket = db.session.execute(query).scalar_one_or_none()
-
-    if not service_ticket:
+    query = select(ServiceTicket.id).where(ServiceTicket.id == ticket_id)
+    if db.session.execute(query).scalar_one_or_none() is None:
         return jsonify({"error": "Service Ticket not found."}), 404
-    
-    for mechanic_id in assign_mechanics['add_mechanics_ids']:
-        query_mechanic = select(Mechanic).where(Mechanic.id == mechanic_id)
-        mechanic = db.session.execute(query_mechanic).scalar_one_or_none()
 
-        if mechanic and mechanic not in service_ticket.mechanics:
-            service_ticket.mechanics.append(mechanic)
+    mechanic_ids = set(assign_mechanics['add_mechanics_ids'])
+    if mechanic_ids:
+        # one query finds which requested mechanics exist and which are already on the ticket
+        query = (
+            select(Mechanic.id, service_mechanic.c.ticket_id)
+            .outerjoin(service_mechanic, and_(
+                service_mechanic.c.mechanic_id == Mechanic.id,
+                service_mechanic.c.ticket_id == ticket_id,
+            ))
+            .where(Mechanic.id.in_(mechanic_ids))
+        )
+        new_rows = [
+            {"ticket_id": ticket_id, "mechanic_id": mechanic_id}
+            for mechanic_id, assigned in db.session.execute(query)
+            if assigned is None
+        ]
+
+        if new_rows:
+            try:
+                # a concurrent request may assign the same mechanic first, that pair is skipped
+                insert_ignoring_duplicates(service_mechanic, new_rows, ['ticket_id', 'mechanic_id'])
+                bump_cache_version('service_tickets')
+                db.session.commit()
+            except IntegrityError:  # the ticket or a mechanic was deleted meanwhile
+                db.session.rollback()
+                return jsonify({"error": "Mechanics were modified by another request, please retry."}), 409
 
-    db.session.commit()
+    service_ticket = db.session.get(ServiceTicket, ticket_id, options=ticket_load_options, populate_existing=True)
     return ticket_return_schema.jsonify(service_ticket), 200
 
 
@@ -145,20 +582,22 @@ def remove_mechanics_service_ticket(ticket_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
 
-    query = select(ServiceTicket).where(ServiceTicket.id == ticket_id)
-    service_ticket = db.session.execute(query).scalar_one_or_none()
-
-    if not service_ticket:
+    query = select(ServiceTicket.id).where(ServiceTicket.id == ticket_id)
+    if db.session.execute(query).scalar_one_or_none() is None:
         return jsonify({"error": "Service Ticket not found."}), 404
-    
-    for mechanic_id in remove_mechanics['remove_mechanics_ids']:
-        query_mechanic = select(Mechanic).where(Mechanic.id == mechanic_id)
-        mechanic = db.session.execute(query_mechanic).scalar_one_or_none()
 
-        if mechanic and mechanic in service_ticket.mechanics:
-            service_ticket.mechanics.remove(mechanic)
-
-    db.session.commit()
+    mechanic_ids = set(remove_mechanics['remove_mechanics_ids'])
+    if mechanic_ids:
+        # unknown or unassigned ids simply match no rows
+        db.session.execute(
+            delete(service_mechanic)
+            .where(service_mechanic.c.ticket_id == ticket_id)
+            .where(service_mechanic.c.mechanic_id.in_(mechanic_ids))
+        )
+        bump_cache_version('service_tickets')
+        db.session.commit()
+
+    service_ticket = db.session.get(ServiceTicket, ticket_id, options=ticket_load_options, populate_existing=True)
     return ticket_return_schema.jsonify(service_ticket), 200
 
 
@@ -4,12 +4,14 @@ from app.blueprints.mechanics.schemas import MechanicSchema
 from app.blueprints.inventory.schemas import InventorySchema
 from app.extensions import ma
 from app.models import ServiceTicket, ServiceInventory
-from marshmallow import fields, validates_schema, ValidationError
+from marshmallow import fields, validate, validates_schema, post_load, ValidationError
+from sqlalchemy.orm import selectinload
+from app.utils.serializers import CompiledDumpMixin, Money
 
 
 class ServiceInventoryInputSchema(ma.Schema):
     inventory_id = fields.Int(required=True)
-    quantity = fields.Int(required=True)
+    quantity = fields.Int(required=True, validate=validate.Range(min=1)) #reserved from stock, so never zero or negative
 
 
 class ServiceInventoryOutputSchema(SQLAlchemyAutoSchema):
@@ -60,7 +62,7 @@ class TicketCreateSchema(ma.Schema):
                 raise ValidationError("Each inventory entry requires an inventory_id")
 
 
-class TicketReturnSchema(ma.SQLAlchemySchema):
+class TicketReturnSchema(CompiledDumpMixin, ma.SQLAlchemySchema):
     class Meta:
         model = ServiceTicket
         include_fk = True
@@ -76,6 +78,15 @@ class TicketReturnSchema(ma.SQLAlchemySchema):
     service_inventory = fields.List(fields.Nested(ServiceInventoryOutputSchema))
 
 
+# Loader options matching everything TicketReturnSchema walks. Attach these to any
+# query whose result is dumped with the ticket return schemas so the relationships
+# are fetched in a fixed number of queries instead of lazily, one ticket at a time.
+ticket_load_options = (
+    selectinload(ServiceTicket.mechanics),
+    selectinload(ServiceTicket.service_inventory).joinedload(ServiceInventory.inventory),
+)
+
+
 class TicketAssignMechanicSchema(ma.Schema):
     add_mechanics_ids = fields.List(fields.Int(), required=True)
 
@@ -91,10 +102,88 @@ class TicketRemoveMechanicSchema(ma.Schema):
 
 
 
+class TicketSearchQuerySchema(ma.Schema):
+    """
+    Query string for the ticket search. Every filter is optional but at least one is required.
+    Example: /service_tickets/search?mechanic_id=3&from=2025-01-01&to=2025-01-31
+    """
+    vin = fields.Str(validate=validate.Length(min=1, max=17))
+    customer_id = fields.Int()
+    mechanic_id = fields.Int()
+    inventory_id = fields.Int()
+    from_date = fields.Date(data_key="from")
+    to_date = fields.Date(data_key="to")
+
+    @validates_schema
+    def validate_filters(self, data, **kwargs):
+        if not data:
+            raise ValidationError("At least one search filter is required.")
+        if "from_date" in data and "to_date" in data and data["from_date"] > data["to_date"]:
+            raise ValidationError("'from' must not be after 'to'.", "from")
+
+
+class TicketExportQuerySchema(ma.Schema):
+    """
+    Query string for the CSV export, an inclusive service date range.
+    Example: /service_tickets/export.csv?from=2025-01-01&to=2025-01-31
+    """
+    from_date = fields.Date(data_key="from", required=True)
+    to_date = fields.Date(data_key="to", required=True)
+
+    @validates_schema
+    def validate_range(self, data, **kwargs):
+        if "from_date" in data and "to_date" in data and data["from_date"] > data["to_date"]:
+            raise ValidationError("'from' must not be after 'to'.", "from")
+
+
+INVOICE_BATCH_LIMIT = 1000  # max ticket ids per batch invoice request
+
+
+class InvoiceQuerySchema(ma.Schema):
+    """
+    Query string for batch invoices, comma separated ticket ids.
+    Example: /service_tickets/invoices?ids=1,2,3
+    """
+    ids = fields.Str(required=True)
+
+    @post_load
+    def split_ids(self, data, **kwargs):
+        try:
+            ids = list(dict.fromkeys(int(part) for part in data["ids"].split(",") if part.strip()))  # unique, in order
+        except ValueError:
+            raise ValidationError("Ticket ids must be comma separated integers.", "ids")
+        if not ids:
+            raise ValidationError("At least one ticket id is required.", "ids")
+        if len(ids) > INVOICE_BATCH_LIMIT:
+            raise ValidationError(f"At most {INVOICE_BATCH_LIMIT} ticket ids per request.", "ids")
+        return {"ids": ids}
+
+
+class InvoiceLineSchema(ma.Schema):
+    inventory_id = fields.Int()
+    name = fields.Str()
+    quantity = fields.Int()
+    unit_price = Money()
+    line_total = Money()
+
+
+class InvoiceSchema(ma.Schema):
+    ticket_id = fields.Int()
+    customer_id = fields.Int()
+    service_date = fields.Date()
+    lines = fields.List(fields.Nested(InvoiceLineSchema))
+    total = Money()
+
+
 ticket_create_schema = TicketCreateSchema()
 ticket_return_schema = TicketReturnSchema()
 tickets_return_schema = TicketReturnSchema(many=True)
 
 ticket_assign_mechanic_schema = TicketAssignMechanicSchema()
 ticket_remove_mechanic_schema = TicketRemoveMechanicSchema()
+ticket_search_query_schema = TicketSearchQuerySchema()
+ticket_export_query_schema = TicketExportQuerySchema()
+invoice_query_schema = InvoiceQuerySchema()
+invoice_schema = InvoiceSchema()
+invoices_schema = InvoiceSchema(many=True)
 
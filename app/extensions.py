@@ -1,6 +1,64 @@
+from collections import OrderedDict
+from flask.json.provider import DefaultJSONProvider
 from flask_marshmallow import Marshmallow
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from flask_caching import Cache
+from flask_caching.backends.simplecache import SimpleCache
+from app.utils.limiter_storage import DatabaseStorage  # registers the database:// limiter storage
+
+try:
+    import orjson
+except ImportError:  # optional, create_app keeps Flask's json provider without it
+    orjson = None
 
 ma = Marshmallow()
-limiter = Limiter(key_func=get_remote_address) #creating and instance of Limiter
\ No newline at end of file
+limiter = Limiter(key_func=get_remote_address) #creating and instance of Limiter, storage set by RATELIMIT_STORAGE_URI
+cache = Cache() #backend chosen by CACHE_TYPE in config
+
+
+class LRUCache(SimpleCache):
+    """
+    In-process SimpleCache with TTL that evicts the least recently used entries once
+    CACHE_THRESHOLD is exceeded. Enable with CACHE_TYPE = 'app.extensions.LRUCache'.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache = OrderedDict()  # oldest access first
+
+    def get(self, key):
+        with self._lock:
+            value = super().get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            result = super().set(key, value, timeout)
+            self._cache.move_to_end(key)
+            self._remove_older()  # SimpleCache only prunes before adding, keep the new entry within threshold
+            return result
+
+    def _remove_older(self):
+        while self._over_threshold():
+            self._cache.popitem(last=False)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Keeps Flask's sort_keys, debug indentation and
+    default() conversions (dates as HTTP dates, Decimal as str). Enable with USE_ORJSON = True.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME  # datetimes go through default()
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
@@ -0,0 +1,257 @@
+import click
+import contextlib
+from datetime import datetime, timezone
+from flask.cli import with_appcontext
+from sqlalchemy import MetaData, Table, Column, ForeignKey, Integer, String, DateTime, inspect, select, insert, func, text
+from app.models import Base, Customer, db
+from app.utils.fulltext import create_fulltext
+from app.utils.customer_summary import next_customer_ids, rebuild_batch
+
+# ======================================================================
+# VERSIONED SCHEMA MIGRATIONS
+# ======================================================================
+
+# Applied versions are recorded in schema_migrations. A database with no app tables
+# is created from the models and stamped with every version; an existing database
+# (e.g. production, created by the old db.create_all()) gets each missing step in order.
+# Steps check what already exists so a half-applied step can be re-run.
+# upgrade() holds a database-wide lock, so workers that start together apply each step once.
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+MIGRATION_LOCK_NAME = "mechanic_shop_schema_migrations"  # MySQL GET_LOCK name
+MIGRATION_LOCK_ID = 7_305_164_312  # PostgreSQL advisory lock key
+MIGRATION_LOCK_TIMEOUT = 600  # seconds a worker waits for another one's upgrade (MySQL)
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+def migration(version, description):  # registers a step, applied in version order
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+def _create_missing_indexes(conn, table_name):
+    for index in Base.metadata.tables[table_name].indexes:
+        index.create(conn, checkfirst=True)
+
+
+@migration(1, "cache_versions table")
+def create_cache_versions(conn):
+    Base.metadata.tables["cache_versions"].create(conn, checkfirst=True)
+
+
+@migration(2, "normalized customer email column")
+def add_email_normalized(conn):
+    columns = [column["name"] for column in inspect(conn).get_columns("customers")]
+    if "email_normalized" not in columns:
+        conn.execute(text("ALTER TABLE customers ADD COLUMN email_normalized VARCHAR(360)"))
+
+    customers = Customer.__table__
+    conn.execute(customers.update().values(email_normalized=func.lower(func.trim(customers.c.email))))
+
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE customers ALTER COLUMN email_normalized SET NOT NULL"))
+    elif conn.dialect.name == "mysql":
+        conn.execute(text("ALTER TABLE customers MODIFY email_normalized VARCHAR(360) NOT NULL"))
+    # SQLite can't add NOT NULL to an existing column, the model enforces it on insert
+
+    # the unique index below would fail with a bare IntegrityError on emails that differ only by case
+    duplicated = (
+        select(customers.c.email_normalized)
+        .group_by(customers.c.email_normalized)
+        .having(func.count() > 1)
+    )
+    duplicates = conn.execute(
+        select(customers.c.id, customers.c.email)
+        .where(customers.c.email_normalized.in_(duplicated))
+        .order_by(customers.c.email_normalized, customers.c.id)
+        .limit(51)
+    ).all()
+    if duplicates:
+        listed = ", ".join(f"{email} (id {customer_id})" for customer_id, email in duplicates[:50])
+        raise MigrationError(
+            "Customers share an email apart from case or spacing, merge or change them and re-run: "
+            f"{listed}{' ...' if len(duplicates) > 50 else ''}"
+        )
+
+    _create_missing_indexes(conn, "customers")
+
+
+@migration(3, "service_mechanic composite primary key")
+def service_mechanic_primary_key(conn):
+    if inspect(conn).get_pk_constraint("service_mechanic")["constrained_columns"]:
+        return
+
+    # rebuild the table: copy distinct pairs into one keyed by (ticket_id, mechanic_id)
+    reflected = MetaData()
+    Table("service_tickets", reflected, autoload_with=conn)
+    Table("mechanics", reflected, autoload_with=conn)
+    new_table = Table(
+        "service_mechanic_new",
+        reflected,
+        Column("ticket_id", Integer, ForeignKey("service_tickets.id"), primary_key=True),
+        Column("mechanic_id", Integer, ForeignKey("mechanics.id"), primary_key=True),
+    )
+    new_table.create(conn, checkfirst=True)
+    conn.execute(text(
+        "INSERT INTO service_mechanic_new (ticket_id, mechanic_id) "
+        "SELECT DISTINCT ticket_id, mechanic_id FROM service_mechanic "
+        "WHERE ticket_id IS NOT NULL AND mechanic_id IS NOT NULL"
+    ))
+    conn.execute(text("DROP TABLE service_mechanic"))
+    conn.execute(text("ALTER TABLE service_mechanic_new RENAME TO service_mechanic"))
+
+
+@migration(4, "indexes for hot query paths")
+def hot_path_indexes(conn):
+    for table_name in ("service_tickets", "service_inventory", "service_mechanic"):
+        _create_missing_indexes(conn, table_name)
+
+
+@migration(5, "rate limiter storage tables")
+def rate_limit_tables(conn):
+    for table_name in ("rate_limit_counters", "rate_limit_entries"):
+        Base.metadata.tables[table_name].create(conn, checkfirst=True)
+
+
+@migration(6, "full-text search indexes")
+def fulltext_indexes(conn):
+    create_fulltext(conn, "service_tickets", "service_desc")
+    create_fulltext(conn, "inventory", "name")
+
+
+@migration(7, "customer summary rollups")
+def customer_summaries(conn):
+    Base.metadata.tables["customer_summaries"].create(conn, checkfirst=True)
+    _rebuild_customer_summaries(conn)
+
+
+def _rebuild_customer_summaries(conn):  # recomputes the rollups from the tickets, a batch of customers at a time
+    last_id = 0
+    while customer_ids := next_customer_ids(conn, last_id):
+        rebuild_batch(conn, customer_ids)
+        last_id = customer_ids[-1]
+
+
+@migration(8, "exact decimal prices")
+def decimal_prices(conn):
+    # FLOAT -> NUMERIC with values rounded to cents. SQLite has no column types to change,
+    # the model's Numeric columns return Decimals there, so only the rounding applies.
+    for table_name, column_name, precision in [("inventory", "price", 10), ("customer_summaries", "parts_spend", 12)]:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(
+                f"ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE NUMERIC({precision}, 2) "
+                f"USING ROUND({column_name}::numeric, 2)"
+            ))
+            continue
+        conn.execute(text(f"UPDATE {table_name} SET {column_name} = ROUND({column_name}, 2)"))
+        if conn.dialect.name == "mysql":
+            conn.execute(text(f"ALTER TABLE {table_name} MODIFY {column_name} DECIMAL({precision}, 2) NOT NULL"))
+
+    _rebuild_customer_summaries(conn)  # parts spend at the rounded prices
+
+
+@migration(9, "inventory stock on hand")
+def inventory_stock(conn):
+    columns = [column["name"] for column in inspect(conn).get_columns("inventory")]
+    if "stock" not in columns:
+        conn.execute(text("ALTER TABLE inventory ADD COLUMN stock INTEGER"))  # NULL: existing parts stay untracked
+
+    # SQLite can't add a constraint to an existing table, the conditional decrement keeps stock >= 0 there
+    if conn.dialect.name in ("postgresql", "mysql"):
+        checks = {check["name"] for check in inspect(conn).get_check_constraints("inventory")}
+        if "ck_inventory_stock_nonnegative" not in checks:
+            conn.execute(text("ALTER TABLE inventory ADD CONSTRAINT ck_inventory_stock_nonnegative CHECK (stock >= 0)"))
+
+
+@contextlib.contextmanager
+def migration_lock(engine):
+    """
+    Held while migrating, so concurrent upgrades (e.g. every gunicorn worker importing
+    flask_app) run one after another: a session advisory lock on PostgreSQL, GET_LOCK on
+    MySQL, and an exclusive lock on a file beside the database on SQLite.
+    """
+    dialect = engine.dialect.name
+
+    if dialect == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    elif dialect in ("mysql", "mariadb"):
+        with engine.connect() as conn:
+            params = {"name": MIGRATION_LOCK_NAME, "timeout": MIGRATION_LOCK_TIMEOUT}
+            if conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), params).scalar() != 1:
+                raise MigrationError(f"Timed out waiting for another migration to finish ({MIGRATION_LOCK_NAME})")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK_NAME})
+    elif dialect == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        import fcntl
+        with open(f"{engine.url.database}.migrate-lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+def upgrade():
+    """Brings the bound database up to the latest migration. Returns the versions applied."""
+    with migration_lock(db.engine):
+        return _upgrade(db.engine)
+
+
+def _upgrade(engine):  # the applied versions are read under the lock, a worker that waited finds nothing to do
+    with engine.begin() as conn:
+        migration_metadata.create_all(conn)
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+        fresh_database = not inspect(conn).has_table("customers")
+
+        if fresh_database:
+            Base.metadata.create_all(conn)
+
+    pending = [step for step in sorted(MIGRATIONS, key=lambda step: step[0]) if step[0] not in applied]
+
+    for version, description, fn in pending:
+        with engine.begin() as conn:  # each step commits on its own
+            if not fresh_database:
+                fn(conn)
+            conn.execute(insert(schema_migrations).values(
+                version=version,
+                description=description,
+                applied_at=datetime.now(timezone.utc).replace(tzinfo=None),
+            ))
+    return [version for version, _, _ in pending]
+
+
+@click.command("db-upgrade")
+@with_appcontext
+def upgrade_command():  # flask --app flask_app db-upgrade
+    try:
+        applied = upgrade()
+    except MigrationError as e:
+        raise click.ClickException(str(e))
+    if applied:
+        click.echo(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+    else:
+        click.echo("Database is up to date.")
@@ -1,26 +1,34 @@
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, validates
 from typing import List
 from datetime import date
+from decimal import Decimal
+from app.utils.db_routing import RoutingSession
+from app.utils.fulltext import install_fulltext
 
 # Creating our Base Model
 class Base(DeclarativeBase):
     pass
 
 # Initialize SQLAlchemy and Marshmallow
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})  # reads of GET requests can go to a replica
+
+
+def normalize_email(email):  # lookup form of an email: trimmed and lowercased
+    return email.strip().lower()
 
 
 # ======================================================================
 # ASSOCIATION TABLE
 # ======================================================================
 
+# composite primary key: one row per (ticket, mechanic), ticket lookups use the key itself
 service_mechanic = db.Table(
     "service_mechanic",
     Base.metadata,
-    db.Column("ticket_id", db.ForeignKey("service_tickets.id")),
-    db.Column("mechanic_id", db.ForeignKey("mechanics.id"))
+    db.Column("ticket_id", db.ForeignKey("service_tickets.id"), primary_key=True),
+    db.Column("mechanic_id", db.ForeignKey("mechanics.id"), primary_key=True, index=True)
 )
 
 # ======================================================================
@@ -31,8 +39,8 @@ class ServiceInventory(Base):
     __tablename__ = "service_inventory"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    ticket_id: Mapped[int] = mapped_column(db.ForeignKey("service_tickets.id"), nullable=False)
-    inventory_id: Mapped[int] = mapped_column(db.ForeignKey("inventory.id"), nullable=False)
+    ticket_id: Mapped[int] = mapped_column(db.ForeignKey("service_tickets.id"), nullable=False, index=True)
+    inventory_id: Mapped[int] = mapped_column(db.ForeignKey("inventory.id"), nullable=False, index=True)
     quantity: Mapped[int] = mapped_column(nullable=False)
 
     inventory: Mapped["Inventory"] = db.relationship(back_populates="service_inventory")
@@ -49,18 +57,24 @@ class Customer(Base):
     name: Mapped[str] = mapped_column(db.String(255), nullable=False)
     password: Mapped[str] = mapped_column(db.String(255), nullable=False)
     email: Mapped[str] = mapped_column(db.String(360), nullable=False, unique=True)
+    email_normalized: Mapped[str] = mapped_column(db.String(360), nullable=False, unique=True, index=True) # indexed login lookup, kept in sync by _sync_email_normalized
     phone: Mapped[str] = mapped_column(db.String(20), nullable=False)
 
     service_tickets: Mapped[List["ServiceTicket"]] = db.relationship(back_populates="customer")
 
+    @validates("email")
+    def _sync_email_normalized(self, key, email):
+        self.email_normalized = normalize_email(email)
+        return email
+
 class ServiceTicket(Base):
     __tablename__ = "service_tickets"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    vin: Mapped[str] = mapped_column(db.String(17), nullable=False)
-    service_date: Mapped[date] = mapped_column(db.Date, nullable=False)
+    vin: Mapped[str] = mapped_column(db.String(17), nullable=False, index=True)
+    service_date: Mapped[date] = mapped_column(db.Date, nullable=False, index=True)
     service_desc: Mapped[str] = mapped_column(db.String(255), nullable=False)
-    customer_id: Mapped[int] = mapped_column(db.ForeignKey("customers.id"), nullable=False)
+    customer_id: Mapped[int] = mapped_column(db.ForeignKey("customers.id"), nullable=False, index=True)
 
     customer: Mapped["Customer"] = db.relationship(back_populates="service_tickets")
     mechanics: Mapped[List["Mechanic"]] = db.relationship(secondary=service_mechanic, back_populates="service_tickets")
@@ -77,13 +91,53 @@ class Mechanic(Base):
 
     service_tickets: Mapped[List["ServiceTicket"]] = db.relationship(secondary=service_mechanic, back_populates="mechanics")  
 
+class CustomerSummary(Base):
+    __tablename__ = "customer_summaries"
+
+    # per-customer rollup, updated in the same transaction as every ticket write
+    # (app/utils/customer_summary.py); `flask customer-summary-rebuild` recomputes it
+    customer_id: Mapped[int] = mapped_column(db.ForeignKey("customers.id"), primary_key=True)
+    ticket_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    last_service_date: Mapped[date] = mapped_column(db.Date, nullable=True)
+    parts_spend: Mapped[Decimal] = mapped_column(db.Numeric(12, 2), nullable=False, default=0)
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # one row per cached table, bumped on every write so all workers drop stale entries
+    name: Mapped[str] = mapped_column(db.String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False, default=0)
+
+class RateLimitCounter(Base):
+    __tablename__ = "rate_limit_counters"
+
+    # fixed-window counter per limiter key, also the row locked while a moving-window hit is counted
+    key: Mapped[str] = mapped_column(db.String(255), primary_key=True)
+    count: Mapped[int] = mapped_column(nullable=False, default=0)
+    expires_at: Mapped[float] = mapped_column(db.Double, nullable=False, index=True)
+
+class RateLimitEntry(Base):
+    __tablename__ = "rate_limit_entries"
+    __table_args__ = (db.Index("ix_rate_limit_entries_key_created_at", "key", "created_at"),)
+
+    # one row per hit inside a moving window
+    id: Mapped[int] = mapped_column(primary_key=True)
+    key: Mapped[str] = mapped_column(db.String(255), nullable=False)
+    created_at: Mapped[float] = mapped_column(db.Double, nullable=False)
+    expires_at: Mapped[float] = mapped_column(db.Double, nullable=False, index=True)
+
 class Inventory(Base):
     __tablename__ = "inventory"
+    __table_args__ = (db.CheckConstraint("stock >= 0", name="ck_inventory_stock_nonnegative"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(db.String(255), unique=True, nullable=False)
-    price: Mapped[float] = mapped_column(db.Float, nullable=False)
+    price: Mapped[Decimal] = mapped_column(db.Numeric(10, 2), nullable=False) # exact cents, see migration 8
+    stock: Mapped[int] = mapped_column(nullable=True) # units on hand, reserved by ticket creation; NULL = not tracked
 
     service_inventory: Mapped[List["ServiceInventory"]] = db.relationship(back_populates="inventory")
 
 
+# full-text indexes for the ranked search endpoint, built by create_all() and migration 6
+install_fulltext(ServiceTicket.__table__, "service_desc")
+install_fulltext(Inventory.__table__, "name")
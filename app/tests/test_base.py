@@ -1,5 +1,8 @@
 import unittest
-from datetime import date
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event, insert
 
 from app import create_app
 from app.models import (
@@ -9,7 +12,14 @@ from app.models import (
     ServiceInventory,
     ServiceTicket,
     db,
+    service_mechanic,
 )
+from app.utils.customer_summary import rebuild_summaries
+from app.utils.db_metrics import most_repeated
+
+SEED_BATCH = 50_000  # rows per INSERT when seeding large volumes
+SEED_START = date(2015, 1, 1)  # seeded tickets are spread over ten years from here
+SEED_DAYS = 3650
 
 # Set up for base test case with common utilities for all API test classes 
 # e.g. TestMechanic, TestCustomer, TestServiceTicket
@@ -33,6 +43,33 @@ class APITestCase(unittest.TestCase):
         db.drop_all() 
         self.app_context.pop()
 
+    # Count the SQL statements executed inside the block, e.g.
+    # with self.count_queries() as queries: ... then check len(queries)
+    @contextmanager
+    def count_queries(self):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+    # Fail if the block runs more than budget SQL statements, or runs one statement shape
+    # more than max_repeats times (an N+1), e.g.
+    # with self.assert_query_budget(3): self.client.get("/service_tickets/")
+    @contextmanager
+    def assert_query_budget(self, budget, max_repeats=1):
+        with self.count_queries() as statements:
+            yield statements
+        listing = "\n".join(statements)
+        self.assertLessEqual(len(statements), budget, f"{len(statements)} queries over a budget of {budget}:\n{listing}")
+        shape, times = most_repeated(statements)
+        self.assertLessEqual(times, max_repeats, f"ran {times} times: {shape}")
+
     def create_customer(self, name="Jane Customer", email="jane@example.com"):
         customer = Customer(
             name=name,
@@ -97,3 +134,34 @@ class APITestCase(unittest.TestCase):
 
         db.session.commit()  # final commit
         return ticket
+
+    # Bulk-insert deterministic rows for volume tests and benchmarks, e.g.
+    # self.seed_volume(customers=100_000, mechanics=100, parts=10_000, tickets=1_000_000)
+    # Ids run from 1; customer n is c{n}@example.com, mechanic n is m{n}@example.com and
+    # part n is "Part n". Ticket n belongs to customer n % customers + 1, has mechanic
+    # n % mechanics + 1 and one of part n % parts + 1, and is dated within SEED_DAYS of SEED_START.
+    def seed_volume(self, customers=0, mechanics=0, parts=0, tickets=0, batch=SEED_BATCH):
+        def insert_batches(table, count, row):
+            for first in range(1, count + 1, batch):
+                db.session.execute(insert(table), [row(i) for i in range(first, min(first + batch, count + 1))])
+
+        insert_batches(Customer, customers, lambda i: {
+            "id": i, "name": f"Customer {i}", "email": f"c{i}@example.com",
+            "email_normalized": f"c{i}@example.com", "password": "secret", "phone": "555-000-0000",
+        })
+        insert_batches(Mechanic, mechanics, lambda i: {
+            "id": i, "name": f"Mechanic {i}", "email": f"m{i}@example.com", "phone": "555-111-1111", "salary": 60000.0,
+        })
+        insert_batches(Inventory, parts, lambda i: {"id": i, "name": f"Part {i}", "price": 10 + i % 90})
+        insert_batches(ServiceTicket, tickets, lambda i: {
+            "id": i, "vin": f"VIN{i:014d}", "service_date": SEED_START + timedelta(days=i % SEED_DAYS),
+            "service_desc": "Oil change", "customer_id": i % customers + 1,
+        })
+        if mechanics:
+            insert_batches(service_mechanic, tickets, lambda i: {"ticket_id": i, "mechanic_id": i % mechanics + 1})
+        if parts:
+            insert_batches(ServiceInventory, tickets, lambda i: {
+                "id": i, "ticket_id": i, "inventory_id": i % parts + 1, "quantity": 1,
+            })
+        db.session.commit()
+        rebuild_summaries(db.engine)  # rollups as the API would have left them
@@ -1,7 +1,9 @@
 from datetime import date
+from unittest.mock import patch
 
-from app.models import Customer, ServiceTicket, db
+from app.models import CacheVersion, Customer, CustomerSummary, ServiceTicket, db
 from app.tests.test_base import APITestCase
+from app.utils import util
 from app.utils.util import encode_token
 
 
@@ -100,6 +102,42 @@ class TestCustomer(APITestCase):
         self.assertEqual(response.json['message'], 'Login successful.')
 
 
+    def test_create_customer_stores_hashed_password(self):
+        customer_payload = {
+            "name": "Hash Me",
+            "email": "Hash.Me@Example.com",
+            "password": "s3cretPass",
+            "phone": "555-123-4567"
+            }
+
+        response = self.client.post('/customers/', json=customer_payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('password', response.json)
+
+        customer = db.session.get(Customer, response.json['id'])
+        self.assertTrue(customer.password.startswith('pbkdf2:sha256:'))
+
+        # login is case-insensitive on email and verifies against the hash
+        login = self.client.post('/customers/login', json={"email": "hash.me@example.com", "password": "s3cretPass"})
+        self.assertEqual(login.status_code, 200)
+
+
+    def test_login_rehashes_plaintext_and_outdated_work_factor(self):
+        # seeded customers have legacy plaintext passwords
+        credentials = {"email": "testa@email.com", "password": "testA123"}
+
+        self.assertEqual(self.client.post('/customers/login', json=credentials).status_code, 200)
+        db.session.expire_all()
+        first_hash = db.session.get(Customer, 1).password
+        self.assertTrue(first_hash.startswith('pbkdf2:sha256:1000$'))
+
+        # raising the work factor upgrades the stored hash on the next login
+        self.app.config['PASSWORD_HASH_ITERATIONS'] = 2000
+        self.assertEqual(self.client.post('/customers/login', json=credentials).status_code, 200)
+        db.session.expire_all()
+        self.assertTrue(db.session.get(Customer, 1).password.startswith('pbkdf2:sha256:2000$'))
+
+
     def test_invalid_login(self):
         # bad credentials should fail authentication with 401
         credentials = {
@@ -166,6 +204,20 @@ class TestCustomer(APITestCase):
         self.assertEqual(follow_up.status_code, 404)
 
 
+    def test_delete_customer_who_had_tickets_removes_summary(self):
+        # the summary row created by the first ticket stays after the tickets are gone
+        created = self.client.post('/service_tickets/', json={
+            'vin': '1HGCM82633A123456', 'service_date': '2024-01-01', 'service_desc': 'Oil', 'customer_id': 1,
+        })
+        self.client.delete(f"/service_tickets/{created.json['service_ticket']['id']}")
+        self.assertIsNotNone(db.session.get(CustomerSummary, 1))
+
+        response = self.client.delete('/customers/', headers=self._auth_headers(1))
+        self.assertEqual(response.status_code, 200)
+        db.session.expire_all()
+        self.assertIsNone(db.session.get(CustomerSummary, 1))
+
+
     def test_delete_customer_not_found(self):
         # deleting with a token for missing customer should return 404 status
         response = self.client.delete('/customers/', headers=self._auth_headers(999))
@@ -190,8 +242,106 @@ class TestCustomer(APITestCase):
         self.assertEqual(response.json[0]['vin'], "1HGCM82633A004352")
 
 
+    def test_get_my_tickets_keyset_pagination(self):
+        # tickets come back oldest first, one page at a time
+        for day in (3, 1, 2):
+            db.session.add(ServiceTicket(vin=f"VIN{day}", service_date=date(2024, 1, day), service_desc="Oil", customer_id=1))
+        db.session.add(ServiceTicket(vin="OTHER", service_date=date(2024, 1, 1), service_desc="Oil", customer_id=2))
+        db.session.commit()
+        headers = self._auth_headers(1)
+
+        first_page = self.client.get('/customers/my-tickets?per_page=2', headers=headers)
+        self.assertEqual([t['vin'] for t in first_page.json], ["VIN1", "VIN2"])
+
+        cursor = first_page.headers['X-Next-Cursor']
+        second_page = self.client.get(f'/customers/my-tickets?per_page=2&cursor={cursor}', headers=headers)
+        self.assertEqual([t['vin'] for t in second_page.json], ["VIN3"])
+        self.assertNotIn('X-Next-Cursor', second_page.headers)
+
+        invalid = self.client.get('/customers/my-tickets?cursor=not-a-cursor', headers=headers)
+        self.assertEqual(invalid.status_code, 400)
+
+
+    def test_token_required_rejects_malformed_headers(self):
+        # malformed Authorization headers are rejected with 400 instead of raising
+        for header, message in [
+            ("Bearer", "Token is missing"),
+            ("Bearer    ", "Token is missing"),
+            ("Basic abc123", "Token is missing"),
+            ("Bearer not.a.jwt", "Invalid Token"),
+        ]:
+            response = self.client.get('/customers/my-tickets', headers={"Authorization": header})
+            self.assertEqual(response.status_code, 400, header)
+            self.assertEqual(response.json['message'], message, header)
+
+
+    def test_token_required_caches_verified_tokens(self):
+        # a token is decoded once, later requests reuse the verified customer_id
+        util._verified_tokens.clear()
+        headers = self._auth_headers(1)
+        with patch.object(util.jwt, 'decode', wraps=util.jwt.decode) as decode:
+            self.client.get('/customers/my-tickets', headers=headers)
+            self.client.get('/customers/my-tickets', headers=headers)
+        self.assertEqual(decode.call_count, 1)
+
+
     def test_get_my_tickets_requires_auth(self):
         # missing authentication header should block access
         response = self.client.get('/customers/my-tickets')
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json['message'], 'Login to access this resource')
+
+
+    def test_get_customers_keyset_pagination(self):
+        # walk the list two at a time following the next cursor header
+        first_page = self.client.get('/customers/?per_page=2')
+        self.assertEqual(first_page.status_code, 200)
+        self.assertEqual([c['id'] for c in first_page.json], [1, 2])
+        cursor = first_page.headers['X-Next-Cursor']
+
+        second_page = self.client.get(f'/customers/?per_page=2&cursor={cursor}')
+        self.assertEqual(second_page.status_code, 200)
+        self.assertEqual([c['id'] for c in second_page.json], [3])
+        self.assertNotIn('X-Next-Cursor', second_page.headers)
+
+
+    def test_conditional_get_sees_writes_of_other_workers(self):
+        etag = self.client.get('/customers/1').headers['ETag']
+
+        # another worker's write creates the version row; this worker still memoizes version 0
+        db.session.add(CacheVersion(name='customers', version=1))
+        db.session.commit()
+
+        response = self.client.get('/customers/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+    def test_get_customers_invalid_cursor(self):
+        response = self.client.get('/customers/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['error'], 'Invalid pagination parameters.')
+
+
+    def test_get_customer_conditional_get(self):
+        first = self.client.get('/customers/1')
+        etag = first.headers['ETag']
+
+        # matching If-None-Match returns 304 after re-reading only the version row, not the customer
+        with self.count_queries() as queries:
+            cached = self.client.get('/customers/1', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('cache_versions', queries[0])
+
+        # an update changes the ETag so the client gets the new body
+        self.client.put('/customers/1', json={
+            "name": "Renamed A",
+            "phone": "555-111-2222",
+            "email": "testa@email.com",
+            "password": "testA123"
+        })
+        updated = self.client.get('/customers/1', headers={'If-None-Match': etag})
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(updated.json['name'], 'Renamed A')
+        self.assertNotEqual(updated.headers['ETag'], etag)
@@ -0,0 +1,96 @@
+from datetime import date
+
+from sqlalchemy import update
+
+from app.models import CustomerSummary, db
+from app.tests.test_base import APITestCase
+from app.utils.customer_summary import computed_summaries, rebuild_summaries
+
+
+class TestCustomerSummary(APITestCase):
+    def _summary(self, customer_id):
+        return self.client.get(f"/customers/{customer_id}/summary").json
+
+    def _ticket(self, customer, service_date, inventory):
+        return {
+            "vin": "1HGCM82633A123456",
+            "service_date": service_date,
+            "service_desc": "Service",
+            "customer_id": customer.id,
+            "inventory": inventory,
+        }
+
+    def test_summary_follows_ticket_writes(self):
+        customer = self.create_customer()
+        pads = self.create_inventory(name="Brake Pads", price=50.0)
+        oil = self.create_inventory(name="Oil", price=10.0)
+
+        # no tickets yet
+        self.assertEqual(
+            self._summary(customer.id),
+            {"customer_id": customer.id, "ticket_count": 0, "last_service_date": None, "parts_spend": 0.0},
+        )
+
+        # a single create and a bulk create roll into the same row
+        created = self.client.post("/service_tickets/", json=self._ticket(
+            customer, "2024-03-01", [{"inventory_id": pads.id, "quantity": 2}]
+        ))
+        self.assertEqual(created.status_code, 201)
+        bulk = self.client.post("/service_tickets/bulk", json=[
+            self._ticket(customer, "2024-01-01", [{"inventory_id": oil.id, "quantity": 1}]),
+            self._ticket(customer, "2024-05-01", []),
+        ])
+        self.assertEqual(bulk.status_code, 201)
+
+        summary = self._summary(customer.id)
+        self.assertEqual(summary["ticket_count"], 3)
+        self.assertEqual(summary["last_service_date"], "2024-05-01")
+        self.assertEqual(summary["parts_spend"], 110.0)
+
+        # a price change moves the spend of every customer who used the part
+        self.client.put(f"/inventory/{oil.id}", json={"name": "Oil", "price": 12.5})
+        self.assertEqual(self._summary(customer.id)["parts_spend"], 112.5)
+
+        # deleting the newest ticket falls back to the next newest date
+        self.client.delete(f"/service_tickets/{bulk.json['service_ticket_ids'][1]}")
+        self.client.delete(f"/service_tickets/{created.json['service_ticket']['id']}")
+        summary = self._summary(customer.id)
+        self.assertEqual(summary["ticket_count"], 1)
+        self.assertEqual(summary["last_service_date"], "2024-01-01")
+        self.assertEqual(summary["parts_spend"], 12.5)
+
+        # the incremental row matches a full recompute
+        with db.engine.connect() as conn:
+            self.assertEqual(computed_summaries(conn, [customer.id]), {customer.id: (1, date(2024, 1, 1), 12.5)})
+
+    def test_summary_unknown_customer_returns_404(self):
+        response = self.client.get("/customers/999/summary")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_rebuild_reports_and_fixes_drift(self):
+        customer = self.create_customer()
+        other = self.create_customer(name="Other", email="other@example.com")
+        part = self.create_inventory(price=20.0)
+        self.create_service_ticket(customer=customer, inventory_items=[(part, 3)])  # written around the API, no rollup
+        self.client.post("/service_tickets/", json=self._ticket(other, "2024-02-01", []))
+
+        # only the customer whose row is missing has drifted
+        self.assertEqual(rebuild_summaries(db.engine, batch_size=1, fix=False), (2, [customer.id]))
+
+        result = self.app.test_cli_runner().invoke(args=["customer-summary-rebuild", "--batch-size", "1"])
+        self.assertIn("Checked 2 customers, 1 drifted.", result.output)
+        self.assertEqual(self._summary(customer.id)["parts_spend"], 60.0)
+
+        # a corrupted row is rewritten too
+        db.session.execute(update(CustomerSummary).values(ticket_count=5))
+        db.session.commit()
+        self.assertEqual(rebuild_summaries(db.engine), (2, [customer.id, other.id]))
+        self.assertEqual(rebuild_summaries(db.engine, fix=False), (2, []))
+
+    def test_seeded_volume_has_matching_rollups(self):
+        self.seed_volume(customers=3, mechanics=2, parts=2, tickets=10, batch=4)
+
+        self.assertEqual(rebuild_summaries(db.engine, fix=False), (3, []))
+        self.assertEqual(self._summary(1)["ticket_count"], 3)  # tickets 3, 6 and 9
+        self.assertEqual(self.client.get("/service_tickets/10").json["customer_id"], 2)
@@ -0,0 +1,62 @@
+import importlib
+import os
+import time
+from unittest import mock
+
+from sqlalchemy import text
+
+import config
+from app import create_app
+from app.models import db
+from app.tests.test_base import APITestCase
+from app.utils.db_pool import InstrumentedQueuePool, pool_stats
+
+
+class TestDBPool(APITestCase):
+    def test_pool_stats_report_checked_out_idle_and_wait_time(self):
+        self.assertIsInstance(db.engine.pool, InstrumentedQueuePool)
+        db.session.remove()
+        pool_stats(db.engine)  # reset the wait counters
+
+        # hold one connection open while taking a snapshot
+        with db.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            busy = pool_stats(db.engine)
+        idle = pool_stats(db.engine)
+
+        self.assertEqual(busy["checked_out"], 1)
+        self.assertEqual(busy["checkouts"], 1)
+        self.assertGreaterEqual(busy["wait_ms_max"], 0)
+        self.assertEqual(idle["checked_out"], 0)
+        self.assertGreaterEqual(idle["idle"], 1)
+        self.assertEqual(idle["checkouts"], 0)  # counters reset after each snapshot
+
+    def test_pool_stats_logged_after_request(self):
+        with mock.patch.object(config.TestingConfig, "DB_POOL_LOG_INTERVAL", 0.001, create=True):
+            app = create_app("TestingConfig")
+        time.sleep(0.01)
+
+        # the first request after the interval writes a db_pool line
+        with self.assertLogs(app.logger, level="INFO") as logs:
+            with app.app_context():
+                app.test_client().get("/inventory/")
+
+        self.assertTrue(any("db_pool" in line and "checked_out=" in line for line in logs.output))
+
+    def test_production_pool_settings_read_from_environment(self):
+        env = {
+            "DB_POOL_SIZE": "20",
+            "DB_MAX_OVERFLOW": "5",
+            "DB_POOL_TIMEOUT": "3",
+            "DB_POOL_RECYCLE": "600",
+            "DB_POOL_PRE_PING": "false",
+        }
+        with mock.patch.dict(os.environ, env):
+            options = importlib.reload(config).ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS
+        importlib.reload(config)
+
+        self.assertEqual(options["pool_size"], 20)
+        self.assertEqual(options["max_overflow"], 5)
+        self.assertEqual(options["pool_timeout"], 3)
+        self.assertEqual(options["pool_recycle"], 600)
+        self.assertFalse(options["pool_pre_ping"])
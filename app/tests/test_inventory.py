@@ -1,4 +1,16 @@
+import io
+from decimal import Decimal
+from unittest import mock
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app.blueprints.inventory import routes as inventory_routes
+from app.extensions import LRUCache
+from app.models import CacheVersion, CustomerSummary, Inventory, db
 from app.tests.test_base import APITestCase
+from app.utils import util
+from app.utils.util import bump_cache_version
 
 
 class TestInventory(APITestCase):
@@ -79,3 +91,181 @@ class TestInventory(APITestCase):
         response = self.client.delete("/inventory/999")
 
         self.assertEqual(response.status_code, 404)
+
+    def test_get_inventory_served_from_cache_until_write(self):
+        inventory = self.create_inventory(name="Cabin Filter", price=15.99)
+        inventory_id = inventory.id
+        self.client.get("/inventory/")
+        self.client.get(f"/inventory/{inventory_id}")
+
+        # repeated reads are answered from the cache without touching the database
+        with self.count_queries() as queries:
+            list_response = self.client.get("/inventory/")
+            item_response = self.client.get(f"/inventory/{inventory_id}")
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(list_response.json[0]["name"], "Cabin Filter")
+        self.assertEqual(item_response.json["price"], 15.99)
+
+        # a write through the API invalidates both cached reads
+        self.client.put(
+            f"/inventory/{inventory_id}", json={"name": "Cabin Filter", "price": 17.99}
+        )
+
+        self.assertEqual(self.client.get("/inventory/").json[0]["price"], 17.99)
+        self.assertEqual(self.client.get(f"/inventory/{inventory_id}").json["price"], 17.99)
+
+    def test_cache_version_bumped_after_the_write_commits(self):
+        inventory = self.create_inventory()
+        events = []
+
+        def record(conn, cursor, statement, *args):
+            events.append(statement)
+
+        def record_commit(conn):
+            events.append("COMMIT")
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        event.listen(db.engine, "commit", record_commit)
+        try:
+            self.client.put(f"/inventory/{inventory.id}", json={"name": "Brake Pads", "price": 60})
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+            event.remove(db.engine, "commit", record_commit)
+
+        # the version row is only locked by its own short transaction, after the write
+        write = next(i for i, statement in enumerate(events) if statement.startswith("UPDATE inventory"))
+        bump = next(i for i, statement in enumerate(events) if "cache_versions" in statement and statement.startswith("UPDATE"))
+        self.assertLess(write, events.index("COMMIT"), events)
+        self.assertLess(events.index("COMMIT"), bump, events)
+        self.assertEqual(db.session.get(CacheVersion, "inventory").version, 1)
+
+    def test_cache_version_bump_discarded_on_rollback_kept_past_savepoint(self):
+        bump_cache_version("inventory")
+        db.session.rollback()
+        db.session.commit()
+        self.assertIsNone(db.session.get(CacheVersion, "inventory"))
+
+        bump_cache_version("inventory")
+        with db.session.begin_nested() as savepoint:
+            savepoint.rollback()
+        db.session.commit()
+        self.assertEqual(db.session.get(CacheVersion, "inventory").version, 1)
+
+    def test_cache_version_bump_retried_once_after_a_failure(self):
+        inventory = self.create_inventory()
+        etag = self.client.get("/inventory/").headers["ETag"]
+        write = util._write_cache_bumps
+        failure = OperationalError("UPDATE cache_versions", {}, Exception("database is locked"))
+        attempts = []
+
+        def fail_first(names):
+            attempts.append(names)
+            if len(attempts) == 1:
+                raise failure
+            write(names)
+
+        with mock.patch.object(util, "_write_cache_bumps", side_effect=fail_first):
+            self.client.put(f"/inventory/{inventory.id}", json={"name": "Brake Pads", "price": 60})
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(self.client.get("/inventory/", headers={"If-None-Match": etag}).status_code, 200)
+
+        with mock.patch.object(util, "_write_cache_bumps", side_effect=failure), \
+                self.assertLogs(self.app.logger, level="ERROR") as logs:
+            response = self.client.put(f"/inventory/{inventory.id}", json={"name": "Brake Pads", "price": 70})
+        self.assertEqual(response.status_code, 200)  # the write itself is committed
+        self.assertIn("clients get 304s for the old data", logs.output[0])
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        lru = LRUCache(threshold=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")  # "b" is now the least recently used entry
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("c"), 3)
+
+    def test_import_inventory_csv_upserts_by_name(self):
+        self.create_inventory(name="Oil Filter", price=10.0)
+        csv_body = (
+            "name,price,stock,supplier_sku\n"
+            "Oil Filter,12.50,4,A1\n"  # existing part: price and stock updated
+            "Brake Pads,49.99,,A2\n"  # new part, empty stock cell = not tracked
+            ",5.00,1,A3\n"  # no name
+            "Wiper,cheap,1,A4\n"  # bad price
+            "Brake Pads,45.00,10,A5\n"  # repeated name updates the row above
+        )
+
+        # uploaded as a multipart file, chunked two rows per statement
+        with mock.patch.object(inventory_routes, "IMPORT_CHUNK_SIZE", 2):
+            response = self.client.post(
+                "/inventory/import",
+                data={"file": (io.BytesIO(csv_body.encode()), "catalog.csv")},
+                content_type="multipart/form-data",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.json["inserted"], response.json["updated"], response.json["rejected"]), (1, 2, 2)
+        )
+        self.assertEqual([error["line"] for error in response.json["errors"]], [4, 5])
+        self.assertIn("price", response.json["errors"][1]["errors"])
+
+        parts = {part.name: (part.price, part.stock) for part in db.session.query(Inventory)}
+        self.assertEqual(parts, {"Oil Filter": (Decimal("12.50"), 4), "Brake Pads": (Decimal("45.00"), 10)})
+
+    def test_import_inventory_raw_csv_body_keeps_stock_and_summaries(self):
+        customer = self.create_customer()
+        part = self.create_inventory(name="Rotor", price=80.0)
+        part.stock = 7
+        db.session.commit()
+        part_id = part.id
+        self.client.post("/service_tickets/", json={
+            "vin": "VIN", "service_date": "2024-01-01", "service_desc": "Rotor", "customer_id": customer.id,
+            "inventory": [{"inventory_id": part_id, "quantity": 2}],
+        })
+
+        # no stock column: stock is left alone; the price change reaches the customer's summary
+        response = self.client.post("/inventory/import", data="name,price\nRotor,90.00\n", content_type="text/csv")
+
+        self.assertEqual(response.json["updated"], 1)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Inventory, part_id).stock, 5)
+        self.assertEqual(db.session.get(CustomerSummary, customer.id).parts_spend, Decimal("180.00"))
+
+    def test_import_inventory_blank_stock_keeps_tracked_stock(self):
+        part = self.create_inventory(name="Brake Pads", price=40.0)
+        part.stock = 5
+        db.session.commit()
+        part_id = part.id
+
+        # a blank cell updates the price but does not stop tracking the part's stock
+        response = self.client.post("/inventory/import", data="name,price,stock\nBrake Pads,49.99,\n", content_type="text/csv")
+
+        self.assertEqual(response.json["updated"], 1)
+        db.session.expire_all()
+        part = db.session.get(Inventory, part_id)
+        self.assertEqual((part.price, part.stock), (Decimal("49.99"), 5))
+
+    def test_prices_outside_the_column_range_are_rejected(self):
+        for price in (-3, 100000000):
+            response = self.client.post("/inventory/", json={"name": "Oil Filter", "price": price})
+            self.assertEqual(response.status_code, 400, price)
+            self.assertIn("price", response.json)
+
+        # import rows are counted as rejected, the rest of the file still goes in
+        csv_body = "name,price\nA,-5\nB,100000000.00\nC,99999999.99\n"
+        response = self.client.post("/inventory/import", data=csv_body, content_type="text/csv")
+
+        self.assertEqual((response.json["inserted"], response.json["rejected"]), (1, 2))
+        self.assertEqual([error["line"] for error in response.json["errors"]], [2, 3])
+
+    def test_import_inventory_invalid_csv_returns_400(self):
+        # header without price, then a body that is not UTF-8
+        response = self.client.post("/inventory/import", data="name\nOil\n", content_type="text/csv")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/inventory/import", data=b"name,price\n\xff\xfe,1\n", content_type="text/csv")
+        self.assertEqual(response.status_code, 400)
@@ -1,5 +1,13 @@
-from app.models import Mechanic, db
+from datetime import date
+from unittest import mock
+
+from sqlalchemy import func, select, update
+
+from app import create_app
+from app.models import CacheVersion, Mechanic, RateLimitCounter, RateLimitEntry, db
 from app.tests.test_base import APITestCase
+from app.utils import limiter_storage
+from app.utils.limiter_storage import DatabaseStorage
 
 
 class TestMechanic(APITestCase):
@@ -68,6 +76,58 @@ class TestMechanic(APITestCase):
         self.assertEqual(response.json["email"], mechanic.email)
         self.assertEqual(response.json["phone"], mechanic.phone)
 
+    def test_get_mechanic_cache_invalidated_by_other_worker(self):
+        self.app.config["CACHE_VERSION_CHECK_INTERVAL"] = 0  # re-read the version row every request
+        mechanic = self.create_mechanic(name="Cached Name")
+        mechanic_id = mechanic.id
+        self.client.post(
+            "/mechanics/",
+            json={"name": "Other", "email": "other@example.com", "phone": "555", "salary": 1.0},
+        )  # creates the version row
+        self.assertEqual(self.client.get(f"/mechanics/{mechanic_id}").json["name"], "Cached Name")
+
+        # another worker renames the mechanic and bumps the shared version row
+        mechanic.name = "Renamed"
+        db.session.execute(
+            update(CacheVersion)
+            .where(CacheVersion.name == "mechanics")
+            .values(version=CacheVersion.version + 1)
+        )
+        db.session.commit()
+
+        response = self.client.get(f"/mechanics/{mechanic_id}")
+
+        self.assertEqual(response.json["name"], "Renamed")
+
+    def test_create_mechanic_rate_limit_shared_across_workers(self):
+        other_worker = create_app("TestingConfig").test_client()  # separate app, same database
+        clients = [self.client, other_worker, self.client, other_worker, self.client, other_worker]
+
+        # "5 per hour" counts hits from both workers, the 6th is rejected
+        statuses = [
+            client.post(
+                "/mechanics/",
+                json={"name": "M", "email": f"m{i}@example.com", "phone": "555", "salary": 1.0},
+            ).status_code
+            for i, client in enumerate(clients)
+        ]
+
+        self.assertEqual(statuses, [201] * 5 + [429])
+
+    def test_rate_limit_storage_evicts_expired_entries(self):
+        storage = DatabaseStorage(cleanup_interval=0)
+        with mock.patch.object(limiter_storage.time, "time", return_value=1000.0):
+            self.assertTrue(storage.acquire_entry("old", limit=2, expiry=60))
+
+        # a later hit, after "old" expired, removes its rows
+        with mock.patch.object(limiter_storage.time, "time", return_value=2000.0):
+            self.assertTrue(storage.acquire_entry("new", limit=2, expiry=60))
+            self.assertEqual(storage.get_moving_window("new", 2, 60), (2000.0, 1))
+
+        keys = db.session.execute(select(RateLimitEntry.key)).scalars().all()
+        self.assertEqual(keys, ["new"])
+        self.assertEqual(db.session.execute(select(func.count()).select_from(RateLimitCounter)).scalar_one(), 1)
+
     def test_update_mechanic_invalid_payload_returns_400(self):
         mechanic = self.create_mechanic()
         payload = {
@@ -131,3 +191,39 @@ class TestMechanic(APITestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json[0]["name"], "Busy Mech")
+        self.assertEqual(response.json[0]["ticket_count"], 2)
+        self.assertEqual(response.json[1]["ticket_count"], 1)
+
+    def test_get_top_mechanics_limit_and_date_window(self):
+        customer = self.create_customer()
+        mechanic_old = self.create_mechanic(name="Old Mech", email="old@example.com")
+        mechanic_new = self.create_mechanic(name="New Mech", email="new@example.com")
+        for i in range(2):
+            self.create_service_ticket(
+                customer=customer,
+                mechanics=[mechanic_old],
+                vin=f"1HGCM82633A00010{i}",
+                service_date=date(2023, 6, 1),
+            )
+        self.create_service_ticket(
+            customer=customer,
+            mechanics=[mechanic_new],
+            vin="1HGCM82633A000110",
+            service_date=date(2024, 6, 1),
+        )
+
+        # Only 2024 tickets are counted, and limit trims the leaderboard
+        response = self.client.get(
+            "/mechanics/top_mechanics?limit=1&from=2024-01-01&to=2024-12-31"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+        self.assertEqual(response.json[0]["name"], "New Mech")
+        self.assertEqual(response.json[0]["ticket_count"], 1)
+
+    def test_get_top_mechanics_invalid_limit_returns_400(self):
+        response = self.client.get("/mechanics/top_mechanics?limit=0")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("limit", response.json)
@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import inspect, select, text
+
+from app.migrations import MIGRATIONS, MigrationError, migration_metadata, schema_migrations, upgrade
+from app.models import Customer, CustomerSummary, Inventory, ServiceInventory, ServiceTicket, service_mechanic, db
+from app.tests.test_base import APITestCase
+
+# Schema as the original db.create_all() built it, before any migration
+BASELINE_SCHEMA = [
+    "CREATE TABLE customers (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, password VARCHAR(255) NOT NULL, "
+    "email VARCHAR(360) NOT NULL UNIQUE, phone VARCHAR(20) NOT NULL)",
+    "CREATE TABLE mechanics (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, email VARCHAR(360) NOT NULL UNIQUE, "
+    "phone VARCHAR(20) NOT NULL, salary FLOAT NOT NULL)",
+    "CREATE TABLE inventory (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL UNIQUE, price FLOAT NOT NULL)",
+    "CREATE TABLE service_tickets (id INTEGER PRIMARY KEY, vin VARCHAR(17) NOT NULL, service_date DATE NOT NULL, "
+    "service_desc VARCHAR(255) NOT NULL, customer_id INTEGER NOT NULL REFERENCES customers (id))",
+    "CREATE TABLE service_mechanic (ticket_id INTEGER REFERENCES service_tickets (id), "
+    "mechanic_id INTEGER REFERENCES mechanics (id))",
+    "CREATE TABLE service_inventory (id INTEGER PRIMARY KEY, ticket_id INTEGER NOT NULL REFERENCES service_tickets (id), "
+    "inventory_id INTEGER NOT NULL REFERENCES inventory (id), quantity INTEGER NOT NULL)",
+]
+
+
+class TestMigrations(APITestCase):
+    def setUp(self):
+        super().setUp()
+        db.drop_all()  # each test builds the schema it needs
+
+    def tearDown(self):
+        migration_metadata.drop_all(db.engine)
+        super().tearDown()
+
+    def test_upgrade_fresh_database_creates_schema_and_stamps_versions(self):
+        applied = upgrade()
+
+        self.assertEqual(applied, sorted(version for version, _, _ in MIGRATIONS))
+        self.assertIn("ix_service_tickets_customer_id", self._index_names("service_tickets"))
+        self.assertEqual(upgrade(), [])  # nothing left to apply
+
+    def test_upgrade_existing_database_applies_every_step(self):
+        with db.engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(text("INSERT INTO customers VALUES (1, 'A', 'pw', 'Jane@Example.com', '555')"))
+            conn.execute(text("INSERT INTO mechanics VALUES (1, 'M', 'm@example.com', '555', 1.0)"))
+            conn.execute(text("INSERT INTO service_tickets VALUES (1, 'VIN', '2024-01-01', 'Oil', 1)"))
+            conn.execute(text("INSERT INTO service_mechanic VALUES (1, 1), (1, 1)"))  # duplicate pair
+            conn.execute(text("INSERT INTO inventory VALUES (1, 'Pads', 10.004)"))
+            conn.execute(text("INSERT INTO service_inventory VALUES (1, 1, 1, 2)"))
+
+        upgrade()
+
+        inspector = inspect(db.engine)
+        self.assertEqual(
+            inspector.get_pk_constraint("service_mechanic")["constrained_columns"],
+            ["ticket_id", "mechanic_id"],
+        )
+        self.assertEqual(db.session.execute(select(service_mechanic)).all(), [(1, 1)])
+        self.assertEqual(db.session.get(Customer, 1).email_normalized, "jane@example.com")
+        self.assertTrue(inspector.has_table("service_tickets_fts"))  # existing descriptions indexed
+        self.assertEqual(
+            db.session.execute(text("SELECT rowid FROM service_tickets_fts WHERE service_tickets_fts MATCH 'oil'")).all(),
+            [(1,)],
+        )
+        self.assertEqual(db.session.get(Inventory, 1).price, Decimal("10.00"))  # float price rounded to cents
+        self.assertIsNone(db.session.get(Inventory, 1).stock)  # existing parts are not stock tracked
+        summary = db.session.get(CustomerSummary, 1)  # rollups backfilled from existing tickets
+        self.assertEqual((summary.ticket_count, summary.last_service_date, summary.parts_spend), (1, date(2024, 1, 1), Decimal("20.00")))
+        for table, index in [
+            ("customers", "ix_customers_email_normalized"),
+            ("service_tickets", "ix_service_tickets_customer_id"),
+            ("service_tickets", "ix_service_tickets_vin"),
+            ("service_tickets", "ix_service_tickets_service_date"),
+            ("service_inventory", "ix_service_inventory_ticket_id"),
+            ("service_inventory", "ix_service_inventory_inventory_id"),
+            ("service_mechanic", "ix_service_mechanic_mechanic_id"),
+        ]:
+            self.assertIn(index, self._index_names(table))
+
+    def test_concurrent_upgrades_apply_each_step_once(self):
+        def run_upgrade(_):  # as each gunicorn worker does on import
+            with self.app.app_context():
+                return upgrade()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(run_upgrade, range(4)))
+
+        versions = sorted(version for version, _, _ in MIGRATIONS)
+        self.assertEqual(sorted(results), [[], [], [], versions])  # the workers that waited had nothing to do
+        stamped = db.session.execute(select(schema_migrations.c.version)).scalars().all()
+        self.assertEqual(sorted(stamped), versions)
+
+    def test_upgrade_reports_emails_that_differ_only_by_case(self):
+        with db.engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(text("INSERT INTO customers VALUES (1, 'A', 'pw', 'Jane@Example.com', '555')"))
+            conn.execute(text("INSERT INTO customers VALUES (2, 'B', 'pw', 'jane@example.com ', '555')"))
+            conn.execute(text("INSERT INTO customers VALUES (3, 'C', 'pw', 'bob@example.com', '555')"))
+
+        with self.assertRaises(MigrationError) as failure:
+            upgrade()
+
+        self.assertIn("Jane@Example.com (id 1), jane@example.com  (id 2)", str(failure.exception))
+        self.assertNotIn("bob@example.com", str(failure.exception))
+        applied = db.session.execute(select(schema_migrations.c.version)).scalars().all()
+        self.assertEqual(applied, [1])  # stopped before the unique index, the step re-runs once they are fixed
+
+    def test_hot_queries_use_indexes(self):
+        upgrade()
+        hot_queries = {
+            "my-tickets": select(ServiceTicket).where(ServiceTicket.customer_id == 1),
+            "ticket by vin": select(ServiceTicket).where(ServiceTicket.vin == "1HGCM82633A123456"),
+            "tickets by date": select(ServiceTicket).where(ServiceTicket.service_date >= date(2024, 1, 1)),
+            "ticket mechanics": select(service_mechanic).where(service_mechanic.c.ticket_id.in_([1, 2])),
+            "mechanic tickets": select(service_mechanic).where(service_mechanic.c.mechanic_id == 1),
+            "ticket parts": select(ServiceInventory).where(ServiceInventory.ticket_id.in_([1, 2])),
+            "part usage": select(ServiceInventory).where(ServiceInventory.inventory_id == 1),
+            "login": select(Customer.id).where(Customer.email_normalized == "jane@example.com"),
+        }
+
+        for name, query in hot_queries.items():
+            sql = str(query.compile(db.engine, compile_kwargs={"literal_binds": True}))
+            plan = " ".join(row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+            self.assertIn("SEARCH", plan, f"{name} does not use an index: {plan}")
+
+    def _index_names(self, table):
+        inspector = inspect(db.engine)
+        names = {index["name"] for index in inspector.get_indexes(table)}
+        return names | {constraint["name"] for constraint in inspector.get_unique_constraints(table)}
@@ -0,0 +1,144 @@
+import contextlib
+import io
+from unittest import mock
+
+from sqlalchemy.exc import DBAPIError
+
+import config
+from app import create_app
+from app.models import db
+from app.tests.test_base import APITestCase
+from app.utils.db_metrics import QUERY_COUNT_HEADER, QUERY_TIME_HEADER, request_query_stats, statement_shape
+from app.utils.util import encode_token
+
+
+class TestQueryMetrics(APITestCase):
+    def _metrics_app(self, **settings):
+        with contextlib.ExitStack() as stack:
+            for name, value in settings.items():
+                stack.enter_context(mock.patch.object(config.TestingConfig, name, value, create=True))
+            return create_app("TestingConfig")
+
+    def test_read_routes_stay_within_query_budget(self):
+        # several tickets per customer, mechanic and part, so a lazy load per row would show up
+        self.seed_volume(customers=5, mechanics=4, parts=6, tickets=30)
+        token = {"Authorization": f"Bearer {encode_token(1)}"}
+        budgets = [
+            ("/customers/", {}, 2),
+            ("/customers/1", {}, 1),
+            ("/customers/1/summary", {}, 2),
+            ("/customers/my-tickets", token, 5),
+            ("/mechanics/", {}, 1),
+            ("/mechanics/1", {}, 1),
+            ("/mechanics/top_mechanics", {}, 1),
+            ("/inventory/", {}, 1),
+            ("/inventory/1", {}, 1),
+            ("/service_tickets/", {}, 3),
+            ("/service_tickets/1", {}, 3),
+            ("/service_tickets/1/invoice", {}, 1),
+            ("/service_tickets/invoices?ids=1,2,3", {}, 1),
+            ("/service_tickets/search?customer_id=1", {}, 3),
+            ("/service_tickets/export.csv?from=2015-01-01&to=2016-01-01", {}, 1),
+            ("/search/?q=oil", {}, 4),
+        ]
+        for path, headers, budget in budgets:
+            with self.subTest(path=path), self.assert_query_budget(budget):
+                response = self.client.get(path, headers=headers)
+                response.get_data()  # streamed bodies query while they are read
+                self.assertEqual(response.status_code, 200)
+
+    def test_write_routes_stay_within_query_budget(self):
+        self.seed_volume(customers=2, mechanics=3, parts=2, tickets=4)
+        payload = {
+            "vin": "1HGCM82633A123456",
+            "service_date": "2024-01-01",
+            "service_desc": "Brakes",
+            "customer_id": 1,
+            "mechanic_ids": [1, 2],
+            "inventory": [{"inventory_id": 1, "quantity": 1}, {"inventory_id": 2, "quantity": 1}],
+        }
+
+        # one conditional stock decrement per part
+        with contextlib.redirect_stdout(io.StringIO()), self.assert_query_budget(21, max_repeats=2):
+            self.assertEqual(self.client.post("/service_tickets/", json=payload).status_code, 201)
+        with self.assert_query_budget(7):
+            self.client.put("/service_tickets/1/assign_mechanics", json={"add_mechanics_ids": [2, 3]})
+        # one cache version bump per table
+        with self.assert_query_budget(13, max_repeats=2):
+            self.assertEqual(self.client.delete("/service_tickets/2").status_code, 200)
+
+    def test_query_budget_fails_over_budget_or_on_repeats(self):
+        self.seed_volume(customers=3)
+
+        with self.assertRaises(AssertionError):
+            with self.assert_query_budget(0):
+                self.client.get("/customers/1")
+        with self.assertRaises(AssertionError) as failure:
+            with self.assert_query_budget(10):
+                for customer_id in (1, 2, 3):
+                    self.client.get(f"/customers/{customer_id}")
+        self.assertIn("ran 3 times", str(failure.exception))
+
+    def test_headers_and_log_fields_report_queries_and_db_time(self):
+        app = self._metrics_app(QUERY_METRICS_HEADERS=True, QUERY_METRICS_LOG=True)
+        self.create_customer()
+
+        with self.assertLogs(app.logger, level="INFO") as logs:
+            with app.app_context():
+                response = app.test_client().get("/customers/1")
+
+        self.assertEqual(response.headers[QUERY_COUNT_HEADER], "2")  # cache version and the customer
+        self.assertGreaterEqual(float(response.headers[QUERY_TIME_HEADER]), 0)
+        record = next(record for record in logs.records if record.getMessage().startswith("db_queries"))
+        self.assertIn("method=GET path=/customers/1 status=200 queries=2", record.getMessage())
+        self.assertEqual(record.db_queries, 2)
+        self.assertEqual(str(record.db_ms), response.headers[QUERY_TIME_HEADER])
+
+    def test_failing_statements_leave_nothing_on_the_connection(self):
+        app = self._metrics_app(QUERY_METRICS_HEADERS=True)
+
+        with app.test_request_context(), db.engine.connect() as conn:
+            for _ in range(3):  # e.g. an IntegrityError the route expects and handles
+                with self.assertRaises(DBAPIError):
+                    conn.exec_driver_sql("SELECT * FROM no_such_table")
+            conn.exec_driver_sql("SELECT 1")
+            count, seconds = request_query_stats()
+            leftover = conn.info.get('db_query_started')
+
+        self.assertFalse(leftover)  # used to keep one start time per failed statement on the pooled connection
+        self.assertEqual(count, 1)  # only the statement that ran is counted
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_metrics_disabled_by_default_in_testing(self):
+        response = self.client.get("/inventory/")
+
+        self.assertNotIn(QUERY_COUNT_HEADER, response.headers)
+
+    def test_repeated_statement_logs_warning(self):
+        app = self._metrics_app(QUERY_REPEAT_THRESHOLD=1)
+        customer = self.create_customer()
+        parts = [self.create_inventory(name=f"Part {i}") for i in range(3)]
+        payload = {
+            "vin": "1HGCM82633A123456",
+            "service_date": "2024-01-01",
+            "service_desc": "Brakes",
+            "customer_id": customer.id,
+            "inventory": [{"inventory_id": part.id, "quantity": 1} for part in parts],
+        }
+
+        with self.assertLogs(app.logger, level="WARNING") as logs, contextlib.redirect_stdout(io.StringIO()):
+            with app.app_context():
+                app.test_client().post("/service_tickets/", json=payload)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].db_repeated_times, 3)  # one stock decrement per part
+        self.assertIn("db_repeated_statements method=POST path=/service_tickets/ times=3 statement=UPDATE inventory",
+                      logs.records[0].getMessage())
+
+    def test_statement_shape_ignores_whitespace_and_in_list_length(self):
+        self.assertEqual(
+            statement_shape("SELECT id FROM t\n  WHERE id IN (?, ?, ?) AND name = ?"),
+            statement_shape("SELECT id FROM t WHERE id IN (?) AND name = ?"),
+        )
+        self.assertEqual(statement_shape("SELECT * FROM t WHERE id IN (%s, %s)"), "SELECT * FROM t WHERE id IN (?)")
+        self.assertNotEqual(statement_shape("SELECT a FROM t"), statement_shape("SELECT b FROM t"))
@@ -0,0 +1,61 @@
+from unittest import mock
+
+import config
+from app.models import Base, Inventory, db
+from app.tests.test_base import APITestCase
+from app.utils import db_routing
+
+
+class TestReadReplica(APITestCase):
+    # primary is testing.db, the "replica" is a second SQLite file that never replicates,
+    # so the data a request sees tells which database answered it
+    def setUp(self):
+        binds = mock.patch.object(config.TestingConfig, "SQLALCHEMY_BINDS", {"replica": "sqlite:///testing_replica.db"})
+        binds.start()
+        self.addCleanup(binds.stop)
+        super().setUp()
+        self.replica = db.engines["replica"]
+        Base.metadata.drop_all(self.replica)
+        Base.metadata.create_all(self.replica)
+
+    def tearDown(self):
+        super().tearDown()
+        Base.metadata.drop_all(self.replica)
+        db.metadatas.pop("replica", None)  # init_app registered the bind on the shared db object
+
+    def add_replica_inventory(self, name):
+        with self.replica.begin() as conn:
+            conn.execute(Inventory.__table__.insert().values(name=name, price=1.0))
+
+    def test_get_requests_read_from_replica(self):
+        self.create_inventory(name="Primary Only")
+        self.add_replica_inventory("Replica Only")
+
+        # GET is served by the replica
+        response = self.client.get("/inventory/")
+
+        self.assertEqual([item["name"] for item in response.json], ["Replica Only"])
+
+    def test_writes_go_to_primary_and_client_sticks_to_primary(self):
+        self.add_replica_inventory("Replica Only")
+
+        # POST writes to the primary and sets the sticky cookie
+        response = self.client.post("/inventory/", json={"name": "Fresh Part", "price": 5.0})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(db.session.query(Inventory).count(), 1)  # outside a request: primary
+        self.assertIsNotNone(self.client.get_cookie(db_routing.STICKY_COOKIE))
+
+        # the writer reads its own write from the primary
+        self.assertEqual([item["name"] for item in self.client.get("/inventory/").json], ["Fresh Part"])
+
+        # once the window has passed, reads go back to the replica
+        with mock.patch.object(db_routing.time, "time", return_value=10**12):
+            response = self.client.get("/inventory/")
+        self.assertEqual([item["name"] for item in response.json], ["Replica Only"])
+
+    def test_failed_write_does_not_stick(self):
+        # invalid payloads never reach the database
+        response = self.client.post("/inventory/", json={"name": "Bad", "price": "invalid"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(self.client.get_cookie(db_routing.STICKY_COOKIE))
@@ -0,0 +1,87 @@
+from datetime import date
+
+from sqlalchemy import insert
+
+from app.models import ServiceTicket, db
+from app.tests.test_base import APITestCase
+
+
+class TestSearch(APITestCase):
+    def test_search_ranks_tickets_and_inventory(self):
+        customer = self.create_customer()
+        loose = self.create_service_ticket(
+            customer=customer, vin="VINLOOSE",
+            service_desc="Customer reports squeal at low speed, checked brake fluid, rotated tires and topped up washer fluid",
+        )
+        close = self.create_service_ticket(customer=customer, vin="VINCLOSE", service_desc="Brake squeal, replaced brake pads")
+        self.create_service_ticket(customer=customer, vin="VINOTHER", service_desc="Timing belt replacement")
+        pads = self.create_inventory(name="Brake Pads")
+        self.create_inventory(name="Timing Belt")
+
+        # every word must match, the closer description ranks first
+        response = self.client.get("/search/?q=brake squeal")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t["id"] for t in response.json["service_tickets"]], [close.id, loose.id])
+        self.assertEqual(response.json["service_tickets"][0]["vin"], "VINCLOSE")
+        self.assertEqual(response.json["inventory"], [])
+
+        response = self.client.get("/search/?q=BRAKE")
+        self.assertEqual([i["id"] for i in response.json["inventory"]], [pads.id])
+
+    def test_search_ranks_every_match_not_only_the_newest(self):
+        customer = self.create_customer()
+        best = self.create_service_ticket(customer=customer, vin="VINBEST", service_desc="Brake brake brake")
+        db.session.execute(insert(ServiceTicket), [
+            {"vin": f"VIN{i}", "service_date": date(2024, 1, 1), "customer_id": customer.id,
+             "service_desc": f"Brake checked during inspection, note {i} with several more filler words"}
+            for i in range(1500)
+        ])
+        db.session.commit()
+
+        # the oldest ticket is the closest match, even with 1500 newer ones
+        response = self.client.get("/search/?q=brake&limit=1")
+
+        self.assertEqual([t["id"] for t in response.json["service_tickets"]], [best.id])
+
+    def test_search_index_follows_api_writes(self):
+        customer = self.create_customer()
+        part = self.create_inventory(name="Oil Filter")
+        bulk = self.client.post("/service_tickets/bulk", json=[
+            {"vin": "VINBULK", "service_date": "2024-01-01", "service_desc": "Alternator whine", "customer_id": customer.id},
+        ])
+        ticket_id = bulk.json["service_ticket_ids"][0]
+
+        # bulk inserts are indexed
+        self.assertEqual(len(self.client.get("/search/?q=alternator").json["service_tickets"]), 1)
+
+        # renamed inventory is found under its new name only
+        self.client.put(f"/inventory/{part.id}", json={"name": "Air Filter", "price": 5.0})
+        self.assertEqual(self.client.get("/search/?q=oil").json["inventory"], [])
+        self.assertEqual(len(self.client.get("/search/?q=air filter").json["inventory"]), 1)
+
+        # deleted rows drop out of the index
+        self.client.delete(f"/service_tickets/{ticket_id}")
+        self.client.delete(f"/inventory/{part.id}")
+        response = self.client.get("/search/?q=alternator")
+        self.assertEqual(response.json["service_tickets"], [])
+        self.assertEqual(self.client.get("/search/?q=filter").json["inventory"], [])
+
+    def test_search_limit_and_operators_in_query(self):
+        customer = self.create_customer()
+        for day in range(1, 4):
+            self.create_service_ticket(
+                customer=customer, vin=f"VIN{day}", service_date=date(2024, 1, day), service_desc="Oil change"
+            )
+
+        # quotes, parentheses and wildcards in the text are treated as plain words
+        response = self.client.get('/search/?q="oil" (change*)&limit=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json["service_tickets"]), 2)
+
+    def test_search_invalid_query_returns_400(self):
+        # missing q, q without words, and an out of range limit are rejected
+        for args in ["", "q=!!!", "q=oil&limit=0"]:
+            response = self.client.get(f"/search/?{args}")
+            self.assertEqual(response.status_code, 400, args)
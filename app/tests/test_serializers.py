@@ -0,0 +1,81 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+
+from sqlalchemy import select
+
+from app import create_app
+from app.blueprints.customers.schemas import customer_schema, customers_schema, login_schema
+from app.blueprints.inventory.schemas import inventory_many_schema, inventory_schema
+from app.blueprints.mechanics.schemas import mechanic_schema, mechanics_schema
+from app.blueprints.service_tickets.schemas import ticket_load_options, ticket_return_schema, tickets_return_schema
+from app.extensions import ORJSONProvider
+from app.models import Inventory, Mechanic, ServiceTicket, db
+from app.tests.test_base import APITestCase
+from app.utils.serializers import CompiledDumpMixin
+
+
+def marshmallow_dump(schema, obj, many=None):  # the schema's output with compilation switched off
+    with mock.patch.object(CompiledDumpMixin, "compiled_dumper", return_value=None):
+        return schema.dump(obj, many=many)
+
+
+class TestSerializers(APITestCase):
+    def test_hot_schemas_are_compiled(self):
+        for schema in [ticket_return_schema, customer_schema, mechanic_schema, inventory_schema, login_schema]:
+            self.assertIsNotNone(schema.compiled_dumper(), type(schema).__name__)
+
+    def test_compiled_dump_matches_marshmallow(self):
+        customer = self.create_customer()
+        mechanic = self.create_mechanic()
+        ticket = self.create_service_ticket(
+            customer=customer,
+            mechanics=[mechanic, self.create_mechanic(name="Second", email="second@example.com")],
+            inventory_items=[(self.create_inventory(), 2), (self.create_inventory(name="Rotor", price=80), 1)],
+        )
+        self.create_service_ticket(customer=customer, vin="EMPTY")  # no mechanics or parts
+        tickets = db.session.execute(select(ServiceTicket).options(*ticket_load_options)).scalars().all()
+
+        cases = [
+            (ticket_return_schema, ticket),
+            (tickets_return_schema, tickets),
+            (customer_schema, customer),
+            (customers_schema, [customer]),
+            (login_schema, customer),
+            (mechanic_schema, mechanic),
+            (mechanics_schema, db.session.query(Mechanic).all()),
+            (inventory_schema, db.session.query(Inventory).first()),
+            (inventory_many_schema, db.session.query(Inventory).all()),
+        ]
+        for schema, obj in cases:
+            self.assertEqual(schema.dump(obj), marshmallow_dump(schema, obj), type(schema).__name__)
+            self.assertEqual(list(schema.dump(obj)), list(marshmallow_dump(schema, obj)))  # same key order
+
+    def test_compiled_dump_matches_marshmallow_for_unusual_values(self):
+        # None columns, Decimal prices, datetimes in date fields, bytes in string fields
+        ticket = ServiceTicket(vin=b"BYTESVIN", service_date=datetime(2024, 5, 1, 9, 30), service_desc=None)
+        ticket.mechanics = [Mechanic(id=3, name=None)]
+        inventory = Inventory(id=7, name="Gasket", price=Decimal("12.50"))
+
+        self.assertEqual(ticket_return_schema.dump(ticket), marshmallow_dump(ticket_return_schema, ticket))
+        self.assertEqual(inventory_schema.dump(inventory), marshmallow_dump(inventory_schema, inventory))
+        self.assertEqual(inventory_schema.dump(inventory)["price"], 12.5)
+        self.assertEqual(ticket_return_schema.dump(ticket)["service_date"], "2024-05-01")
+
+    def test_dict_input_uses_marshmallow(self):
+        data = {"id": 1, "name": "Oil", "price": 3}
+
+        self.assertEqual(inventory_schema.dump(data), {"id": 1, "name": "Oil", "price": 3.0})
+        self.assertEqual(inventory_many_schema.dump([data]), [{"id": 1, "name": "Oil", "price": 3.0}])
+
+    def test_orjson_provider_matches_default_provider(self):
+        self.assertIsInstance(self.app.json, ORJSONProvider)
+        payload = {"b": [1, 2.5, None, "é"], "a": {"nested": True}, "when": date(2024, 1, 2), "price": Decimal("1.10")}
+
+        with mock.patch("config.TestingConfig.USE_ORJSON", False):
+            default_json = create_app("TestingConfig").json
+        self.assertNotIsInstance(default_json, ORJSONProvider)
+
+        self.assertEqual(json.loads(self.app.json.dumps(payload)), json.loads(default_json.dumps(payload)))
+        self.assertEqual(self.app.json.dumps(payload, indent=2), default_json.dumps(payload, indent=2, ensure_ascii=False))
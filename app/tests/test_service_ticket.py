@@ -1,4 +1,14 @@
-from app.models import ServiceTicket, db
+import base64
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy import event, text
+
+from app.blueprints.service_tickets.routes import build_ticket_search
+from app.models import Inventory, ServiceTicket, service_mechanic, db
 from app.tests.test_base import APITestCase
 
 
@@ -44,6 +54,51 @@ class TestServiceTicket(APITestCase):
             tickets = db.session.query(ServiceTicket).all()
             self.assertEqual(len(tickets), 0)
 
+    def test_create_service_ticket_collapses_duplicate_inventory(self):
+        customer = self.create_customer()
+        inventory = self.create_inventory()
+        payload = {
+            "vin": "1HGCM82633A123401",
+            "service_date": "2024-03-01",
+            "service_desc": "Brake job",
+            "customer_id": customer.id,
+            "inventory": [
+                {"inventory_id": inventory.id, "quantity": 2},
+                {"inventory_id": inventory.id, "quantity": 3},
+            ],
+        }
+
+        # Repeated inventory ids become a single line item with the summed quantity
+        response = self.client.post("/service_tickets/", json=payload)
+
+        self.assertEqual(response.status_code, 201)
+        service_inventory = response.json["service_ticket"]["service_inventory"]
+        self.assertEqual(len(service_inventory), 1)
+        self.assertEqual(service_inventory[0]["quantity"], 5)
+
+    def test_create_service_ticket_reports_every_missing_inventory_id(self):
+        customer = self.create_customer()
+        inventory = self.create_inventory()
+        payload = {
+            "vin": "1HGCM82633A123402",
+            "service_date": "2024-03-01",
+            "service_desc": "Alignment",
+            "customer_id": customer.id,
+            "inventory": [
+                {"inventory_id": 998, "quantity": 1},
+                {"inventory_id": inventory.id, "quantity": 1},
+                {"inventory_id": 999, "quantity": 1},
+            ],
+        }
+
+        with self.count_queries() as queries:
+            response = self.client.post("/service_tickets/", json=payload)
+
+        # All unknown ids are reported together after a single lookup
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["error"], "Invalid inventory IDs: [998, 999]")
+        self.assertEqual(len(queries), 1)
+
     def test_get_all_service_tickets_returns_list(self):
         customer = self.create_customer()
         self.create_service_ticket(
@@ -59,6 +114,95 @@ class TestServiceTicket(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json), 2)
 
+    def test_get_service_tickets_paginates_by_service_date(self):
+        customer = self.create_customer()
+        late = self.create_service_ticket(
+            customer=customer, vin="1HGCM82633A000014", service_date=date(2024, 5, 1)
+        )
+        early = self.create_service_ticket(
+            customer=customer, vin="1HGCM82633A000015", service_date=date(2024, 2, 1)
+        )
+
+        # first page holds the earliest ticket, the cursor leads to the next one
+        first_page = self.client.get("/service_tickets/?per_page=1")
+        self.assertEqual([t["id"] for t in first_page.json], [early.id])
+
+        cursor = first_page.headers["X-Next-Cursor"]
+        second_page = self.client.get(f"/service_tickets/?per_page=1&cursor={cursor}")
+        self.assertEqual([t["id"] for t in second_page.json], [late.id])
+        self.assertNotIn("X-Next-Cursor", second_page.headers)
+
+    def test_list_service_tickets_rejects_out_of_range_cursor(self):
+        self.create_service_ticket()
+
+        for raw in ['["2024-01-01", 1e999]', '["2024-01-01", 99999999999999999999999]', '["2024-01-01", NaN]']:
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            response = self.client.get(f"/service_tickets/?cursor={cursor}")
+            self.assertEqual(response.status_code, 400, raw)
+            self.assertEqual(response.json, {"error": "Invalid pagination parameters."})
+
+    def test_search_service_tickets_by_each_filter(self):
+        alice = self.create_customer()
+        bob = self.create_customer(name="Bob", email="bob@example.com")
+        mechanic = self.create_mechanic()
+        part = self.create_inventory()
+        oil = self.create_service_ticket(customer=alice, vin="VINOIL", service_date=date(2024, 1, 10))
+        brakes = self.create_service_ticket(
+            customer=alice, vin="VINBRAKES", service_date=date(2024, 3, 5),
+            mechanics=[mechanic], inventory_items=[(part, 1)],
+        )
+        tires = self.create_service_ticket(customer=bob, vin="VINTIRES", service_date=date(2024, 6, 1))
+
+        # each filter, and a combination, returns only the matching tickets
+        searches = {
+            "vin=VINOIL": [oil.id],
+            f"customer_id={alice.id}": [oil.id, brakes.id],
+            f"mechanic_id={mechanic.id}": [brakes.id],
+            f"inventory_id={part.id}": [brakes.id],
+            "from=2024-02-01&to=2024-06-30": [brakes.id, tires.id],
+            f"customer_id={alice.id}&from=2024-02-01": [brakes.id],
+        }
+        for args, expected in searches.items():
+            response = self.client.get(f"/service_tickets/search?{args}")
+            self.assertEqual(response.status_code, 200, args)
+            self.assertEqual([t["id"] for t in response.json], expected, args)
+
+    def test_search_service_tickets_paginates_and_keeps_filters(self):
+        customer = self.create_customer()
+        first = self.create_service_ticket(customer=customer, vin="VINSAME", service_date=date(2024, 1, 1))
+        second = self.create_service_ticket(customer=customer, vin="VINSAME", service_date=date(2024, 2, 1))
+        self.create_service_ticket(customer=customer, vin="VINOTHER", service_date=date(2024, 1, 15))
+
+        # the next page link carries the vin filter along with the cursor
+        first_page = self.client.get("/service_tickets/search?vin=VINSAME&per_page=1")
+        self.assertEqual([t["id"] for t in first_page.json], [first.id])
+        self.assertIn("vin=VINSAME", first_page.headers["Link"])
+
+        cursor = first_page.headers["X-Next-Cursor"]
+        second_page = self.client.get(f"/service_tickets/search?vin=VINSAME&per_page=1&cursor={cursor}")
+        self.assertEqual([t["id"] for t in second_page.json], [second.id])
+        self.assertNotIn("X-Next-Cursor", second_page.headers)
+
+    def test_search_service_tickets_invalid_filters_return_400(self):
+        # no filter, an unknown filter, a bad id and a reversed date range are rejected
+        for args in ["", "color=red", "customer_id=abc", "from=2024-05-01&to=2024-01-01"]:
+            response = self.client.get(f"/service_tickets/search?{args}")
+            self.assertEqual(response.status_code, 400, args)
+
+    def test_search_filters_use_indexes(self):
+        filters = {
+            "vin": "VIN",
+            "customer_id": 1,
+            "mechanic_id": 1,
+            "inventory_id": 1,
+            "from_date": date(2024, 1, 1),
+        }
+        for name, value in filters.items():
+            query = build_ticket_search({name: value})
+            sql = str(query.compile(db.engine, compile_kwargs={"literal_binds": True}))
+            plan = " ".join(row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+            self.assertIn("USING INDEX", plan.replace("USING COVERING INDEX", "USING INDEX"), f"{name}: {plan}")
+
     def test_get_service_ticket_success(self):
         ticket = self.create_service_ticket(vin="1HGCM82633A000012")
 
@@ -107,6 +251,65 @@ class TestServiceTicket(APITestCase):
         mechanic_ids = [m["id"] for m in response.json["mechanics"]]
         self.assertCountEqual(mechanic_ids, [mech_one.id, mech_two.id])
 
+    def test_assign_mechanics_skips_assigned_and_unknown_ids(self):
+        mechanics = [
+            self.create_mechanic(name=f"Mech {i}", email=f"mech{i}@example.com")
+            for i in range(6)
+        ]
+        mechanic_ids = [m.id for m in mechanics]
+        ticket = self.create_service_ticket(mechanics=[mechanics[0]])
+        ticket_id = ticket.id
+        warm_up = self.create_service_ticket(vin="1HGCM82633A000099", customer=ticket.customer)
+        warm_up_id = warm_up.id
+
+        # the first assignment also creates the cache version row
+        self.client.put(
+            f"/service_tickets/{warm_up_id}/assign_mechanics",
+            json={"add_mechanics_ids": mechanic_ids[:1]},
+        )
+        with self.count_queries() as few:
+            self.client.put(
+                f"/service_tickets/{warm_up_id}/assign_mechanics",
+                json={"add_mechanics_ids": mechanic_ids[1:2]},
+            )
+
+        # ticket check, one mechanic lookup, one insert and the eager reload, however many ids are sent
+        with self.count_queries() as many:
+            response = self.client.put(
+                f"/service_tickets/{ticket_id}/assign_mechanics",
+                json={"add_mechanics_ids": mechanic_ids + [999]},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        assigned_ids = [m["id"] for m in response.json["mechanics"]]
+        self.assertCountEqual(assigned_ids, mechanic_ids)
+        self.assertEqual(len([q for q in many if "INTO service_mechanic" in q]), 1)
+        self.assertEqual(len(many), len(few))
+
+    def test_assign_mechanics_already_assigned_by_a_concurrent_request(self):
+        ticket = self.create_service_ticket()
+        mechanic = self.create_mechanic()
+        ticket_id, mechanic_id = ticket.id, mechanic.id
+
+        raced = []
+
+        def concurrent_assign(conn, cursor, statement, *args):  # lands between the lookup and the insert
+            if statement.startswith("INSERT INTO service_mechanic") and not raced:
+                raced.append(statement)
+                with db.engine.begin() as other:
+                    other.execute(service_mechanic.insert().values(ticket_id=ticket_id, mechanic_id=mechanic_id))
+
+        event.listen(db.engine, "before_cursor_execute", concurrent_assign)
+        try:
+            response = self.client.put(
+                f"/service_tickets/{ticket_id}/assign_mechanics", json={"add_mechanics_ids": [mechanic_id]}
+            )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", concurrent_assign)
+
+        self.assertEqual(response.status_code, 200)  # assigning is idempotent, the loser of the race is not a conflict
+        self.assertEqual([m["id"] for m in response.json["mechanics"]], [mechanic_id])
+
     def test_assign_mechanics_ticket_not_found_returns_404(self):
         payload = {"add_mechanics_ids": [1, 2]}
 
@@ -137,3 +340,303 @@ class TestServiceTicket(APITestCase):
         response = self.client.put("/service_tickets/999/remove_mechanics", json=payload)
 
         self.assertEqual(response.status_code, 404)
+
+    def test_get_all_service_tickets_query_count_is_constant(self):
+        customer = self.create_customer()
+        mechanic = self.create_mechanic()
+        inventory = self.create_inventory()
+        self.create_service_ticket(
+            customer=customer,
+            vin="1HGCM82633A000020",
+            mechanics=[mechanic],
+            inventory_items=[(inventory, 1)],
+        )
+        db.session.expire_all()
+        self.client.get("/service_tickets/")  # warm up the cached table versions
+
+        with self.count_queries() as few:
+            self.client.get("/service_tickets/")
+
+        for i in range(5):
+            self.create_service_ticket(
+                customer=customer,
+                vin=f"1HGCM82633A00003{i}",
+                mechanics=[mechanic],
+                inventory_items=[(inventory, 2)],
+            )
+        db.session.expire_all()
+
+        # Relationships are eager loaded, so more tickets must not mean more queries
+        with self.count_queries() as many:
+            response = self.client.get("/service_tickets/")
+
+        self.assertEqual(len(response.json), 6)
+        self.assertEqual(len(many), len(few))
+
+    def test_get_service_tickets_streams_json_array(self):
+        customer = self.create_customer()
+        for i in range(3):
+            self.create_service_ticket(customer=customer, vin=f"1HGCM82633A00004{i}")
+
+        # ?stream=1 returns the full collection as a streamed JSON array
+        response = self.client.get("/service_tickets/?stream=1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(len(response.json), 3)
+
+    def test_get_service_tickets_streams_ndjson(self):
+        customer = self.create_customer()
+        for i in range(3):
+            self.create_service_ticket(customer=customer, vin=f"1HGCM82633A00005{i}")
+
+        # NDJSON is chosen through the Accept header, one ticket per line
+        response = self.client.get(
+            "/service_tickets/", headers={"Accept": "application/x-ndjson"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["vin"], "1HGCM82633A000050")
+
+    def _bulk_payload(self, customer, mechanic, inventory, count):
+        return [
+            {
+                "vin": f"1HGCM82633A1{i:05d}",
+                "service_date": "2024-04-01",
+                "service_desc": f"Bulk service {i}",
+                "customer_id": customer.id,
+                "mechanic_ids": [mechanic.id],
+                "inventory": [{"inventory_id": inventory.id, "quantity": 1}],
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create_service_tickets(self):
+        customer = self.create_customer()
+        mechanic = self.create_mechanic()
+        inventory = self.create_inventory()
+
+        payload = self._bulk_payload(customer, mechanic, inventory, 20)
+
+        with self.count_queries() as queries:
+            response = self.client.post("/service_tickets/bulk", json=payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json["service_ticket_ids"]), 20)
+
+        # one IN lookup per referenced table and one multi-row insert per association table
+        bookkeeping = ("customer_summaries", "cache_versions")
+        selects = [q for q in queries if q.startswith("SELECT") and not any(table in q for table in bookkeeping)]
+        self.assertEqual(len(selects), 3)
+        self.assertEqual(len([q for q in queries if "INTO service_mechanic" in q]), 1)
+        self.assertEqual(len([q for q in queries if "INTO service_inventory" in q]), 1)
+
+        # the customer's summary row is looked up and written once for all 20 tickets
+        self.assertEqual(len([q for q in queries if "customer_summaries" in q]), 2)
+
+        ticket = db.session.get(ServiceTicket, response.json["service_ticket_ids"][-1])
+        self.assertEqual(ticket.vin, "1HGCM82633A100019")
+        self.assertEqual([m.id for m in ticket.mechanics], [mechanic.id])
+        self.assertEqual(ticket.service_inventory[0].quantity, 1)
+
+    def test_bulk_create_reports_item_errors_and_creates_nothing(self):
+        customer = self.create_customer()
+        mechanic = self.create_mechanic()
+        inventory = self.create_inventory()
+        payload = self._bulk_payload(customer, mechanic, inventory, 3)
+        del payload[0]["vin"]
+        payload[2]["inventory"] = [{"inventory_id": 999, "quantity": 1}]
+
+        response = self.client.post("/service_tickets/bulk", json=payload)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e["index"] for e in response.json["errors"]], [0, 2])
+        self.assertIn("vin", response.json["errors"][0]["errors"])
+        self.assertIn("inventory", response.json["errors"][1]["errors"])
+        self.assertEqual(db.session.query(ServiceTicket).count(), 0)
+
+    def test_get_service_tickets_conditional_get(self):
+        mechanic = self.create_mechanic()
+        mechanic_id = mechanic.id
+        ticket = self.create_service_ticket()
+        ticket_id = ticket.id
+
+        etag = self.client.get("/service_tickets/").headers["ETag"]
+        cached = self.client.get("/service_tickets/", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+
+        # assigning a mechanic changes the ticket list, so the old ETag no longer matches
+        self.client.put(
+            f"/service_tickets/{ticket_id}/assign_mechanics",
+            json={"add_mechanics_ids": [mechanic_id]},
+        )
+        response = self.client.get("/service_tickets/", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]["mechanics"][0]["id"], mechanic_id)
+
+    def test_get_service_ticket_invoice(self):
+        customer = self.create_customer()
+        wiper = self.create_inventory(name="Wiper", price=0.1)
+        pads = self.create_inventory(name="Pads", price=19.99)
+        ticket = self.create_service_ticket(customer=customer, inventory_items=[(wiper, 3), (pads, 3)])
+
+        response = self.client.get(f"/service_tickets/{ticket.id}/invoice")
+
+        # 3 x 0.1 is exactly 0.30 and the total exactly 60.27, no float drift
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["lines"], [
+            {"inventory_id": wiper.id, "name": "Wiper", "quantity": 3, "unit_price": 0.1, "line_total": 0.3},
+            {"inventory_id": pads.id, "name": "Pads", "quantity": 3, "unit_price": 19.99, "line_total": 59.97},
+        ])
+        self.assertEqual(response.json["total"], 60.27)
+        self.assertEqual(response.json["service_date"], "2024-01-01")
+        self.assertEqual(self.client.get("/service_tickets/999/invoice").status_code, 404)
+
+    def test_get_service_ticket_invoices_batch(self):
+        customer = self.create_customer()
+        part = self.create_inventory(price=12.5)
+        first = self.create_service_ticket(customer=customer, inventory_items=[(part, 2)])
+        empty = self.create_service_ticket(customer=customer, vin="EMPTY")  # no parts
+
+        with self.count_queries() as queries:
+            response = self.client.get(f"/service_tickets/invoices?ids={empty.id},999,{first.id}")
+
+        # every invoice comes from one aggregate query, in the requested order
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in queries if "service_inventory" in q]), 1)
+        self.assertEqual([invoice["ticket_id"] for invoice in response.json["invoices"]], [empty.id, first.id])
+        self.assertEqual(response.json["invoices"][0]["lines"], [])
+        self.assertEqual(response.json["invoices"][0]["total"], 0.0)
+        self.assertEqual(response.json["invoices"][1]["total"], 25.0)
+        self.assertEqual(response.json["not_found"], [999])
+
+    def test_get_service_ticket_invoices_invalid_ids_returns_400(self):
+        for args in ["", "ids=", "ids=1,x", "ids=" + ",".join(str(i) for i in range(1001))]:
+            response = self.client.get(f"/service_tickets/invoices?{args}")
+            self.assertEqual(response.status_code, 400, args)
+
+    def _stock(self, inventory_id):
+        db.session.expire_all()
+        return db.session.get(Inventory, inventory_id).stock
+
+    def _ticket_payload(self, customer_id, inventory):
+        return {
+            "vin": "1HGCM82633A123456",
+            "service_date": "2024-01-01",
+            "service_desc": "Parts",
+            "customer_id": customer_id,
+            "inventory": inventory,
+        }
+
+    def test_create_service_ticket_reserves_stock(self):
+        customer = self.create_customer()
+        pads = self.create_inventory(name="Pads")
+        rotor = self.create_inventory(name="Rotor")
+        untracked = self.create_inventory(name="Shop rag")  # NULL stock, never reserved
+        pads.stock, rotor.stock = 5, 1
+        db.session.commit()
+        pads_id, rotor_id, untracked_id = pads.id, rotor.id, untracked.id
+
+        response = self.client.post("/service_tickets/", json=self._ticket_payload(customer.id, [
+            {"inventory_id": pads_id, "quantity": 2},
+            {"inventory_id": untracked_id, "quantity": 100},
+        ]))
+        self.assertEqual(response.status_code, 201)
+        ticket_id = response.json["service_ticket"]["id"]
+        self.assertEqual(self._stock(pads_id), 3)
+        self.assertIsNone(self._stock(untracked_id))
+
+        # one short part fails the whole ticket and releases the parts reserved before it
+        response = self.client.post("/service_tickets/", json=self._ticket_payload(customer.id, [
+            {"inventory_id": pads_id, "quantity": 1},
+            {"inventory_id": rotor_id, "quantity": 2},
+        ]))
+        self.assertEqual(response.status_code, 409)
+        self.assertIn(str([rotor_id]), response.json["error"])
+        self.assertEqual((self._stock(pads_id), self._stock(rotor_id)), (3, 1))
+        self.assertEqual(db.session.query(ServiceTicket).count(), 1)
+
+        # deleting the ticket puts its parts back
+        self.client.delete(f"/service_tickets/{ticket_id}")
+        self.assertEqual(self._stock(pads_id), 5)
+
+    def test_bulk_create_reserves_stock_for_the_whole_batch(self):
+        customer = self.create_customer()
+        part = self.create_inventory()
+        part.stock = 3
+        db.session.commit()
+        part_id = part.id
+
+        # 2 + 2 units exceed the 3 on hand, so no ticket of the batch is created
+        payload = [self._ticket_payload(customer.id, [{"inventory_id": part_id, "quantity": 2}])] * 2
+        response = self.client.post("/service_tickets/bulk", json=payload)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self._stock(part_id), 3)
+        self.assertEqual(db.session.query(ServiceTicket).count(), 0)
+
+        response = self.client.post("/service_tickets/bulk", json=payload[:1] + [self._ticket_payload(customer.id, [])])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._stock(part_id), 1)
+
+    def test_concurrent_ticket_creation_never_oversells(self):
+        customer = self.create_customer()
+        part = self.create_inventory()
+        part.stock = 25
+        db.session.commit()
+        customer_id, part_id = customer.id, part.id
+
+        def create_ticket(_):
+            client = self.app.test_client()
+            payload = self._ticket_payload(customer_id, [{"inventory_id": part_id, "quantity": 1}])
+            return client.post("/service_tickets/", json=payload).status_code
+
+        # 80 tickets from 8 threads race for 25 parts
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(create_ticket, range(80)))
+
+        self.assertEqual(statuses.count(201), 25)
+        self.assertEqual(statuses.count(409), 55)
+        self.assertEqual(self._stock(part_id), 0)
+        self.assertEqual(db.session.query(ServiceTicket).count(), 25)
+
+    def test_export_service_tickets_csv(self):
+        customer = self.create_customer(name="Jane, Esq.")  # comma is quoted in the CSV
+        mike = self.create_mechanic()
+        ann = self.create_mechanic(name="Ann", email="ann@example.com")
+        pads = self.create_inventory(name="Pads", price=19.99)
+        oil = self.create_inventory(name="Oil", price=5.0)
+        ticket = self.create_service_ticket(
+            customer=customer, service_date=date(2024, 3, 5), mechanics=[mike, ann], inventory_items=[(pads, 2), (oil, 1)]
+        )
+        bare = self.create_service_ticket(customer=customer, vin="BARE", service_date=date(2024, 3, 1))
+        self.create_service_ticket(customer=customer, vin="APRIL", service_date=date(2024, 4, 1))  # outside the range
+
+        with self.count_queries() as queries:
+            response = self.client.get("/service_tickets/export.csv?from=2024-03-01&to=2024-03-31")
+            streamed = response.is_streamed
+            body = response.get_data(as_text=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(streamed)
+        self.assertEqual(response.mimetype, "text/csv")
+        # customer, mechanics and parts come from the one export query
+        self.assertEqual(len([q for q in queries if "FROM service_tickets" in q]), 1)
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([int(row["ticket_id"]) for row in rows], [bare.id, ticket.id])
+        self.assertEqual(rows[0]["mechanics"], "")
+        self.assertEqual(rows[0]["parts_total"], "0.00")
+        self.assertEqual(rows[1]["customer_name"], "Jane, Esq.")
+        self.assertEqual(sorted(rows[1]["mechanics"].split("; ")), ["Ann", "Mike Mechanic"])
+        self.assertEqual(sorted(rows[1]["parts"].split("; ")), ["Oil x1", "Pads x2"])
+        self.assertEqual(rows[1]["parts_total"], "44.98")
+
+    def test_export_service_tickets_csv_invalid_range_returns_400(self):
+        for args in ["", "from=2024-01-01", "from=2024-02-01&to=2024-01-01", "from=x&to=2024-01-01"]:
+            response = self.client.get(f"/service_tickets/export.csv?{args}")
+            self.assertEqual(response.status_code, 400, args)
@@ -0,0 +1,213 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, insert, update, delete, func, case, or_, bindparam
+from sqlalchemy.exc import IntegrityError
+from app.models import Customer, CustomerSummary, ServiceTicket, ServiceInventory, Inventory, db
+
+# ======================================================================
+# CUSTOMER SUMMARY ROLLUPS
+# ======================================================================
+
+# customer_summaries holds ticket count, last service date and lifetime parts spend per
+# customer, so GET /customers/<id>/summary reads one row instead of aggregating tickets.
+# Every write that changes those numbers applies its delta here before its own commit:
+#   ticket create (single and bulk)  +tickets, +spend, newer last_service_date
+#   ticket delete                    -tickets, -spend, last_service_date recomputed
+#   inventory price change           spend moves by the price delta times quantities used
+# Parts spend is quantity * current inventory price, the same formula the rebuild uses.
+
+SUMMARY_BATCH_SIZE = 1000  # customers recomputed per transaction by the rebuild
+
+summaries = CustomerSummary.__table__
+
+
+def ticket_spend(inventory_quantities, prices):  # {inventory_id: quantity} priced with {inventory_id: price}
+    return sum(quantity * prices[inventory_id] for inventory_id, quantity in inventory_quantities.items())
+
+
+def apply_summary_changes(changes):
+    """
+    Adds per-customer deltas to customer_summaries inside the caller's transaction.
+    changes maps customer_id -> (ticket delta, spend delta, newest service date or None).
+    Costs three statements however many customers are touched.
+    """
+    if not changes:
+        return
+
+    query = select(summaries.c.customer_id).where(summaries.c.customer_id.in_(changes))
+    existing = set(db.session.scalars(query))
+
+    missing = [customer_id for customer_id in changes if customer_id not in existing]
+    if missing:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(summaries), [_new_row(customer_id, changes[customer_id]) for customer_id in missing])
+        except IntegrityError:  # another worker created some of the rows first
+            _apply_one_by_one({customer_id: changes[customer_id] for customer_id in missing})
+
+    rows = [
+        {"b_customer_id": customer_id, "b_tickets": tickets, "b_spend": spend, "b_service_date": service_date}
+        for customer_id, (tickets, spend, service_date) in changes.items()
+        if customer_id in existing
+    ]
+    if rows:
+        db.session.execute(_delta_update(), rows)
+
+
+def _new_row(customer_id, change):
+    tickets, spend, service_date = change
+    return {"customer_id": customer_id, "ticket_count": tickets, "parts_spend": spend, "last_service_date": service_date}
+
+
+def _delta_update():
+    newest = bindparam("b_service_date", type_=summaries.c.last_service_date.type)
+    return (
+        update(summaries)
+        .where(summaries.c.customer_id == bindparam("b_customer_id"))
+        .values(
+            ticket_count=summaries.c.ticket_count + bindparam("b_tickets"),
+            parts_spend=summaries.c.parts_spend + bindparam("b_spend"),
+            last_service_date=case(
+                (or_(summaries.c.last_service_date.is_(None), summaries.c.last_service_date < newest), newest),
+                else_=summaries.c.last_service_date,
+            ),
+        )
+    )
+
+
+def _apply_one_by_one(changes):
+    for customer_id, (tickets, spend, service_date) in changes.items():
+        params = {"b_customer_id": customer_id, "b_tickets": tickets, "b_spend": spend, "b_service_date": service_date}
+        if db.session.execute(_delta_update(), params).rowcount:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(summaries).values(**_new_row(customer_id, (tickets, spend, service_date))))
+        except IntegrityError:  # another worker created the row first
+            db.session.execute(_delta_update(), params)
+
+
+def refresh_last_service_date(customer_ids):
+    """Recomputes last_service_date from the tickets left, e.g. after a delete. Uses the customer_id index."""
+    latest = (
+        select(func.max(ServiceTicket.service_date))
+        .where(ServiceTicket.customer_id == summaries.c.customer_id)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(summaries).where(summaries.c.customer_id.in_(customer_ids)).values(last_service_date=latest)
+    )
+
+
+def apply_price_changes(price_deltas):
+    """
+    Moves the parts spend of every customer who used the parts by price delta * quantity
+    used. price_deltas maps inventory_id -> price delta; one UPDATE for all of them.
+    """
+    price_deltas = {inventory_id: delta for inventory_id, delta in price_deltas.items() if delta}
+    if not price_deltas:
+        return
+    delta = case(price_deltas, value=ServiceInventory.inventory_id)
+    spend_change = (
+        select(func.sum(ServiceInventory.quantity * delta))
+        .join(ServiceTicket, ServiceTicket.id == ServiceInventory.ticket_id)
+        .where(ServiceInventory.inventory_id.in_(price_deltas))
+        .where(ServiceTicket.customer_id == summaries.c.customer_id)
+        .scalar_subquery()
+    )
+    customers = (
+        select(ServiceTicket.customer_id)
+        .join(ServiceInventory, ServiceInventory.ticket_id == ServiceTicket.id)
+        .where(ServiceInventory.inventory_id.in_(price_deltas))
+    )
+    db.session.execute(
+        update(summaries)
+        .where(summaries.c.customer_id.in_(customers))
+        .values(parts_spend=summaries.c.parts_spend + spend_change)
+    )
+
+
+# ======================================================================
+# REBUILD
+# ======================================================================
+
+def computed_summaries(conn, customer_ids):
+    """{customer_id: (ticket_count, last_service_date, parts_spend)} aggregated from the tickets themselves."""
+    tickets = conn.execute(
+        select(ServiceTicket.customer_id, func.count(), func.max(ServiceTicket.service_date))
+        .where(ServiceTicket.customer_id.in_(customer_ids))
+        .group_by(ServiceTicket.customer_id)
+    ).all()
+    spend = dict(conn.execute(
+        select(ServiceTicket.customer_id, func.sum(ServiceInventory.quantity * Inventory.price, type_=summaries.c.parts_spend.type))
+        .join(ServiceInventory, ServiceInventory.ticket_id == ServiceTicket.id)
+        .join(Inventory, Inventory.id == ServiceInventory.inventory_id)
+        .where(ServiceTicket.customer_id.in_(customer_ids))
+        .group_by(ServiceTicket.customer_id)
+    ).all())
+    return {customer_id: (count, latest, spend.get(customer_id) or 0) for customer_id, count, latest in tickets}
+
+
+def _drifted(stored, computed):
+    stored_count, stored_date, stored_spend = stored or (0, None, 0)
+    count, latest, spend = computed or (0, None, 0)
+    return (stored_count, stored_date, stored_spend) != (count, latest, spend)
+
+
+def rebuild_batch(conn, customer_ids, fix=True):
+    """
+    Compares the stored rollups of customer_ids with freshly aggregated values and, when fix
+    is set, rewrites the ones that drifted. Locks the stored rows first (on databases with
+    row locks) so incremental updates for these customers wait for the batch. Returns the
+    drifted customer ids.
+    """
+    stored = {
+        row.customer_id: (row.ticket_count, row.last_service_date, row.parts_spend)
+        for row in conn.execute(
+            select(summaries).where(summaries.c.customer_id.in_(customer_ids)).with_for_update()
+        )
+    }
+    computed = computed_summaries(conn, customer_ids)
+    drifted = [customer_id for customer_id in customer_ids if _drifted(stored.get(customer_id), computed.get(customer_id))]
+
+    if fix and drifted:
+        conn.execute(delete(summaries).where(summaries.c.customer_id.in_(drifted)))
+        rows = [
+            {"customer_id": customer_id, "ticket_count": count, "last_service_date": latest, "parts_spend": spend}
+            for customer_id, (count, latest, spend) in computed.items()
+            if customer_id in drifted
+        ]
+        if rows:
+            conn.execute(insert(summaries), rows)
+    return drifted
+
+
+def next_customer_ids(conn, after_id, batch_size=SUMMARY_BATCH_SIZE):  # keyset walk over customers.id
+    return conn.execute(
+        select(Customer.id).where(Customer.id > after_id).order_by(Customer.id).limit(batch_size)
+    ).scalars().all()
+
+
+def rebuild_summaries(engine, batch_size=SUMMARY_BATCH_SIZE, fix=True):
+    """Checks every customer's rollup, one transaction per batch. Returns (customers checked, drifted ids)."""
+    checked, drifted, last_id = 0, [], 0
+    while True:
+        with engine.begin() as conn:
+            customer_ids = next_customer_ids(conn, last_id, batch_size)
+            if not customer_ids:
+                return checked, drifted
+            drifted.extend(rebuild_batch(conn, customer_ids, fix))
+        checked += len(customer_ids)
+        last_id = customer_ids[-1]
+
+
+@click.command("customer-summary-rebuild")
+@click.option("--batch-size", default=SUMMARY_BATCH_SIZE, show_default=True, help="Customers per transaction.")
+@click.option("--check", is_flag=True, help="Only report drift, do not rewrite rows.")
+@with_appcontext
+def rebuild_command(batch_size, check):  # flask --app flask_app customer-summary-rebuild [--check]
+    checked, drifted = rebuild_summaries(db.engine, batch_size, fix=not check)
+    click.echo(f"Checked {checked} customers, {len(drifted)} drifted.")
+    if drifted:
+        shown = ", ".join(str(customer_id) for customer_id in drifted[:20])
+        click.echo(f"{'Drifted' if check else 'Rebuilt'} customer ids: {shown}{' ...' if len(drifted) > 20 else ''}")
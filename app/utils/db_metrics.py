@@ -0,0 +1,85 @@
+from collections import Counter
+import re
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+QUERY_COUNT_HEADER = 'X-DB-Query-Count'
+QUERY_TIME_HEADER = 'X-DB-Time-Ms'
+
+# placeholder lists such as IN (?, ?, ?) or VALUES (%s, %s), which vary with the number of ids
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """SQL text with whitespace collapsed and placeholder lists reduced to (?), so repeats of one query compare equal."""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def most_repeated(statements):  # (shape, times run) of the statement run most often, or (None, 0)
+    shapes = Counter(statement_shape(statement) for statement in statements)
+    return shapes.most_common(1)[0] if shapes else (None, 0)
+
+
+def request_query_stats():  # (statements, seconds in the database) for the current request so far
+    return g.get('db_query_count', 0), g.get('db_query_seconds', 0.0)
+
+
+def init_query_metrics(app, db):
+    """
+    Counts the SQL statements each request runs and the time spent in the database, from
+    engine cursor events. QUERY_METRICS_HEADERS adds X-DB-Query-Count and X-DB-Time-Ms to
+    responses, QUERY_METRICS_LOG logs a db_queries line per request (the numbers are also
+    passed as log record fields), and QUERY_REPEAT_THRESHOLD logs a warning when one
+    statement shape runs more than that many times in a request, the sign of an N+1
+    (0 disables it). Statements run while a streamed body is generated are not counted.
+    """
+    headers = app.config.get('QUERY_METRICS_HEADERS', False)
+    log = app.config.get('QUERY_METRICS_LOG', False)
+    repeat_threshold = app.config.get('QUERY_REPEAT_THRESHOLD', 0)
+    if not (headers or log or repeat_threshold):
+        return
+
+    # the start time lives on the execution context, which is dropped with the statement even when it fails
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            context._db_query_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_db_query_started', None)
+        if started is None or not has_request_context():
+            return
+        g.db_query_seconds = g.get('db_query_seconds', 0.0) + time.perf_counter() - started
+        g.db_query_count = g.get('db_query_count', 0) + 1
+        if repeat_threshold:
+            g.setdefault('db_statements', []).append(statement)
+
+    with app.app_context():
+        for engine in db.engines.values():  # the primary and the read replica, if any
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.after_request
+    def report_query_stats(response):
+        count, seconds = request_query_stats()
+        fields = {'db_queries': count, 'db_ms': round(seconds * 1000, 2)}
+        if headers:
+            response.headers[QUERY_COUNT_HEADER] = str(count)
+            response.headers[QUERY_TIME_HEADER] = str(fields['db_ms'])
+        if log:
+            app.logger.info(
+                f"db_queries method={request.method} path={request.path} status={response.status_code} "
+                f"queries={count} db_ms={fields['db_ms']}",
+                extra=fields,
+            )
+        if repeat_threshold:
+            shape, times = most_repeated(g.get('db_statements', []))
+            if times > repeat_threshold:
+                app.logger.warning(
+                    f"db_repeated_statements method={request.method} path={request.path} "
+                    f"times={times} statement={shape[:200]}",
+                    extra={**fields, 'db_repeated_times': times, 'db_repeated_statement': shape},
+                )
+        return response
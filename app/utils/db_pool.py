@@ -0,0 +1,79 @@
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait to check out a connection.
+    Use it through SQLALCHEMY_ENGINE_OPTIONS = {"poolclass": InstrumentedQueuePool, ...}.
+    """
+
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"  # not a child of the Flask "app" logger
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self._reset_wait_stats()
+
+    def _reset_wait_stats(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def take_wait_stats(self):  # wait stats since the last call
+        with self._wait_lock:
+            stats = (self.checkouts, self.wait_total, self.wait_max)
+            self._reset_wait_stats()
+        return stats
+
+
+def pool_stats(engine):
+    """Connection pool snapshot: checked out, idle, overflow, and checkout wait times in ms."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),  # negative while the pool is still filling up
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        checkouts, wait_total, wait_max = pool.take_wait_stats()
+        stats.update({
+            "checkouts": checkouts,
+            "wait_ms_total": round(wait_total * 1000, 2),
+            "wait_ms_max": round(wait_max * 1000, 2),
+        })
+    return stats
+
+
+def init_pool_logging(app, db):
+    """Logs a pool_stats line at most every DB_POOL_LOG_INTERVAL seconds (0 disables it)."""
+    interval = app.config.get('DB_POOL_LOG_INTERVAL', 0)
+    if not interval:
+        return
+
+    state = {"last_logged": time.monotonic()}
+
+    @app.after_request
+    def log_pool_stats(response):
+        now = time.monotonic()
+        if now - state["last_logged"] >= interval:
+            state["last_logged"] = now
+            stats = pool_stats(db.engine)
+            app.logger.info("db_pool " + " ".join(f"{key}={value}" for key, value in stats.items()))
+        return response
@@ -0,0 +1,57 @@
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+import time
+
+REPLICA_BIND = 'replica'  # SQLALCHEMY_BINDS key of the read replica
+STICKY_COOKIE = 'db_primary_until'  # set after a write, keeps the client's reads on the primary
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def use_replica():  # True while the current request reads from the replica
+    return has_request_context() and g.get('db_read_replica', False)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of read-only requests to the replica bind.
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase) and use_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_read_replica(app):
+    """
+    Routes GET/HEAD/OPTIONS requests to the replica when SQLALCHEMY_BINDS has one.
+    After a successful write the client gets a cookie that keeps its reads on the primary
+    for READ_REPLICA_STICKY_SECONDS, so it always sees its own writes.
+    """
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    sticky_seconds = app.config['READ_REPLICA_STICKY_SECONDS']
+
+    @app.before_request
+    def choose_database():
+        try:
+            primary_until = float(request.cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            primary_until = 0
+        g.db_read_replica = request.method in READ_ONLY_METHODS and primary_until <= time.time()
+
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in READ_ONLY_METHODS and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + sticky_seconds),
+                max_age=sticky_seconds,
+                httponly=True,
+            )
+        return response
@@ -0,0 +1,109 @@
+from sqlalchemy import column, event, func, inspect, literal_column, select, table, text
+from sqlalchemy.dialects.mysql import match
+import re
+
+# ======================================================================
+# FULL-TEXT SEARCH
+# ======================================================================
+
+# One full-text index per (table, column), built with each database's own facility:
+#   SQLite      FTS5 external-content table <table>_fts, kept in sync by triggers
+#   MySQL       FULLTEXT index, maintained by InnoDB
+#   PostgreSQL  GIN index on to_tsvector('english', column)
+# The index lives in the database, so every write path (ORM, bulk insert, raw SQL) keeps it
+# in sync. install_fulltext() hooks it into create_all()/drop_all(); migrations call
+# create_fulltext() for databases that already exist.
+
+TS_CONFIG = 'english'  # PostgreSQL text search configuration
+
+
+def search_terms(q):  # words of a user query; punctuation and search operators are dropped
+    return re.findall(r"\w+", q)
+
+
+def _fts_table(table_name):
+    return f"{table_name}_fts"
+
+
+def create_fulltext(conn, table_name, column_name):
+    """Creates the full-text index for table.column if missing and indexes existing rows."""
+    dialect = conn.dialect.name
+    fts = _fts_table(table_name)
+
+    if dialect == 'sqlite':
+        if inspect(conn).has_table(fts):
+            return
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({column_name}, content='{table_name}', content_rowid='id')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column_name}) VALUES (new.id, new.{column_name}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column_name}) VALUES ('delete', old.id, old.{column_name}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {column_name} ON {table_name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column_name}) VALUES ('delete', old.id, old.{column_name}); "
+            f"INSERT INTO {fts}(rowid, {column_name}) VALUES (new.id, new.{column_name}); END"
+        ))
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))  # index rows that already exist
+
+    elif dialect in ('mysql', 'mariadb'):
+        if fts not in {index['name'] for index in inspect(conn).get_indexes(table_name)}:
+            conn.execute(text(f"CREATE FULLTEXT INDEX {fts} ON {table_name} ({column_name})"))
+
+    elif dialect == 'postgresql':
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {fts} ON {table_name} "
+            f"USING GIN (to_tsvector('{TS_CONFIG}', {column_name}))"
+        ))
+
+
+def drop_fulltext(conn, table_name):  # MySQL/PostgreSQL indexes go away with the table
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text(f"DROP TABLE IF EXISTS {_fts_table(table_name)}"))
+
+
+def install_fulltext(table, column_name):
+    """Builds the full-text index whenever create_all() creates the table, drops it with the table."""
+    event.listen(table, "after_create", lambda target, connection, **kw: create_fulltext(connection, target.name, column_name))
+    event.listen(table, "before_drop", lambda target, connection, **kw: drop_fulltext(connection, target.name))
+
+
+def fulltext_search(model, search_column, q, dialect):
+    """
+    select(model) of the rows whose search_column contains every word of q, best match first.
+    Every match is scored before the caller's LIMIT applies, so an old ticket that matches
+    better still outranks newer ones. Ranking is the database's own: bm25 on SQLite, MATCH
+    relevance on MySQL, ts_rank on PostgreSQL.
+    """
+    terms = search_terms(q)
+    table_name = model.__table__.name
+
+    if dialect == 'sqlite':
+        fts = table(_fts_table(table_name), column('rowid'))
+        fts_match = ' '.join(f'"{term}"' for term in terms)  # quoted terms: implicit AND, no FTS5 operators
+        candidates = (
+            select(fts.c.rowid.label('id'), (-func.bm25(literal_column(fts.name))).label('score'))  # lower bm25 is better
+            .where(literal_column(fts.name).op('MATCH')(fts_match))
+        )
+    elif dialect in ('mysql', 'mariadb'):
+        relevance = match(search_column, against=' '.join(f'+{term}' for term in terms)).in_boolean_mode()
+        candidates = select(model.id.label('id'), relevance.label('score')).where(relevance > 0)
+    elif dialect == 'postgresql':
+        ts_config = literal_column(f"'{TS_CONFIG}'")  # inlined so the expression matches the GIN index
+        vector = func.to_tsvector(ts_config, search_column)
+        tsquery = func.plainto_tsquery(ts_config, ' '.join(terms))
+        candidates = select(model.id.label('id'), func.ts_rank(vector, tsquery).label('score')).where(vector.bool_op('@@')(tsquery))
+    else:
+        raise NotImplementedError(f"No full-text search for {dialect}")
+
+    candidates = candidates.subquery()
+    return (
+        select(model)
+        .join(candidates, candidates.c.id == model.id)
+        .order_by(candidates.c.score.desc(), model.id)
+    )
@@ -0,0 +1,139 @@
+from limits.storage import MovingWindowSupport, Storage
+from sqlalchemy import delete, func, insert, select, update, case, text
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app.models import RateLimitCounter, RateLimitEntry, db
+import time
+
+counters = RateLimitCounter.__table__
+entries = RateLimitEntry.__table__
+
+
+class DatabaseStorage(Storage, MovingWindowSupport):
+    """
+    Rate limit storage kept in the app's own database, so every gunicorn worker shares
+    the same counters. Enable with RATELIMIT_STORAGE_URI = "database://".
+
+    Each call runs in its own short transaction on the primary engine, separate from
+    db.session. Expired rows are deleted at most every cleanup_interval seconds
+    (RATELIMIT_STORAGE_OPTIONS) by whichever request comes next.
+    """
+
+    STORAGE_SCHEME = ["database"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, cleanup_interval=60, **options):
+        self.cleanup_interval = cleanup_interval
+        self._next_cleanup = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return SQLAlchemyError
+
+    # ======================================================================
+    # FIXED WINDOW
+    # ======================================================================
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        with db.engine.begin() as conn:
+            self._incr_counter(conn, key, now + expiry, amount)
+            return conn.execute(select(counters.c.count).where(counters.c.key == key)).scalar_one()
+
+    def get(self, key):
+        query = select(counters.c.count).where(counters.c.key == key, counters.c.expires_at > time.time())
+        with db.engine.connect() as conn:
+            return conn.execute(query).scalar_one_or_none() or 0
+
+    def get_expiry(self, key):
+        query = select(counters.c.expires_at).where(counters.c.key == key)
+        with db.engine.connect() as conn:
+            return conn.execute(query).scalar_one_or_none() or time.time()
+
+    # ======================================================================
+    # MOVING WINDOW
+    # ======================================================================
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+
+        now = time.time()
+        with db.engine.begin() as conn:
+            # locking the key's counter row serializes concurrent hits from every worker
+            self._lock_key(conn, key, now + expiry)
+            used = conn.execute(
+                select(func.count()).where(entries.c.key == key, entries.c.created_at > now - expiry)
+            ).scalar_one()
+            if used + amount > limit:
+                return False
+
+            conn.execute(insert(entries), [{"key": key, "created_at": now, "expires_at": now + expiry}] * amount)
+
+        self._cleanup(now)
+        return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        query = (
+            select(func.min(entries.c.created_at), func.count())
+            .where(entries.c.key == key, entries.c.created_at > now - expiry)
+        )
+        with db.engine.connect() as conn:
+            oldest, used = conn.execute(query).one()
+        return (oldest or now), used
+
+    # ======================================================================
+    # MAINTENANCE
+    # ======================================================================
+
+    def check(self):
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def reset(self):
+        with db.engine.begin() as conn:
+            cleared = conn.execute(delete(counters)).rowcount
+            conn.execute(delete(entries))
+        return cleared
+
+    def clear(self, key):
+        with db.engine.begin() as conn:
+            conn.execute(delete(counters).where(counters.c.key == key))
+            conn.execute(delete(entries).where(entries.c.key == key))
+
+    def _incr_counter(self, conn, key, expires_at, amount):  # restarts the window once the counter expired
+        live = counters.c.expires_at > time.time()
+        query = update(counters).where(counters.c.key == key).values(
+            count=case((live, counters.c.count + amount), else_=amount),
+            expires_at=case((live, counters.c.expires_at), else_=expires_at),
+        )
+        self._upsert_counter(conn, query, {"key": key, "count": amount, "expires_at": expires_at})
+
+    def _lock_key(self, conn, key, expires_at):
+        """
+        Takes the row lock on the key's counter (the write lock on SQLite) until the
+        transaction ends, and keeps the row alive as long as the newest window entry.
+        """
+        query = update(counters).where(counters.c.key == key).values(expires_at=expires_at)
+        self._upsert_counter(conn, query, {"key": key, "count": 0, "expires_at": expires_at})
+
+    def _upsert_counter(self, conn, query, row):
+        if conn.execute(query).rowcount:
+            return
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(counters).values(**row))
+        except IntegrityError:  # another worker created the row first
+            conn.execute(query)
+
+    def _cleanup(self, now):  # periodic eviction of expired keys and window entries
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + self.cleanup_interval
+        with db.engine.begin() as conn:
+            conn.execute(delete(entries).where(entries.c.expires_at <= now))
+            conn.execute(delete(counters).where(counters.c.expires_at <= now))
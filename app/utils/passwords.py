@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+import hmac
+import threading
+
+HASH_PREFIXES = ("pbkdf2:", "scrypt:")  # anything else is a legacy plaintext password
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+_dummy_hashes = {}  # work factor method -> hash used for unknown accounts
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool stays saturated for longer than PASSWORD_HASH_QUEUE_TIMEOUT."""
+
+
+def _run(fn, *args):
+    """
+    Runs CPU heavy hashing on a bounded, per-worker thread pool. At most PASSWORD_HASH_WORKERS
+    hashes run at once and at most as many again wait in line, so a login burst can't starve
+    the rest of the worker's requests.
+    """
+    global _executor, _slots
+    config = current_app.config
+
+    with _executor_lock:
+        if _executor is None:
+            workers = config['PASSWORD_HASH_WORKERS']
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+            _slots = threading.BoundedSemaphore(workers * 2)
+
+    if not _slots.acquire(timeout=config['PASSWORD_HASH_QUEUE_TIMEOUT']):
+        raise PasswordHasherBusy()
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future.result()
+
+
+def _hash_method():
+    return f"pbkdf2:sha256:{current_app.config['PASSWORD_HASH_ITERATIONS']}"
+
+
+def hash_password(password):  # salted pbkdf2 hash using the configured work factor
+    return _run(generate_password_hash, password, _hash_method())
+
+
+def _check_password(stored, password):
+    if stored.startswith(HASH_PREFIXES):
+        return check_password_hash(stored, password)
+    return hmac.compare_digest(stored.encode(), password.encode())
+
+
+def verify_password(stored, password):
+    """
+    Checks a password against the stored value. Pass stored=None for an unknown account;
+    a dummy hash is still verified so response time does not reveal which emails exist.
+    """
+    if stored is None:
+        _run(check_password_hash, _dummy_hash(), password)
+        return False
+    return _run(_check_password, stored, password)
+
+
+def needs_rehash(stored):  # True for plaintext rows or hashes made with another work factor
+    return not stored.startswith(_hash_method() + "$")
+
+
+def _dummy_hash():
+    method = _hash_method()
+    if _dummy_hashes.get(method) is None:
+        _dummy_hashes[method] = generate_password_hash("dummy-password", method)
+    return _dummy_hashes[method]
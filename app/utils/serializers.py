@@ -0,0 +1,127 @@
+from collections.abc import Mapping
+from datetime import date
+import decimal
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import PRE_DUMP, POST_DUMP
+from marshmallow.utils import ensure_text_type
+import itertools
+
+# ======================================================================
+# COMPILED DUMP FUNCTIONS
+# ======================================================================
+
+# marshmallow's dump() walks every field of every object through Field.serialize,
+# get_value and _serialize. For the plain field types below, compile_dumper() generates
+# one Python function per schema that reads the attributes and converts them inline,
+# producing exactly what Schema.dump() would.
+
+
+class Money(fields.Decimal):
+    """
+    Amount of money: loads as a Decimal rounded to cents and dumps as a JSON number, so
+    prices and totals are computed with Decimal but clients keep receiving numbers.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(places=2, rounding=decimal.ROUND_HALF_UP, **kwargs)
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        value = super()._serialize(value, attr, obj, **kwargs)
+        return None if value is None else float(value)
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class CompiledDumpMixin:
+    """
+    Schema mixin whose dump() runs a function compiled from the schema's dump fields.
+    Schemas with fields or hooks the compiler does not support, and dict input, keep
+    marshmallow's own dump().
+    Usage: class MechanicSchema(CompiledDumpMixin, ma.SQLAlchemyAutoSchema)
+    """
+
+    def dump(self, obj, *, many=None):
+        many = self.many if many is None else bool(many)
+        dumper = self.compiled_dumper()
+
+        if dumper is not None and obj is not None:
+            if not many:
+                if not isinstance(obj, Mapping):
+                    return dumper(obj)
+            else:
+                items = obj if isinstance(obj, (list, tuple)) else list(obj)
+                if not items or not isinstance(items[0], Mapping):
+                    return [dumper(item) for item in items]
+                obj = items
+        return super().dump(obj, many=many)
+
+    def compiled_dumper(self):  # built on first use, None when the schema can't be compiled
+        if "_compiled_dumper" not in self.__dict__:
+            self._compiled_dumper = compile_dumper(self)
+        return self._compiled_dumper
+
+
+def compile_dumper(schema):
+    """Returns a function dumping one object like schema.dump(obj, many=False), or None."""
+    try:
+        return _compile(schema, {"_text": ensure_text_type, "_date_iso": date.isoformat}, itertools.count())
+    except _Unsupported:
+        return None
+
+
+def _compile(schema, namespace, counter):
+    if schema._hooks[PRE_DUMP] or schema._hooks[POST_DUMP]:
+        raise _Unsupported(f"{type(schema).__name__} has dump hooks")
+    if type(schema).get_attribute is not Schema.get_attribute:
+        raise _Unsupported(f"{type(schema).__name__} overrides get_attribute")
+
+    items = []
+    for name, field in schema.dump_fields.items():
+        attribute = field.attribute or name
+        if not attribute.isidentifier() or field.dump_default is not missing:
+            raise _Unsupported(f"{name} needs marshmallow's attribute lookup")
+
+        value = f"v{next(counter)}"
+        key = field.data_key if field.data_key is not None else name
+        items.append(f"{key!r}: {_convert(field, value, namespace, counter, f'(obj.{attribute})')}")
+
+    function_name = f"dump_{type(schema).__name__}_{next(counter)}"
+    source = f"def {function_name}(obj):\n    return {{{', '.join(items)}}}\n"
+    exec(compile(source, f"<compiled {type(schema).__name__}>", "exec"), namespace)
+    return namespace[function_name]
+
+
+def _convert(field, value, namespace, counter, source):
+    """Expression serializing source (evaluated once, into the variable value) like field._serialize."""
+    field_type = type(field)
+
+    if field_type is fields.Integer and not field.as_string:
+        converted = f"int({value})"
+    elif field_type is fields.Float and not field.as_string:
+        converted = f"float({value})"
+    elif field_type is fields.String:
+        converted = f"({value} if {value}.__class__ is str else _text({value}))"
+    elif field_type is Money:
+        serialize = f"_money{next(counter)}"
+        namespace[serialize] = field._serialize
+        converted = f"{serialize}({value}, None, None)"
+    elif field_type is fields.Date and field.format in (None, "iso", "iso8601"):
+        converted = f"_date_iso({value})"
+    elif field_type is fields.Nested:
+        nested = _compile(field.schema, namespace, counter)
+        namespace[nested.__name__] = nested
+        if field.schema.many or field.many:
+            item = f"v{next(counter)}"
+            converted = f"[{nested.__name__}({item}) for {item} in {value}]"
+        else:
+            converted = f"{nested.__name__}({value})"
+    elif field_type is fields.List:
+        item = f"v{next(counter)}"
+        inner = _convert(field.inner, f"v{next(counter)}", namespace, counter, item)
+        converted = f"[{inner} for {item} in {value}]"
+    else:
+        raise _Unsupported(f"{field_type.__name__} fields are not compiled")
+
+    return f"(None if ({value} := {source}) is None else {converted})"
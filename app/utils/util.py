@@ -1,12 +1,39 @@
 
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from jose import jwt
 import jose
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app, Response, stream_with_context, make_response
+from sqlalchemy import select, insert, update, event, func, and_, or_, BigInteger, Integer, SmallInteger
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from urllib.parse import urlencode
+from app.models import CacheVersion, db
+from app.extensions import cache
+from app.utils.db_routing import use_replica, RoutingSession
+from collections import OrderedDict
+import base64
+import binascii
+import hashlib
+import io
+import json
+import math
 import os
+import threading
+import time
 
 SECRET_KEY = os.environ.get('SECRET_KEY') or "secret-key"
+TOKEN_CACHE_SIZE = 10000  # verified tokens remembered per worker
+PENDING_CACHE_BUMPS = 'pending_cache_bumps'  # session.info key of the tables to bump after commit
+
+_verified_tokens = OrderedDict()  # sha256(token) -> (customer_id, exp), least recently used first
+_verified_tokens_lock = threading.Lock()
+
+DEFAULT_PAGE_SIZE = 50  # rows returned when per_page is not provided
+MAX_PAGE_SIZE = 200  # hard cap so no request can pull an unbounded result set
+STREAM_CHUNK_SIZE = 500  # rows fetched and serialized at a time when streaming
+INTEGER_BITS = ((BigInteger, 64), (SmallInteger, 16), (Integer, 32))  # signed width per column type, subclasses first
+UPLOAD_ENCODING = 'utf-8-sig'  # uploaded text files, tolerating the BOM spreadsheet exports add
 
 def encode_token(customer_id):  # using unique pieces of info to make our tokens user specific
     payload = {
@@ -18,34 +45,385 @@ def encode_token(customer_id):  # using unique pieces of info to make our tokens
     token = jwt.encode(payload, SECRET_KEY, algorithm='HS256')
     return token
 
+def verify_token(token):
+    """
+    Returns the customer_id of a valid token. Verified tokens are remembered in a bounded
+    LRU (keyed by token digest) until their exp, so repeat requests skip JWT decoding and
+    the HMAC check. Raises jose.ExpiredSignatureError or jose.JWTError for bad tokens.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+
+    with _verified_tokens_lock:
+        entry = _verified_tokens.get(digest)
+        if entry:
+            if entry[1] > time.time():
+                _verified_tokens.move_to_end(digest)
+                return entry[0]
+            del _verified_tokens[digest]  # expired, decode below raises ExpiredSignatureError
+
+    data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+    if 'sub' not in data or 'exp' not in data:
+        raise jose.JWTError('Token is missing required claims')
+
+    with _verified_tokens_lock:
+        _verified_tokens[digest] = (data['sub'], data['exp'])
+        if len(_verified_tokens) > TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+    return data['sub']
+
+
 # Decorator for encode token
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-
-        if 'Authorization' in request.headers:
-
-            token = request.headers['Authorization'].split(" ")[1] # Returns the token with 'Bearer' removed.
-
-            if not token:
-                return jsonify({'message': 'Token is missing'}), 400
-            
-            try:
-                data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-                print(data)
-                customer_id = data['sub']
-
-            # May have some issues with running this code. Double check later.
-            except jwt.ExpiredSignatureError as e:
-                return jsonify({'message': 'Invalid Expired'}), 400
-            except jwt.InvalidTokenError as e:
-                return jsonify({'message': 'Invalid Token'}), 400
-            
-            return f(customer_id, *args, **kwargs)
-        
-        else: # Authorization header not found
+        auth_header = request.headers.get('Authorization')
+
+        if auth_header is None: # Authorization header not found
             return jsonify({'message': 'Login to access this resource'}), 400
-        
+
+        scheme, _, token = auth_header.strip().partition(" ") # Returns the token with 'Bearer' removed.
+        token = token.strip()
+
+        if scheme.lower() != 'bearer' or not token:
+            return jsonify({'message': 'Token is missing'}), 400
+
+        try:
+            customer_id = verify_token(token)
+        except jose.ExpiredSignatureError:
+            return jsonify({'message': 'Invalid Expired'}), 400
+        except jose.JWTError:
+            return jsonify({'message': 'Invalid Token'}), 400
+
+        return f(customer_id, *args, **kwargs)
+
     return decorated
 
+
+# ======================================================================
+# KEYSET (CURSOR) PAGINATION
+# ======================================================================
+
+def encode_cursor(values):  # opaque cursor holding the sort key of the last row on a page
+    raw = json.dumps([value.isoformat() if isinstance(value, date) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, columns):  # returns the cursor values converted back to each column's python type
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if python_type is date:
+                value = date.fromisoformat(value)
+            else:
+                value = python_type(value)
+        except (TypeError, ValueError, OverflowError):  # OverflowError: int() of an infinite float
+            raise ValueError("Invalid cursor")
+        if not _cursor_value_in_range(column, value):
+            raise ValueError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def _cursor_value_in_range(column, value):  # rejects values the database cannot bind, e.g. NaN or a 100 digit id
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if hasattr(value, 'is_finite'):  # Decimal
+        return value.is_finite()
+    if isinstance(value, int):
+        bits = next((bits for type_, bits in INTEGER_BITS if isinstance(column.type, type_)), 64)
+        return -2 ** (bits - 1) <= value < 2 ** (bits - 1)
+    return True
+
+
+def get_page_size():
+    per_page = request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int)  # non-numeric values fall back to the default
+    if per_page < 1:
+        raise ValueError("per_page must be positive")
+    return min(per_page, MAX_PAGE_SIZE)
+
+
+def keyset_paginate(query, *columns):
+    """
+    Applies keyset pagination to a select() using the `cursor` and `per_page` request args.
+    Rows are ordered by the given columns (the last one must be unique, e.g. id) and the
+    page starts right after the cursor, so deep pages cost the same as the first one.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor or page size.
+    """
+    per_page = get_page_size()
+    cursor = request.args.get('cursor')
+
+    if cursor:
+        values = decode_cursor(cursor, columns)
+
+        # (a, b) > (x, y)  ->  a > x OR (a = x AND b > y), spelled out for portability
+        conditions = []
+        for i, column in enumerate(columns):
+            equal_prefix = [columns[j] == values[j] for j in range(i)]
+            conditions.append(and_(*equal_prefix, column > values[i]))
+        query = query.where(or_(*conditions))
+
+    query = query.order_by(*columns).limit(per_page + 1)  # one extra row tells us if there is a next page
+
+    items = db.session.execute(query).scalars().all()
+
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return items, next_cursor
+
+
+def paginated_response(response, next_cursor):  # exposes the next page cursor without changing the list body
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        next_args = urlencode({**request.args.to_dict(), 'cursor': next_cursor, 'per_page': get_page_size()})  # keeps filters
+        response.headers['Link'] = f'<{request.base_url}?{next_args}>; rel="next"'
+    return response
+
+
+# ======================================================================
+# STREAMING RESPONSES
+# ======================================================================
+
+def accepts_ndjson():
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+
+def wants_stream():  # opt in with ?stream=1 (JSON array) or Accept: application/x-ndjson
+    return accepts_ndjson() or request.args.get('stream') == '1'
+
+
+def stream_response(query, schema, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streams every row of an ordered select() without loading the collection into memory.
+    Rows are fetched chunk_size at a time with yield_per and dumped with the given
+    (single item) schema, as NDJSON when the client accepts it, otherwise as a JSON array.
+    """
+    ndjson = accepts_ndjson()
+    dumps = current_app.json.dumps
+
+    def generate():
+        result = db.session.execute(query.execution_options(yield_per=chunk_size)).scalars()
+        first = True
+
+        if not ndjson:
+            yield '['
+        for chunk in result.partitions():
+            records = schema.dump(chunk, many=True)
+            if ndjson:
+                yield ''.join(dumps(record) + '\n' for record in records)
+            elif records:
+                yield ('' if first else ',') + ','.join(dumps(record) for record in records)
+                first = False
+        if not ndjson:
+            yield ']'
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def upload_stream():
+    """
+    Text stream over an uploaded file: the 'file' part of a multipart form, else the raw
+    request body. Read it incrementally, werkzeug spools large uploads to disk.
+    """
+    upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+    return io.TextIOWrapper(upload.stream if upload else request.stream, encoding=UPLOAD_ENCODING, newline='')
+
+
+# ======================================================================
+# NATIVE UPSERT
+# ======================================================================
+
+def upsert(table, rows, key, update_columns, keep_on_null=()):
+    """
+    Inserts rows, updating update_columns where key already exists, with the dialect's own
+    upsert: ON CONFLICT DO UPDATE on SQLite/PostgreSQL, ON DUPLICATE KEY UPDATE on MySQL.
+    Columns in keep_on_null keep their stored value when the new row has None for them.
+    The statement is compiled once and run as an executemany, which the drivers send as
+    multi-row batches. key must be unique and appear at most once in rows.
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    def new_value(incoming, column):
+        return func.coalesce(incoming[column], table.c[column]) if column in keep_on_null else incoming[column]
+
+    if dialect in ('sqlite', 'postgresql'):
+        query = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+        query = query.on_conflict_do_update(
+            index_elements=[key], set_={column: new_value(query.excluded, column) for column in update_columns}
+        )
+    elif dialect in ('mysql', 'mariadb'):
+        query = mysql.insert(table)
+        query = query.on_duplicate_key_update({column: new_value(query.inserted, column) for column in update_columns})
+    else:
+        raise NotImplementedError(f"No native upsert for {dialect}")
+    return db.session.execute(query, rows)
+
+
+def insert_ignoring_duplicates(table, rows, key):
+    """
+    Inserts rows, skipping any whose key columns already exist: ON CONFLICT DO NOTHING on
+    SQLite/PostgreSQL, a no-op ON DUPLICATE KEY UPDATE on MySQL (INSERT IGNORE would also
+    swallow foreign key errors). key lists the columns of the unique constraint.
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        query = (sqlite if dialect == 'sqlite' else postgresql).insert(table).on_conflict_do_nothing(index_elements=key)
+    elif dialect in ('mysql', 'mariadb'):
+        query = mysql.insert(table)
+        query = query.on_duplicate_key_update({key[0]: query.inserted[key[0]]})
+    else:
+        raise NotImplementedError(f"No native insert-or-ignore for {dialect}")
+    return db.session.execute(query, rows)
+
+
+# ======================================================================
+# REFERENCE DATA CACHE
+# ======================================================================
+
+def cache_version(name):
+    """
+    Current version of a cached table. Each worker re-reads the version row at most every
+    CACHE_VERSION_CHECK_INTERVAL seconds, which bounds how long it can serve entries that
+    another worker invalidated.
+    """
+    return cache_versions(name)[name]
+
+
+def cache_versions(*names, fresh=False):
+    """
+    {name: version} for several cached tables, the ones not memoized read in one query.
+    fresh=True reads every version row, ignoring (and refreshing) the memoized values.
+    """
+    # replica reads memoize the replica's version, so lagging data is never cached under a newer version
+    prefix = f"cache_version:{'replica' if use_replica() else 'primary'}"
+    versions = {name: None if fresh else cache.get(f"{prefix}:{name}") for name in names}
+
+    missing = [name for name, version in versions.items() if version is None]
+    if missing:
+        query = select(CacheVersion.name, CacheVersion.version).where(CacheVersion.name.in_(missing))
+        stored = dict(db.session.execute(query).all())
+
+        interval = current_app.config['CACHE_VERSION_CHECK_INTERVAL']
+        for name in missing:
+            versions[name] = stored.get(name) or 0
+            if interval > 0:  # 0 re-reads the version rows on every request
+                cache.set(f"{prefix}:{name}", versions[name], timeout=interval)
+    return versions
+
+
+def bump_cache_version(name):
+    """
+    Invalidates every cached entry for a table once the current write commits. Call it
+    anywhere in the write's transaction. The version row is updated in its own short
+    transaction right after the commit, so writes never queue behind the hot version row
+    lock; anything cached from the old data in between is keyed to the old version and is
+    dropped by the bump. A rolled back write discards its bumps.
+    """
+    session = db.session()
+    if not session.in_transaction():
+        session.begin()  # so a rollback before the first statement discards the bump too
+    session.info.setdefault(PENDING_CACHE_BUMPS, set()).add(name)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _apply_cache_bumps(session):  # top-level commits only, savepoints do not fire this
+    names = sorted(session.info.pop(PENDING_CACHE_BUMPS, ()))
+    if not names:
+        return
+    for attempt in (1, 2):  # a failed attempt rolled back, so retrying bumps each version once
+        try:
+            _write_cache_bumps(names)
+            break
+        except SQLAlchemyError:  # the write itself is committed, so the request still succeeds
+            if attempt == 2:
+                current_app.logger.exception(
+                    f"cache version bump failed for {names}: cached bodies expire after CACHE_DEFAULT_TIMEOUT, "
+                    f"but ETags come from the version rows, so clients get 304s for the old data "
+                    f"until the next successful write to these tables"
+                )
+
+    for name in names:
+        cache.delete(f"cache_version:primary:{name}")  # this worker sees the new version immediately
+
+
+def _write_cache_bumps(names):
+    with db.engine.begin() as conn:  # not the session's connection, its transaction is over
+        query = update(CacheVersion).where(CacheVersion.name.in_(names)).values(version=CacheVersion.version + 1)
+        if conn.execute(query).rowcount < len(names):
+            existing = set(conn.scalars(select(CacheVersion.name).where(CacheVersion.name.in_(names))))
+            for name in names:
+                if name in existing:
+                    continue
+                try:
+                    with conn.begin_nested():
+                        conn.execute(insert(CacheVersion).values(name=name, version=1))
+                except IntegrityError:  # another worker created the row first
+                    conn.execute(update(CacheVersion).where(CacheVersion.name == name).values(version=CacheVersion.version + 1))
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _discard_cache_bumps(session, transaction):  # after a top-level rollback or close, nothing left to apply
+    if transaction.parent is None:
+        session.info.pop(PENDING_CACHE_BUMPS, None)
+
+
+def cached_read(name, key, loader):
+    """
+    Returns loader() through the cache under a key tied to the table's current version.
+    loader should return plain serialized data; None results are not cached.
+    """
+    cache_key = f"{name}:v{cache_version(name)}:{key}"
+    value = cache.get(cache_key)
+
+    if value is None:
+        value = loader()
+        if value is not None:
+            cache.set(cache_key, value)
+    return value
+
+
+# ======================================================================
+# CONDITIONAL GET (ETAG / 304)
+# ======================================================================
+
+def conditional_get(*tables):
+    """
+    Decorator for GET routes whose response only depends on the given cached tables.
+    The strong ETag is built from the request and the tables' cache versions, so it is
+    checked against If-None-Match before the view queries or serializes anything.
+    Conditional requests read the version rows uncached, so a worker that has not yet
+    seen another worker's write never answers 304 for changed content.
+    Writes to those tables must call bump_cache_version().
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            current = cache_versions(*tables, fresh=bool(request.if_none_match))
+            versions = ",".join(f"{table}={version}" for table, version in current.items())
+            key = f"{request.full_path}|{accepts_ndjson()}|{args}|{versions}"  # args carries the token's customer_id
+            etag = hashlib.sha1(key.encode()).hexdigest()
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return decorated
+    return decorator
@@ -0,0 +1,276 @@
+"""
+Latency and SQL query counts for every route of the four blueprints.
+
+Seeds the test database through APITestCase.seed_volume (100k customers, 100 mechanics,
+10k parts and 1M tickets by default), then calls each route RUNS times through the Flask
+test client after WARMUP untimed calls. Reads run first, then writes, then deletes, so
+every request finds the rows it needs: writes use fresh names and emails, and deletes
+remove spare rows added after the seed (or the newest tickets). For each route it
+records the p50/p90/p99/max latency in milliseconds, the median and max number of SQL
+statements per request and the response status codes.
+
+Results go to a JSON file tagged with the git commit, so two commits can be compared:
+run on each and pass the older file as --baseline to print the change per route. Uses
+TestingConfig, so it resets the test database like the unittest suite does.
+
+Run with: PYTHONPATH=. python benchmarks/bench_endpoints.py [--tickets N ...] [--baseline FILE]
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from importlib.metadata import version
+
+from sqlalchemy import insert
+
+from app.models import Customer, Inventory, Mechanic, db
+from app.tests.test_base import APITestCase
+from app.utils.passwords import hash_password
+from app.utils.util import encode_token
+
+CUSTOMERS = 100_000
+MECHANICS = 100
+PARTS = 10_000
+TICKETS = 1_000_000
+RUNS = 50
+WARMUP = 3
+BULK_TICKETS = 100  # tickets per POST /service_tickets/bulk
+IMPORT_ROWS = 100  # catalog rows per POST /inventory/import
+INVOICE_IDS = 50  # tickets per GET /service_tickets/invoices
+PASSWORD = "benchPass1"
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(dirty.strip())
+
+
+def percentile(values, fraction):  # nearest rank
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def build_routes(volumes, calls):
+    """
+    [(route, request factory)] in the order they run. A factory takes the call number
+    (0 .. calls - 1) and returns the keyword arguments for client.open. Spare customers,
+    mechanics and parts for the delete routes are inserted here, after the seeded ids.
+    """
+    customers, mechanics, parts, tickets = (volumes[name] for name in ("customers", "mechanics", "parts", "tickets"))
+    spare = {table: [seeded + n for n in range(1, calls + 1)] for table, seeded in
+             ((Customer, customers), (Mechanic, mechanics), (Inventory, parts))}
+    db.session.execute(insert(Customer), [
+        {"id": i, "name": "Spare", "email": f"spare{i}@example.com", "email_normalized": f"spare{i}@example.com",
+         "password": "secret", "phone": "555"} for i in spare[Customer]
+    ])
+    db.session.execute(insert(Mechanic), [
+        {"id": i, "name": "Spare", "email": f"spare{i}@example.com", "phone": "555", "salary": 1.0} for i in spare[Mechanic]
+    ])
+    db.session.execute(insert(Inventory), [{"id": i, "name": f"Spare {i}", "price": 1} for i in spare[Inventory]])
+    login_email = "bench-login@example.com"
+    db.session.execute(insert(Customer).values(
+        name="Bench", email=login_email, email_normalized=login_email, password=hash_password(PASSWORD), phone="555",
+    ))
+    db.session.commit()
+
+    def spread(n, count):  # ids 1..count visited in a stride so repeated calls touch different rows
+        return n * 7919 % count + 1
+
+    def token(customer_id):
+        return {"Authorization": f"Bearer {encode_token(customer_id)}"}
+
+    def ticket(n):
+        return {"vin": f"BENCH{n:012d}", "service_date": "2024-01-01", "service_desc": "Brakes",
+                "customer_id": spread(n, customers), "mechanic_ids": [spread(n, mechanics)],
+                "inventory": [{"inventory_id": spread(n, parts), "quantity": 1},
+                              {"inventory_id": spread(n + 1, parts), "quantity": 2}]}
+
+    def catalog(n):
+        rows = "".join(f"Part {spread(n * IMPORT_ROWS + row, parts)},{10 + n % 5}.50,\n" for row in range(IMPORT_ROWS))
+        return (io.BytesIO(f"name,price,stock\n{rows}".encode()), "catalog.csv")
+
+    def get(path):
+        return {"method": "GET", "path": path}
+
+    return [
+        # customers
+        ("GET /customers/", lambda n: get("/customers/")),
+        ("GET /customers/<id>", lambda n: get(f"/customers/{spread(n, customers)}")),
+        ("GET /customers/<id>/summary", lambda n: get(f"/customers/{spread(n, customers)}/summary")),
+        ("GET /customers/my-tickets", lambda n: {"method": "GET", "path": "/customers/my-tickets",
+                                                 "headers": token(spread(n, customers))}),
+        # mechanics
+        ("GET /mechanics/", lambda n: get("/mechanics/")),
+        ("GET /mechanics/<id>", lambda n: get(f"/mechanics/{spread(n, mechanics)}")),
+        ("GET /mechanics/top_mechanics", lambda n: get("/mechanics/top_mechanics")),
+        # inventory
+        ("GET /inventory/", lambda n: get("/inventory/")),
+        ("GET /inventory/<id>", lambda n: get(f"/inventory/{spread(n, parts)}")),
+        # service tickets
+        ("GET /service_tickets/", lambda n: get("/service_tickets/")),
+        ("GET /service_tickets/<id>", lambda n: get(f"/service_tickets/{spread(n, tickets)}")),
+        ("GET /service_tickets/<id>/invoice", lambda n: get(f"/service_tickets/{spread(n, tickets)}/invoice")),
+        ("GET /service_tickets/invoices", lambda n: get("/service_tickets/invoices?ids=" + ",".join(
+            str(spread(n * INVOICE_IDS + i, tickets)) for i in range(INVOICE_IDS)))),
+        ("GET /service_tickets/search", lambda n: get(
+            f"/service_tickets/search?mechanic_id={spread(n, mechanics)}&from=2020-01-01&to=2020-01-31")),
+        ("GET /service_tickets/export.csv", lambda n: get(
+            f"/service_tickets/export.csv?from=2020-{n % 12 + 1:02d}-01&to=2020-{n % 12 + 1:02d}-28")),
+
+        # writes
+        ("POST /customers/login", lambda n: {"method": "POST", "path": "/customers/login",
+                                             "json": {"email": login_email, "password": PASSWORD}}),
+        ("POST /customers/", lambda n: {"method": "POST", "path": "/customers/", "json": {
+            "name": "New", "email": f"new{n}@example.com", "phone": "555", "password": PASSWORD}}),
+        ("PUT /customers/<id>", lambda n: {"method": "PUT", "path": f"/customers/{spread(n, customers)}", "json": {
+            "name": f"Renamed {n}", "email": f"c{spread(n, customers)}@example.com", "phone": "555", "password": PASSWORD}}),
+        ("POST /mechanics/", lambda n: {  # a new client address per call stays under the 5 per hour limit
+            "method": "POST", "path": "/mechanics/", "environ_base": {"REMOTE_ADDR": f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}"},
+            "json": {"name": "New", "email": f"new{n}@example.com", "phone": "555", "salary": 50000}}),
+        ("PUT /mechanics/<id>", lambda n: {"method": "PUT", "path": f"/mechanics/{spread(n, mechanics)}", "json": {
+            "name": f"Renamed {n}", "email": f"m{spread(n, mechanics)}@example.com", "phone": "555", "salary": 60000}}),
+        ("POST /inventory/", lambda n: {"method": "POST", "path": "/inventory/", "json": {"name": f"New {n}", "price": 12.5}}),
+        ("PUT /inventory/<id>", lambda n: {"method": "PUT", "path": f"/inventory/{spread(n, parts)}", "json": {
+            "name": f"Part {spread(n, parts)}", "price": 10 + n % 5}}),
+        ("POST /inventory/import", lambda n: {"method": "POST", "path": "/inventory/import",
+                                              "data": {"file": catalog(n)}, "content_type": "multipart/form-data"}),
+        ("POST /service_tickets/", lambda n: {"method": "POST", "path": "/service_tickets/", "json": ticket(n)}),
+        ("POST /service_tickets/bulk", lambda n: {"method": "POST", "path": "/service_tickets/bulk", "json": [
+            ticket(n * BULK_TICKETS + i) for i in range(BULK_TICKETS)]}),
+        ("PUT /service_tickets/<id>/assign_mechanics", lambda n: {
+            "method": "PUT", "path": f"/service_tickets/{spread(n, tickets)}/assign_mechanics",
+            "json": {"add_mechanics_ids": [spread(n + 1, mechanics)]}}),
+        ("PUT /service_tickets/<id>/remove_mechanics", lambda n: {
+            "method": "PUT", "path": f"/service_tickets/{spread(n, tickets)}/remove_mechanics",
+            "json": {"remove_mechanics_ids": [spread(n + 1, mechanics)]}}),
+
+        # deletes
+        ("DELETE /service_tickets/<id>", lambda n: {"method": "DELETE", "path": f"/service_tickets/{tickets - n}"}),
+        ("DELETE /inventory/<id>", lambda n: {"method": "DELETE", "path": f"/inventory/{spare[Inventory][n]}"}),
+        ("DELETE /mechanics/<id>", lambda n: {"method": "DELETE", "path": f"/mechanics/{spare[Mechanic][n]}"}),
+        ("DELETE /customers/", lambda n: {"method": "DELETE", "path": "/customers/", "headers": token(spare[Customer][n])}),
+    ]
+
+
+def measure(fixture, factory, runs, warmup):
+    latencies, queries, statuses = [], [], {}
+    for n in range(warmup + runs):
+        request = factory(n)
+        with fixture.count_queries() as statements:
+            started = time.perf_counter()
+            response = fixture.client.open(request.pop("path"), **request)
+            response.get_data()  # streamed bodies are generated here
+            elapsed = time.perf_counter() - started
+        if n < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        queries.append(len(statements))
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+    return {
+        "runs": runs,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p90": round(percentile(latencies, 0.90), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(max(latencies), 3),
+            "mean": round(statistics.fmean(latencies), 3),
+        },
+        "queries": {"median": statistics.median(queries), "max": max(queries)},
+        "status": statuses,
+    }
+
+
+def print_results(results, baseline):
+    previous = {result["route"]: result for result in baseline["results"]} if baseline else {}
+    header = f"{'route':<45} | {'p50 ms':>8} | {'p90 ms':>8} | {'p99 ms':>8} | {'queries':>7} | {'status':<12}"
+    if baseline:
+        header += f" | {'p50 change':>10} | {'queries change':>14}"
+    print(header)
+    for result in results:
+        latency, queries = result["latency_ms"], result["queries"]
+        status = ",".join(f"{code}x{count}" for code, count in sorted(result["status"].items()))
+        line = (f"{result['route']:<45} | {latency['p50']:8.2f} | {latency['p90']:8.2f} | {latency['p99']:8.2f} | "
+                f"{queries['median']:7g} | {status:<12}")
+        old = previous.get(result["route"])
+        if old:
+            change = (latency["p50"] - old["latency_ms"]["p50"]) / old["latency_ms"]["p50"] * 100
+            line += f" | {change:+9.1f}% | {queries['median'] - old['queries']['median']:+14g}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--customers", type=int, default=CUSTOMERS)
+    parser.add_argument("--mechanics", type=int, default=MECHANICS)
+    parser.add_argument("--parts", type=int, default=PARTS)
+    parser.add_argument("--tickets", type=int, default=TICKETS)
+    parser.add_argument("--runs", type=int, default=RUNS, help="timed calls per route")
+    parser.add_argument("--warmup", type=int, default=WARMUP, help="untimed calls per route before the timed ones")
+    parser.add_argument("--route", action="append", help="only routes containing this text, e.g. --route invoice")
+    parser.add_argument("--output", help="JSON results file (default: bench_endpoints_<commit>.json)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    volumes = {"customers": args.customers, "mechanics": args.mechanics, "parts": args.parts, "tickets": args.tickets}
+    if min(volumes.values()) < 1 or args.runs < 1:
+        parser.error("volumes and --runs must be at least 1")
+    if args.tickets < args.warmup + args.runs:
+        parser.error("--tickets must cover the deleted tickets, at least --warmup + --runs")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["volumes"] != volumes:
+            print(f"warning: baseline was seeded with {baseline['volumes']}", file=sys.stderr)
+    commit, dirty = git_commit()
+
+    fixture = APITestCase()  # the unittest fixture, driven by hand
+    fixture.setUp()
+    try:
+        started = time.perf_counter()
+        fixture.seed_volume(**volumes)
+        print(f"seeded {volumes} in {time.perf_counter() - started:.1f}s")
+
+        results = []
+        for route, factory in build_routes(volumes, args.warmup + args.runs):
+            if args.route and not any(text in route for text in args.route):
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):  # some routes print every request
+                result = measure(fixture, factory, args.runs, args.warmup)
+            results.append({"route": route, **result})
+    finally:
+        fixture.tearDown()
+
+    print_results(results, baseline)
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": fixture.app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+        "python": platform.python_version(),
+        "flask": version("flask"),
+        "sqlalchemy": version("sqlalchemy"),
+        "volumes": volumes,
+        "runs": args.runs,
+        "warmup": args.warmup,
+        "results": results,
+    }
+    output = args.output or f"bench_endpoints_{(commit or 'unknown')[:12]}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+GET /search/ latency over millions of ticket descriptions.
+
+Seeds TICKETS tickets whose descriptions pair a part with a symptom plus free-text
+filler, then times common phrases. Uses TestingConfig (SQLite FTS5), so it resets the test database
+like the unittest suite does.
+
+Run with: PYTHONPATH=. python benchmarks/bench_fulltext_search.py [tickets]
+"""
+import random
+import statistics
+import sys
+import time
+from datetime import date
+
+from sqlalchemy import insert, text
+
+from app import create_app
+from app.models import Customer, ServiceTicket, db
+
+TICKETS = 2_000_000
+BATCH = 50_000
+RUNS = 20
+PARTS = "brake timing coolant engine alternator battery starter transmission wiper headlight tire exhaust".split()
+SYMPTOMS = "squeal belt leak misfire whine drain noise slip streak flicker wobble rattle".split()
+FILLER = [f"note{i}" for i in range(20_000)]  # stands in for the long tail of free text
+PHRASES = ["brake squeal", "timing belt", "coolant leak", "engine misfire", "alternator", "wiper"]
+
+
+def seed(tickets):
+    rng = random.Random(7)
+    db.session.execute(insert(Customer), [
+        {"id": 1, "name": "C", "email": "c@example.com", "email_normalized": "c@example.com", "password": "x", "phone": "555"}
+    ])
+    for first in range(1, tickets + 1, BATCH):
+        db.session.execute(insert(ServiceTicket), [
+            {"id": i, "vin": f"VIN{i:014d}", "service_date": date(2024, 1, 1),
+             "service_desc": f"{rng.choice(PARTS)} {rng.choice(SYMPTOMS)} " + " ".join(rng.choices(FILLER, k=6)),
+             "customer_id": 1}
+            for i in range(first, min(first + BATCH, tickets + 1))
+        ])
+    db.session.commit()
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else TICKETS
+    app = create_app("TestingConfig")
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        seed(tickets)  # the FTS5 triggers index every row as it is inserted
+        print(f"seeded and indexed {tickets} tickets in {time.perf_counter() - started:.1f}s")
+
+        client = app.test_client()
+        print(f"{'query':<22} | {'median ms':>10} | {'matches':>8}")
+        for phrase in PHRASES:
+            latencies = []
+            for _ in range(RUNS):
+                started = time.perf_counter()
+                response = client.get(f"/search/?q={phrase}&limit=20")
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.json
+            fts_match = " ".join(f'"{term}"' for term in phrase.split())
+            matches = db.session.execute(
+                text("SELECT count(*) FROM service_tickets_fts WHERE service_tickets_fts MATCH :q"), {"q": fts_match}
+            ).scalar_one()
+            print(f"{phrase:<22} | {statistics.median(latencies):10.2f} | {matches:8}")
+
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
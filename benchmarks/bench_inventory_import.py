@@ -0,0 +1,62 @@
+"""
+POST /inventory/import throughput and memory for growing supplier catalogs.
+
+Writes a CSV of ROWS parts to a temporary file, uploads it twice (all inserts, then all
+updates) and reports rows/s and the peak Python memory of the request. The peak should
+stay flat as the file grows. Uses TestingConfig, so it resets the test database like the
+unittest suite does.
+
+Run with: PYTHONPATH=. python benchmarks/bench_inventory_import.py [rows ...]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app import create_app
+from app.models import db
+
+ROWS = [10_000, 50_000, 200_000]
+
+
+def write_catalog(rows, price):
+    catalog = tempfile.TemporaryFile()
+    catalog.write(b"name,price,stock\n")
+    for i in range(rows):
+        catalog.write(f"Part {i:07d},{price + i % 100 / 100:.2f},{i % 50}\n".encode())
+    catalog.seek(0)
+    return catalog
+
+
+def upload(client, catalog):
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.post("/inventory/import", data={"file": (catalog, "catalog.csv")}, content_type="multipart/form-data")
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert response.status_code == 200 and response.json["rejected"] == 0, response.json
+    return response.json, elapsed, peak
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or ROWS
+    app = create_app("TestingConfig")
+
+    with app.app_context():
+        client = app.test_client()
+        print(f"{'rows':>8} | {'pass':>7} | {'rows/s':>8} | {'peak MB':>7}")
+        for rows in sizes:
+            db.drop_all()
+            db.create_all()
+            for name, price in [("insert", 10), ("update", 20)]:
+                with write_catalog(rows, price) as catalog:
+                    counts, elapsed, peak = upload(client, catalog)
+                assert counts["inserted" if name == "insert" else "updated"] == rows, counts
+                print(f"{rows:8} | {name:>7} | {rows / elapsed:8.0f} | {peak / 2**20:7.1f}")
+
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Rate limiter overhead per request.
+
+Times one moving-window hit (what Flask-Limiter does before a limited view runs) against
+the per-process memory storage and the shared database storage. Uses TestingConfig,
+so it resets the test database like the unittest suite does.
+
+Run with: PYTHONPATH=. python benchmarks/bench_limiter.py
+"""
+import timeit
+
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import MovingWindowRateLimiter
+
+from app import create_app
+from app.models import db
+from app.utils.limiter_storage import DatabaseStorage
+
+ITERATIONS = 2000
+KEYS = 100  # distinct clients hitting the endpoint
+LIMIT = parse(f"{ITERATIONS} per hour")  # never reached, every hit is recorded
+
+
+def bench(storage):
+    limiter = MovingWindowRateLimiter(storage)
+    hits = iter(range(ITERATIONS))
+    seconds = timeit.timeit(lambda: limiter.hit(LIMIT, f"client{next(hits) % KEYS}"), number=ITERATIONS)
+    return seconds / ITERATIONS * 1e6
+
+
+def main():
+    app = create_app("TestingConfig")
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        memory = bench(MemoryStorage())
+        database = bench(DatabaseStorage())
+
+        db.drop_all()
+
+    print(f"hits:             {ITERATIONS} over {KEYS} keys, {app.config['SQLALCHEMY_DATABASE_URI']}")
+    print(f"memory storage:   {memory:8.2f} us/request (per worker, not shared)")
+    print(f"database storage: {database:8.2f} us/request (shared by all workers)")
+
+
+if __name__ == "__main__":
+    main()
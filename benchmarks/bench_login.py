@@ -0,0 +1,65 @@
+"""
+Login throughput at different password hashing work factors.
+
+Seeds one customer per work factor and runs POST /customers/login from several client
+threads at once, reporting logins/second and mean latency. Uses TestingConfig, so it
+resets the test database like the unittest suite does.
+
+Run with: PYTHONPATH=. python benchmarks/bench_login.py [iterations ...]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+from app.models import Customer, db
+from app.utils.passwords import hash_password
+
+WORK_FACTORS = [10000, 100000, 600000]
+CLIENT_THREADS = 8
+LOGINS = 200
+
+
+def run(app, iterations):
+    app.config["PASSWORD_HASH_ITERATIONS"] = iterations
+    email = f"bench{iterations}@example.com"
+
+    with app.app_context():
+        db.session.add(Customer(name="Bench", email=email, phone="555", password=hash_password("benchPass1")))
+        db.session.commit()
+
+    def login(_):
+        with app.app_context():
+            started = time.perf_counter()
+            response = app.test_client().post("/customers/login", json={"email": email, "password": "benchPass1"})
+            assert response.status_code == 200, response.json
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENT_THREADS) as pool:
+        latencies = list(pool.map(login, range(LOGINS)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{iterations:>10} | {LOGINS / elapsed:12.1f} | {sum(latencies) / len(latencies) * 1000:12.2f}")
+
+
+def main():
+    work_factors = [int(arg) for arg in sys.argv[1:]] or WORK_FACTORS
+    app = create_app("TestingConfig")
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    print(f"{LOGINS} logins from {CLIENT_THREADS} threads, "
+          f"{app.config['PASSWORD_HASH_WORKERS']} hashing workers")
+    print(f"{'iterations':>10} | {'logins/sec':>12} | {'mean ms':>12}")
+    for iterations in work_factors:
+        run(app, iterations)
+
+    with app.app_context():
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
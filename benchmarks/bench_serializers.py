@@ -0,0 +1,65 @@
+"""
+Ticket serialization speed: marshmallow vs compiled dump functions, and Flask's json
+provider vs orjson for encoding the result.
+
+Builds TICKETS unsaved tickets (2 mechanics and 3 parts each) in memory and dumps them
+with tickets_return_schema, as GET /service_tickets/ does.
+
+Run with: PYTHONPATH=. python benchmarks/bench_serializers.py
+"""
+import timeit
+from datetime import date
+from unittest import mock
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.blueprints.service_tickets.schemas import tickets_return_schema
+from app.extensions import ORJSONProvider
+from app.models import Inventory, Mechanic, ServiceInventory, ServiceTicket
+from app.utils.serializers import CompiledDumpMixin
+
+TICKETS = 5000
+REPEAT = 5
+
+
+def build_tickets():
+    mechanics = [Mechanic(id=i, name=f"Mechanic {i}") for i in range(10)]
+    parts = [Inventory(id=i, name=f"Part {i}", price=9.99 + i) for i in range(20)]
+    tickets = []
+    for i in range(TICKETS):
+        ticket = ServiceTicket(id=i, vin=f"VIN{i:014d}", service_date=date(2024, 1, 1), service_desc="Service", customer_id=1)
+        ticket.mechanics = [mechanics[i % 10], mechanics[(i + 1) % 10]]
+        ticket.service_inventory = [
+            ServiceInventory(id=i * 3 + n, ticket_id=i, inventory_id=parts[(i + n) % 20].id, quantity=n + 1, inventory=parts[(i + n) % 20])
+            for n in range(3)
+        ]
+        tickets.append(ticket)
+    return tickets
+
+
+def best_of(fn):
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT)) * 1000
+
+
+def main():
+    app = create_app("TestingConfig")
+    tickets = build_tickets()
+
+    with mock.patch.object(CompiledDumpMixin, "compiled_dumper", return_value=None):
+        marshmallow_ms = best_of(lambda: tickets_return_schema.dump(tickets))
+    compiled_ms = best_of(lambda: tickets_return_schema.dump(tickets))
+
+    data = tickets_return_schema.dump(tickets)
+    default_ms = best_of(lambda: DefaultJSONProvider(app).dumps(data))
+    orjson_ms = best_of(lambda: ORJSONProvider(app).dumps(data))
+
+    print(f"tickets:            {TICKETS}")
+    print(f"marshmallow dump:   {marshmallow_ms:8.1f} ms")
+    print(f"compiled dump:      {compiled_ms:8.1f} ms ({marshmallow_ms / compiled_ms:.1f}x)")
+    print(f"json encode:        {default_ms:8.1f} ms")
+    print(f"orjson encode:      {orjson_ms:8.1f} ms ({default_ms / orjson_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+POST /service_tickets/ throughput while many threads reserve the same part.
+
+Every ticket takes one unit of a single part through the conditional stock decrement.
+Runs TICKETS tickets at each thread count and checks that exactly the stock on hand was
+sold. Tickets are spread over CUSTOMERS customers, because each create also updates its
+customer's summary row. Uses TestingConfig, so it resets the test database like the
+unittest suite does; set BENCH_DATABASE_URI to run it on a server database instead.
+
+A create holds row locks until it commits on the part's row (the stock decrement) and
+on its customer's customer_summaries row. The cache_versions rows are bumped in a
+separate transaction after the commit. On PostgreSQL/MySQL, creates for different
+customers should therefore only queue on the shared part. SQLite serializes all
+writers, so there throughput stays flat as threads are added. Only SQLite has been
+measured so far.
+
+Run with: PYTHONPATH=. python benchmarks/bench_stock_reservation.py [tickets]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from app import create_app
+from app.models import Customer, Inventory, ServiceTicket, db
+
+TICKETS = 400
+THREADS = [1, 2, 4, 8]
+CUSTOMERS = 50
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else TICKETS
+    if os.environ.get("BENCH_DATABASE_URI"):
+        config.TestingConfig.SQLALCHEMY_DATABASE_URI = os.environ["BENCH_DATABASE_URI"]
+    app = create_app("TestingConfig")
+
+    with app.app_context():
+        print(f"{'threads':>7} | {'tickets/s':>9} | {'sold':>5} | {'rejected':>8} | {'stock left':>10}")
+        for threads in THREADS:
+            db.drop_all()
+            db.create_all()
+            db.session.add_all([
+                Customer(id=i, name="C", email=f"c{i}@example.com", password="x", phone="555") for i in range(1, CUSTOMERS + 1)
+            ])
+            db.session.add(Inventory(id=1, name="Pads", price=10, stock=tickets - threads))  # a few requests must fail
+            db.session.commit()
+
+            def create_ticket(n):
+                payload = {"vin": "VIN", "service_date": "2024-01-01", "service_desc": "Pads", "customer_id": n % CUSTOMERS + 1,
+                           "inventory": [{"inventory_id": 1, "quantity": 1}]}
+                return app.test_client().post("/service_tickets/", json=payload).status_code
+
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # the create route prints every request
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    statuses = list(pool.map(create_ticket, range(tickets)))
+            elapsed = time.perf_counter() - started
+
+            db.session.expire_all()
+            stock = db.session.get(Inventory, 1).stock
+            sold = db.session.query(ServiceTicket).count()
+            assert stock == 0 and sold == statuses.count(201) == tickets - threads, (stock, sold, set(statuses))
+            print(f"{threads:7} | {tickets / elapsed:9.0f} | {sold:5} | {statuses.count(409):8} | {stock:10}")
+
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+GET /service_tickets/export.csv throughput and memory at 1M tickets.
+
+Seeds TICKETS tickets (one mechanic and one part each) spread over ten years, then streams
+a one month export and the full range. The response is consumed chunk by chunk the way a
+WSGI server would send it. Reports rows/s, and on a second pass the peak Python memory
+under tracemalloc, which should not grow with the number of rows. Uses TestingConfig, so
+it resets the test database like the unittest suite does.
+
+Run with: PYTHONPATH=. python benchmarks/bench_ticket_export.py [tickets]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.models import Customer, Inventory, Mechanic, ServiceInventory, ServiceTicket, service_mechanic, db
+
+TICKETS = 1_000_000
+CUSTOMERS = 50_000
+MECHANICS = 50
+PARTS = 500
+BATCH = 50_000
+START = date(2015, 1, 1)
+DAYS = 3650
+
+
+def seed(tickets):
+    db.session.execute(insert(Customer), [
+        {"id": i, "name": f"C{i}", "email": f"c{i}@example.com", "email_normalized": f"c{i}@example.com", "password": "x", "phone": "555"}
+        for i in range(1, CUSTOMERS + 1)
+    ])
+    db.session.execute(insert(Mechanic), [
+        {"id": i, "name": f"M{i}", "email": f"m{i}@example.com", "phone": "555", "salary": 1.0}
+        for i in range(1, MECHANICS + 1)
+    ])
+    db.session.execute(insert(Inventory), [{"id": i, "name": f"P{i}", "price": 1.5} for i in range(1, PARTS + 1)])
+
+    for first in range(1, tickets + 1, BATCH):
+        ids = range(first, min(first + BATCH, tickets + 1))
+        db.session.execute(insert(ServiceTicket), [
+            {"id": i, "vin": f"VIN{i:014d}", "service_date": START + timedelta(days=i % DAYS),
+             "service_desc": "Service", "customer_id": i % CUSTOMERS + 1}
+            for i in ids
+        ])
+        db.session.execute(insert(service_mechanic), [{"ticket_id": i, "mechanic_id": i % MECHANICS + 1} for i in ids])
+        db.session.execute(insert(ServiceInventory), [
+            {"id": i, "ticket_id": i, "inventory_id": i % PARTS + 1, "quantity": 2} for i in ids
+        ])
+    db.session.commit()
+
+
+def export(client, url):  # (data rows, seconds), reading the streamed body chunk by chunk
+    started = time.perf_counter()
+    response = client.get(url, buffered=False)
+    assert response.status_code == 200
+    lines = sum(chunk.count(b"\n") for chunk in response.iter_encoded())
+    response.close()
+    return lines - 1, time.perf_counter() - started
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else TICKETS
+    app = create_app("TestingConfig")
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        seed(tickets)
+        print(f"seeded {tickets} tickets in {time.perf_counter() - started:.1f}s")
+
+        client = app.test_client()
+        ranges = {
+            "one month": "from=2020-01-01&to=2020-01-31",
+            "everything": f"from={START}&to={START + timedelta(days=DAYS)}",
+        }
+        print(f"{'range':<10} | {'rows':>8} | {'seconds':>7} | {'rows/s':>8} | {'peak MB':>7}")
+        for name, args in ranges.items():
+            url = f"/service_tickets/export.csv?{args}"
+            rows, elapsed = export(client, url)
+
+            tracemalloc.start()
+            export(client, url)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:<10} | {rows:8} | {elapsed:7.2f} | {rows / elapsed:8.0f} | {peak / 2**20:7.1f}")
+
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+GET /service_tickets/search latency at 1M tickets.
+
+Seeds TICKETS tickets (one mechanic and one part each) with bulk inserts, then times the
+first page of each filter plus a page deep into a date range. Uses TestingConfig, so it
+resets the test database like the unittest suite does. Seeding 1M tickets takes a minute.
+
+Run with: PYTHONPATH=. python benchmarks/bench_ticket_search.py [tickets]
+"""
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.models import Customer, Inventory, Mechanic, ServiceInventory, ServiceTicket, service_mechanic, db
+
+TICKETS = 1_000_000
+CUSTOMERS = 50_000
+MECHANICS = 50
+PARTS = 500
+BATCH = 50_000
+RUNS = 20
+
+
+def seed(tickets):
+    start = date(2015, 1, 1)
+    db.session.execute(insert(Customer), [
+        {"id": i, "name": f"C{i}", "email": f"c{i}@example.com", "email_normalized": f"c{i}@example.com", "password": "x", "phone": "555"}
+        for i in range(1, CUSTOMERS + 1)
+    ])
+    db.session.execute(insert(Mechanic), [
+        {"id": i, "name": f"M{i}", "email": f"m{i}@example.com", "phone": "555", "salary": 1.0}
+        for i in range(1, MECHANICS + 1)
+    ])
+    db.session.execute(insert(Inventory), [{"id": i, "name": f"P{i}", "price": 1.0} for i in range(1, PARTS + 1)])
+
+    for first in range(1, tickets + 1, BATCH):
+        ids = range(first, min(first + BATCH, tickets + 1))
+        db.session.execute(insert(ServiceTicket), [
+            {"id": i, "vin": f"VIN{i:014d}", "service_date": start + timedelta(days=i % 3650),
+             "service_desc": "Service", "customer_id": i % CUSTOMERS + 1}
+            for i in ids
+        ])
+        db.session.execute(insert(service_mechanic), [{"ticket_id": i, "mechanic_id": i % MECHANICS + 1} for i in ids])
+        db.session.execute(insert(ServiceInventory), [
+            {"id": i, "ticket_id": i, "inventory_id": i % PARTS + 1, "quantity": 1} for i in ids
+        ])
+    db.session.commit()
+
+
+def timed(client, url):
+    latencies = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.json
+    return statistics.median(latencies), len(response.json), response.headers.get("X-Next-Cursor")
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else TICKETS
+    app = create_app("TestingConfig")
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        seed(tickets)
+        print(f"seeded {tickets} tickets in {time.perf_counter() - started:.1f}s")
+
+        client = app.test_client()
+        searches = {
+            "vin": f"vin=VIN{tickets // 2:014d}",
+            "customer_id": "customer_id=42",
+            "mechanic_id": "mechanic_id=7",
+            "inventory_id": "inventory_id=99",
+            "date range": "from=2020-01-01&to=2020-01-31",
+            "customer + range": "customer_id=42&from=2018-01-01&to=2022-12-31",
+        }
+        print(f"{'filter':<18} | {'median ms':>10} | {'rows':>5}")
+        for name, args in searches.items():
+            median, rows, _ = timed(client, f"/service_tickets/search?{args}&per_page=50")
+            print(f"{name:<18} | {median:10.2f} | {rows:5}")
+
+        # page 11 of a wide range costs the same as page 1
+        url = "/service_tickets/search?from=2016-01-01&to=2023-12-31&per_page=50"
+        page_url = url
+        for _ in range(10):
+            page_url = f"{url}&cursor={client.get(page_url).headers['X-Next-Cursor']}"
+        median, rows, _ = timed(client, page_url)
+        print(f"{'range, page 11':<18} | {median:10.2f} | {rows:5}")
+
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Microbenchmark for token_required auth overhead.
+
+Compares the old per-request path (full jwt.decode + print of the payload) with the
+cached verify_token path, using a protected no-op view inside a request context.
+
+Run with: PYTHONPATH=. python benchmarks/bench_token_required.py
+"""
+import contextlib
+import io
+import timeit
+
+from flask import Flask
+from jose import jwt
+
+from app.utils import util
+from app.utils.util import SECRET_KEY, encode_token, token_required
+
+ITERATIONS = 20000
+
+
+def decode_every_request(token):  # what token_required did per request before the cache
+    data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+    print(data)
+    return data['sub']
+
+
+def main():
+    app = Flask(__name__)
+    token = encode_token(1)
+    view = token_required(lambda customer_id: customer_id)
+
+    with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+        with contextlib.redirect_stdout(io.StringIO()):
+            before = timeit.timeit(lambda: decode_every_request(token), number=ITERATIONS)
+
+        util._verified_tokens.clear()
+        after = timeit.timeit(view, number=ITERATIONS)
+
+    print(f"iterations:            {ITERATIONS}")
+    print(f"before (decode+print): {before / ITERATIONS * 1e6:8.2f} us/request")
+    print(f"after (cached):        {after / ITERATIONS * 1e6:8.2f} us/request")
+    print(f"speedup:               {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 #from pkg_resources import Requirement
 from app import create_app
+from app.migrations import upgrade
 from app.models import db
 
 app = create_app('ProductionConfig')
 
 with app.app_context():
-    db.create_all()
+    upgrade() # create a new database or apply pending schema migrations
+    db.engine.dispose() # don't hand the migration connections to forked workers
 
 #app.run()
 
@@ -0,0 +1,16 @@
+# Loaded automatically by gunicorn from the working directory (gunicorn flask_app:app)
+import sys
+
+
+def post_fork(server, worker):
+    # With --preload the app (and its engine) was built in the master. A forked worker
+    # must not reuse pooled connections inherited from it; close=False drops them
+    # without closing the sockets the parent still owns.
+    flask_app = sys.modules.get("flask_app")
+    if flask_app is None:
+        return  # app not loaded yet, the worker builds its own engine
+
+    from app.models import db
+
+    with flask_app.app.app_context():
+        db.engine.dispose(close=False)